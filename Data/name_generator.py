@@ -0,0 +1,219 @@
+"""
+Lazy name generator.
+
+Every name is a root followed by a gendered suffix, so a name can be computed straight
+from its index instead of materializing roots x suffixes in memory or on disk:
+
+    index -> (root, suffix) -> clean_suffix(root, suffix)
+
+When the single-root names run out, the index space continues with compound names built
+from two or more roots, so the name space is effectively unlimited. NamePool hands out
+names in a random order without repeats, using a keyed permutation of the index space
+instead of a shuffled list.
+"""
+
+import json
+import os
+import random
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+ROOTS_PATH = os.path.join(current_dir, 'roots.json')
+SUFFIXES_PATH = os.path.join(current_dir, 'suffixes.json')
+
+GENDERS = ("M", "F", "N")
+SUFFIX_KEYS = {"M": "Masculine", "F": "Feminine", "N": "GenderNeutral"}
+
+
+def clean_suffix(root, suffix):
+    """
+    Handles consonant clashes and removes suffix dashes.
+    """
+    suffix = suffix.lstrip('-')  # Remove leading dashes from suffix
+    if root[-1] == suffix[0] and root[-1].isalpha() and root[-1].lower() not in 'aeiou':
+        root = root[:-1] + "'"  # Remove the last consonant from the root
+    return root + suffix
+
+
+class NameGenerator():
+    """
+    Maps integer indices to names for each gender.
+    Index order within a tier matches the old assembled_*_names.txt files: roots outer, suffixes inner.
+    """
+    def __init__(self, roots_path=ROOTS_PATH, suffixes_path=SUFFIXES_PATH, max_roots=3):
+        with open(roots_path, 'r', encoding='utf-8') as roots_file:
+            roots_data = json.load(roots_file)
+        with open(suffixes_path, 'r', encoding='utf-8') as suffixes_file:
+            suffixes_data = json.load(suffixes_file)
+
+        # Duplicate roots would produce duplicate names, keep the first occurrence only
+        roots = []
+        for category in roots_data.values():
+            for root_entry in category:
+                root = root_entry['Root'].rstrip('-')  # Remove trailing dashes from roots
+                if root not in roots:
+                    roots.append(root)
+        self.roots = tuple(roots)
+        self.suffixes = {}
+        for gender, key in SUFFIX_KEYS.items():
+            suffixes = []
+            for entry in suffixes_data['suffixes']:
+                if entry[key] not in suffixes:
+                    suffixes.append(entry[key])
+            self.suffixes[gender] = tuple(suffixes)
+        # Genders can have different numbers of distinct suffixes
+        self.suffix_counts = {gender: len(suffixes) for gender, suffixes in self.suffixes.items()}
+        self.max_roots = max_roots
+        # Number of names using 1, 2, ... max_roots roots, per gender
+        self.tier_sizes = {gender: tuple(len(self.roots) ** parts * count for parts in range(1, max_roots + 1))
+                           for gender, count in self.suffix_counts.items()}
+
+    def size(self, gender=None):
+        """
+        Number of distinct names for one gender, or for all genders when gender is None.
+        """
+        if gender is None:
+            return sum(self.size(gender) for gender in GENDERS)
+        return sum(self.tier_sizes[gender])
+
+    def __len__(self):
+        return self.size()
+
+    def split_index(self, index, gender=None):
+        """
+        Returns (gender, root indices, suffix index) for a name index.
+        Without a gender, indices run over M names, then F names, then N names.
+        """
+        if gender is None:
+            for gender in GENDERS:
+                if index < self.size(gender):
+                    break
+                index -= self.size(gender)
+        if not 0 <= index < self.size(gender):
+            raise IndexError(f"name index {index} out of range")
+        parts = 1
+        for tier_size in self.tier_sizes[gender]:
+            if index < tier_size:
+                break
+            index -= tier_size
+            parts += 1
+        index, suffix_index = divmod(index, self.suffix_counts[gender])
+        root_indices = []
+        for _ in range(parts):
+            index, root_index = divmod(index, len(self.roots))
+            root_indices.append(root_index)
+        return gender, root_indices[::-1], suffix_index
+
+    def name(self, index, gender=None):
+        gender, root_indices, suffix_index = self.split_index(index, gender)
+        stem = self.roots[root_indices[0]]
+        for root_index in root_indices[1:]:
+            stem = clean_suffix(stem, self.roots[root_index].lower())
+        return clean_suffix(stem, self.suffixes[gender][suffix_index])
+
+    def names(self, gender, start=0, stop=None):
+        """
+        Yields names lazily, in index order.
+        """
+        stop = self.size(gender) if stop is None else min(stop, self.size(gender))
+        for index in range(start, stop):
+            yield self.name(index, gender)
+
+    def write(self, gender, path, stop=None):
+        """
+        Streams names to a file, one per line, without building the list in memory.
+        """
+        with open(path, 'w', encoding='utf-8') as file:
+            for i, name in enumerate(self.names(gender, stop=stop)):
+                if i:
+                    file.write('\n')
+                file.write(name)
+
+
+class IndexPermutation():
+    """
+    A random bijection on range(size) that needs O(1) memory.
+    It is a small Feistel network over the next even power of two, cycle-walked back into range.
+    """
+    ROUNDS = 4
+
+    def __init__(self, size, rng=random):
+        if size <= 0:
+            raise ValueError("permutation size must be positive")
+        self.size = size
+        half_bits = max(1, ((size - 1).bit_length() + 1) // 2)
+        self.half_bits = half_bits
+        self.half_mask = (1 << half_bits) - 1
+        self.keys = tuple(rng.getrandbits(32) for _ in range(self.ROUNDS))
+
+    def _encrypt(self, value):
+        left, right = value >> self.half_bits, value & self.half_mask
+        for key in self.keys:
+            left, right = right, left ^ (hash((key, right)) & self.half_mask)
+        return (left << self.half_bits) | right
+
+    def __getitem__(self, position):
+        if not 0 <= position < self.size:
+            raise IndexError(f"position {position} out of range")
+        value = self._encrypt(position)
+        while value >= self.size:
+            value = self._encrypt(value)
+        return value
+
+    def __len__(self):
+        return self.size
+
+
+class NamePool():
+    """
+    Draws names without replacement, per gender, in random order.
+    Single-root names are used up before compound names are handed out.
+    Names never repeat within a gender. Gender-neutral suffixes mostly overlap the masculine
+    ones in suffixes.json, so the same name can still appear once as M and once as N.
+    """
+    def __init__(self, generator=None, rng=random):
+        self.generator = generator if generator is not None else NameGenerator()
+        self.rng = rng
+        self.tier = {gender: 0 for gender in GENDERS}
+        self.drawn = {gender: 0 for gender in GENDERS}
+        self.permutation = {gender: IndexPermutation(self.generator.tier_sizes[gender][0], rng) for gender in GENDERS}
+
+    def remaining(self, gender):
+        used = sum(self.generator.tier_sizes[gender][:self.tier[gender]]) + self.drawn[gender]
+        return self.generator.size(gender) - used
+
+    def draw(self, gender):
+        return self.generator.name(self.draw_index(gender), gender)
+
+    def draw_index(self, gender):
+        """
+        Like draw, but returns the name's index for generator.name(index, gender).
+        """
+        tier_sizes = self.generator.tier_sizes[gender]
+        tier = self.tier[gender]
+        if self.drawn[gender] >= tier_sizes[tier]:
+            tier += 1
+            if tier >= len(tier_sizes):
+                raise ValueError(f"all {self.generator.size(gender)} names for gender {gender} are taken")
+            self.tier[gender] = tier
+            self.drawn[gender] = 0
+            self.permutation[gender] = IndexPermutation(tier_sizes[tier], self.rng)
+        offset = sum(tier_sizes[:tier])
+        index = offset + self.permutation[gender][self.drawn[gender]]
+        self.drawn[gender] += 1
+        return index
+
+    def sample(self, gender, count):
+        return [self.draw(gender) for _ in range(count)]
+
+    def save_state(self):
+        # The permutations are rebuilt from their keys, so this is all it takes to keep names unique after a load
+        return {"tier": dict(self.tier), "drawn": dict(self.drawn),
+                "keys": {gender: permutation.keys for gender, permutation in self.permutation.items()}}
+
+    def load_state(self, state):
+        self.tier = dict(state["tier"])
+        self.drawn = dict(state["drawn"])
+        for gender, keys in state["keys"].items():
+            permutation = IndexPermutation(self.generator.tier_sizes[gender][self.tier[gender]], self.rng)
+            permutation.keys = tuple(keys)
+            self.permutation[gender] = permutation
@@ -1,35 +1,102 @@
+import heapq
+import os
+import tempfile
 
+FEMALE_SUFFIXES = {"a","ess", "anne", "elle", "wyn", "eth", "in", "wen", "ynn", "enne", "ix", "ynne", "ryn"}
+MALE_SUFFIXES = {"o", "an","or", "on", "el", "onis", "us", "ic", "os", "or", "ar", "anth", "orn"}
+GENDER_NEUTRAL_SUFFIXES = {"um","en", "ann","eth", "ir", "ann", "drin", "ath", "rin", "il", "ith", "is", "ell", "lyn", "al", "as"}
 
+# Names held in memory per category before a sorted run is spilled to disk
+CHUNK_SIZE = 100_000
 
-def remove_duplicates_preserve_order(lines):
+
+class SuffixTrie():
     """
-    Remove duplicates from the list while preserving the original order.
+    Trie over reversed suffixes. Walking a name backwards finds its longest matching
+    suffix in one pass, however many suffixes are registered.
     """
-    seen = set()
-    return [line for line in lines if not (line in seen or seen.add(line))]
+    _CATEGORY = None  # key of the category stored on a node, can't clash with a character
+
+    def __init__(self):
+        self.root = {}
+
+    def add(self, suffix, category):
+        """
+        Registers a suffix. If a suffix is added twice the first category wins.
+        """
+        node = self.root
+        for char in reversed(suffix):
+            node = node.setdefault(char, {})
+        node.setdefault(self._CATEGORY, category)
+
+    def classify(self, name, default=None):
+        """
+        Returns the category of the longest registered suffix of name, or default.
+        """
+        node = self.root
+        category = default
+        for char in reversed(name):
+            node = node.get(char)
+            if node is None:
+                break
+            category = node.get(self._CATEGORY, category)
+        return category
+
+
+def build_classifier():
+    trie = SuffixTrie()
+    # Order matters only for suffixes listed in several sets ("eth"): earlier sets win
+    for category, suffixes in (("Female", FEMALE_SUFFIXES),
+                               ("Male", MALE_SUFFIXES),
+                               ("Gender-Neutral", GENDER_NEUTRAL_SUFFIXES)):
+        for suffix in sorted(suffixes):
+            trie.add(suffix, category)
+    return trie
+
+
+CLASSIFIER = build_classifier()
 
 
 def categorize_name(name):
     """
-    Categorize a name based on suffix patterns.
+    Categorize a name based on its longest matching suffix pattern.
     """
-    female_suffixes = {"a","ess", "anne", "elle", "wyn", "eth", "in", "wen", "ynn", "enne", "ix", "ynne", "ryn"}
-    male_suffixes = {"o", "an","or", "on", "el", "onis", "us", "ic", "os", "or", "ar", "anth", "orn"}
-    gender_neutral_suffixes = {"um","en", "ann","eth", "ir", "ann", "drin", "ath", "rin", "il", "ith", "is", "ell", "lyn", "al", "as"}
+    return CLASSIFIER.classify(name, "Uncategorized")
+
 
-    if any(name.endswith(suffix) for suffix in female_suffixes):
-        return "Female"
-    elif any(name.endswith(suffix) for suffix in male_suffixes):
-        return "Male"
-    elif any(name.endswith(suffix) for suffix in gender_neutral_suffixes):
-        return "Gender-Neutral"
-    else:
-        return "Uncategorized"
+def _spill_run(names, directory):
+    """
+    Sorts and dedups one chunk of names and writes it to a temporary run file.
+    """
+    fd, path = tempfile.mkstemp(dir=directory, suffix=".run")
+    with os.fdopen(fd, 'w', encoding='utf-8') as run:
+        for name in sorted(set(names)):
+            run.write(name + "\n")
+    return path
+
+
+def _read_run(path):
+    with open(path, 'r', encoding='utf-8') as run:
+        for line in run:
+            yield line.rstrip("\n")
+
+
+def merge_unique(run_paths):
+    """
+    Merges sorted run files into one sorted stream, dropping duplicates across runs.
+    """
+    previous = None
+    for name in heapq.merge(*(_read_run(path) for path in run_paths)):
+        if name != previous:
+            yield name
+            previous = name
 
 
-def process_names(input_file):
+def process_names(input_file, chunk_size=CHUNK_SIZE):
     """
     Process names from input file, categorize, sort, and write to respective files.
+    Names are streamed: each category keeps at most chunk_size names in memory and the rest
+    goes through an external merge sort, which also removes duplicates.
     """
     # File paths for output
     file_paths = {
@@ -39,22 +106,36 @@ def process_names(input_file):
         "Uncategorized": "./Data/uncategorized.txt"
     }
 
-    # Initialize categories
-    categories = {key: [] for key in file_paths.keys()}
+    with tempfile.TemporaryDirectory() as run_dir:
+        # Initialize categories
+        buffers = {key: [] for key in file_paths.keys()}
+        runs = {key: [] for key in file_paths.keys()}
 
-    # Read names, remove duplicates, and strip whitespace
-    with open(input_file, 'r') as file:
-        names = remove_duplicates_preserve_order([line.strip() for line in file])
+        # Read names one line at a time and categorize them
+        with open(input_file, 'r', encoding='utf-8') as file:
+            for line in file:
+                name = line.strip()
+                if not name:
+                    continue
+                category = categorize_name(name)
+                buffer = buffers[category]
+                buffer.append(name)
+                if len(buffer) >= chunk_size:
+                    runs[category].append(_spill_run(buffer, run_dir))
+                    buffer.clear()
 
-    # Categorize names
-    for name in names:
-        category = categorize_name(name)
-        categories[category].append(name)
+        for category, buffer in buffers.items():
+            if buffer:
+                runs[category].append(_spill_run(buffer, run_dir))
+                buffer.clear()
 
-    # Write sorted and categorized names to respective files
-    for category, file_path in file_paths.items():
-        with open(file_path, 'w') as file:
-            file.write("\n".join(sorted(categories[category])))
+        # Write sorted and categorized names to respective files
+        for category, file_path in file_paths.items():
+            with open(file_path, 'w', encoding='utf-8') as file:
+                for i, name in enumerate(merge_unique(runs[category])):
+                    if i:
+                        file.write("\n")
+                    file.write(name)
 
     print("Names have been categorized, sorted, and written to respective files.")
 
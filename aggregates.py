@@ -0,0 +1,140 @@
+# aggregates.py
+
+"""
+Colony-wide crew statistics for the HUD, kept up to date incrementally.
+
+Every tracked person contributes a small cached record (mood, which needs are over
+their threshold, gas rates). When a person changes, update(person) subtracts the old
+record and adds the new one, so each change costs O(1) (O(log n) for the minimum mood)
+and every dashboard query is O(1) no matter how large the crew is.
+"""
+
+import heapq
+import itertools
+from collections import namedtuple
+from entities.person.metabolism import current_rates
+
+# Person attribute -> level at which the need counts as pressing
+NEED_THRESHOLDS = {"thirst": 0.8, "bathroom_need": 0.8, "hunger": 0.8, "sleep_need": 1.0}
+
+CrewSummary = namedtuple("CrewSummary", ["population", "mean_mood", "min_mood", "needs_over",
+                                         "o2_per_day", "co2_per_day"])
+
+
+def activity_gas_rates(person):
+    """
+    O2 consumed and CO2 produced in L/day for what the person is doing now.
+    """
+    rates = current_rates(person)
+    return rates.o2 * 86400.0, rates.co2 * 86400.0
+
+
+class CrewAggregates():
+    """
+    Incrementally maintained population, mean and minimum mood, head counts over each
+    need threshold, and total O2 and CO2 rates. Call update(person) after changing a
+    person's needs, mood, weight or activity.
+    """
+    def __init__(self, thresholds=None, gas_rates=activity_gas_rates):
+        self.thresholds = dict(NEED_THRESHOLDS if thresholds is None else thresholds)
+        self.gas_rates = gas_rates
+        self.records = {}  # person -> (mood, needs over threshold, o2, co2, stamp)
+        self.population = 0
+        self.mood_total = 0.0
+        self.needs_over = {need: 0 for need in self.thresholds}
+        self.o2_per_day = 0.0
+        self.co2_per_day = 0.0
+        # Minimum mood: heap of (mood, stamp, person). Entries whose stamp no longer matches the
+        # person's record are stale and are dropped lazily when they reach the top.
+        self._moods = []
+        self._stamps = itertools.count()
+
+    def _record(self, person):
+        needs = tuple(getattr(person, need) >= threshold for need, threshold in self.thresholds.items())
+        o2, co2 = self.gas_rates(person)
+        return person.happiness, needs, o2, co2
+
+    def _apply(self, record, sign):
+        mood, needs, o2, co2 = record[:4]
+        self.mood_total += sign * mood
+        for need, over in zip(self.thresholds, needs):
+            if over:
+                self.needs_over[need] += sign
+        self.o2_per_day += sign * o2
+        self.co2_per_day += sign * co2
+
+    def _push_mood(self, person, mood):
+        # Keep stale entries from piling up
+        if len(self._moods) > 2 * self.population + 64:
+            self._moods = [(record[0], record[4], other) for other, record in self.records.items()]
+            heapq.heapify(self._moods)
+        stamp = next(self._stamps)
+        heapq.heappush(self._moods, (mood, stamp, person))
+        return stamp
+
+    def add(self, person):
+        if person in self.records:
+            self.update(person)
+            return
+        record = self._record(person)
+        self.population += 1
+        self._apply(record, 1)
+        self.records[person] = record + (self._push_mood(person, record[0]),)
+
+    def remove(self, person):
+        record = self.records.pop(person, None)
+        if record is None:
+            return
+        self.population -= 1
+        self._apply(record, -1)
+        if self.population == 0:
+            # Nothing left to drift: start the running sums over exactly
+            self.mood_total = self.o2_per_day = self.co2_per_day = 0.0
+            self._moods = []
+
+    def update(self, person):
+        old = self.records.get(person)
+        if old is None:
+            self.add(person)
+            return
+        record = self._record(person)
+        if record == old[:4]:
+            return
+        self._apply(old, -1)
+        self._apply(record, 1)
+        stamp = old[4] if record[0] == old[0] else self._push_mood(person, record[0])
+        self.records[person] = record + (stamp,)
+
+    def rebuild(self, people):
+        """
+        Recomputes everything from scratch, e.g. after loading a save.
+        """
+        self.__init__(self.thresholds, self.gas_rates)
+        for person in people:
+            self.add(person)
+
+    def save_state(self):
+        # Everything else is derived from the people, so only who is tracked is saved
+        return {"people": [person.entity_id for person in self.records]}
+
+    def load_state(self, state, people):
+        self.rebuild([people[entity_id] for entity_id in state["people"] if entity_id in people])
+
+    @property
+    def mean_mood(self):
+        return self.mood_total / self.population if self.population else None
+
+    @property
+    def min_mood(self):
+        moods = self._moods
+        while moods:
+            mood, stamp, person = moods[0]
+            record = self.records.get(person)
+            if record is not None and record[4] == stamp:
+                return mood
+            heapq.heappop(moods)
+        return None
+
+    def summary(self):
+        return CrewSummary(self.population, self.mean_mood, self.min_mood, dict(self.needs_over),
+                           self.o2_per_day, self.co2_per_day)
@@ -0,0 +1,156 @@
+# alerts.py
+
+"""
+Atmospheric monitoring and alerting (NASA-STD-3001 V2 6022).
+
+Readings for every room and every monitored parameter form one (rooms, parameters) array
+and are checked against all limits with a handful of array comparisons per tick.
+Each cell is in one of three states: OK, WARNING (the current trend will cross a limit
+within the warning horizon) or ALARM (a limit is crossed). Alarms clear only once the
+reading is back inside the limit by the hysteresis band, and warnings clear only once
+the predicted time to breach is comfortably past the horizon, so noisy values near a
+limit don't flap. Only state changes are reported.
+"""
+
+from collections import namedtuple
+import numpy as np
+import settings
+from entities.room.environment import O2, CO2, H2O, HPA_PER_MMHG, saturation_vapour_pressure
+
+OK, WARNING, ALARM = 0, 1, 2
+LEVEL_NAMES = ("ok", "warning", "alarm")
+
+# value is the current reading, limit the one crossed or about to be crossed (None when back to OK)
+Alert = namedtuple("Alert", ["room", "parameter", "level", "value", "limit", "time_to_breach"])
+
+
+class AlertEngine():
+    """
+    Vectorized limit checks with hysteresis and time-to-breach prediction.
+    Limits are per parameter; use nan for a side without a limit.
+    """
+    def __init__(self, parameters, low, high, hysteresis=None, warning_horizon=None, rate_smoothing=None):
+        config = settings.current().alerts
+        self.parameters = list(parameters)
+        self.low = np.asarray(low, dtype=np.float64)
+        self.high = np.asarray(high, dtype=np.float64)
+        hysteresis = config.hysteresis if hysteresis is None else hysteresis
+        # Absolute dead band per limit, a fraction of the limit's magnitude
+        self.low_band = np.nan_to_num(np.abs(self.low) * hysteresis)
+        self.high_band = np.nan_to_num(np.abs(self.high) * hysteresis)
+        self.warning_horizon = config.warning_horizon if warning_horizon is None else warning_horizon
+        self.rate_smoothing = config.rate_smoothing if rate_smoothing is None else rate_smoothing
+        self.state = None
+        self.rate = None
+        self.previous = None
+        self.time_to_breach = None
+
+    def _reset(self, rooms):
+        shape = (rooms, len(self.parameters))
+        self.state = np.zeros(shape, dtype=np.int8)
+        self.rate = np.zeros(shape)
+        self.previous = None
+        self.time_to_breach = np.full(shape, np.inf)
+
+    def evaluate(self, readings, dt):
+        """
+        Checks a (rooms, parameters) array of readings taken dt game seconds after the last ones.
+        Returns the list of Alerts whose level changed.
+        """
+        readings = np.asarray(readings, dtype=np.float64)
+        if self.state is None or self.state.shape != readings.shape:
+            self._reset(readings.shape[0])
+
+        # Smoothed rate of change per game second
+        if self.previous is not None and dt > 0:
+            instant = (readings - self.previous) / dt
+            self.rate += self.rate_smoothing * (instant - self.rate)
+        self.previous = readings.copy()
+
+        alarmed = self.state == ALARM
+        with np.errstate(invalid='ignore'):
+            # An active alarm holds until the reading is back inside by the band
+            over = np.where(alarmed, readings > self.high - self.high_band, readings > self.high)
+            under = np.where(alarmed, readings < self.low + self.low_band, readings < self.low)
+
+            # Time until the current trend crosses a limit; inf when moving away from it
+            rising = self.rate > 0
+            falling = self.rate < 0
+            to_high = np.where(rising, (self.high - readings) / np.where(rising, self.rate, 1.0), np.inf)
+            to_low = np.where(falling, (readings - self.low) / np.where(falling, -self.rate, 1.0), np.inf)
+        to_breach = np.fmin(np.nan_to_num(to_high, nan=np.inf), np.nan_to_num(to_low, nan=np.inf))
+        np.maximum(to_breach, 0.0, out=to_breach)
+        self.time_to_breach = to_breach
+
+        # A warning holds until the predicted breach is 1.5 horizons away
+        warned = self.state == WARNING
+        horizon = np.where(warned, self.warning_horizon * 1.5, self.warning_horizon)
+        warning = to_breach < horizon
+
+        state = np.where(over | under, ALARM, np.where(warning, WARNING, OK)).astype(np.int8)
+        changed = np.nonzero(state != self.state)
+        self.state = state
+
+        alerts = []
+        for room, parameter in zip(*changed):
+            level = int(state[room, parameter])
+            value = float(readings[room, parameter])
+            if level == OK:
+                limit = None
+            elif level == ALARM:
+                limit = float(self.high[parameter] if over[room, parameter] else self.low[parameter])
+            else:
+                limit = float(self.high[parameter] if to_high[room, parameter] <= to_low[room, parameter]
+                              else self.low[parameter])
+            alerts.append(Alert(int(room), self.parameters[parameter], LEVEL_NAMES[level], value, limit,
+                                float(to_breach[room, parameter])))
+        return alerts
+
+    def active(self, level=ALARM):
+        """
+        (room, parameter) index pairs currently at the given level or worse.
+        """
+        if self.state is None:
+            return []
+        return list(zip(*np.nonzero(self.state >= level)))
+
+
+ATMOSPHERE_PARAMETERS = ("o2_mmhg", "co2_ppm", "pressure_hpa", "temperature", "relative_humidity")
+
+
+def atmosphere_limits(config=None):
+    """
+    Per-parameter (low, high) limits from the crew limits in the alerts settings.
+    """
+    alerts = (settings.current() if config is None else config).alerts
+    low = [alerts.o2_low, np.nan, alerts.pressure_low, alerts.temperature_low, alerts.humidity_low]
+    high = [alerts.o2_high, alerts.co2_high, alerts.pressure_high, alerts.temperature_high, alerts.humidity_high]
+    return low, high
+
+
+def atmosphere_readings(network):
+    """
+    Monitored readings for every room of an AtmosphereNetwork as a (rooms, parameters) array.
+    """
+    partial = network.partial
+    pressure = partial.sum(axis=1)
+    readings = np.empty((network.count, len(ATMOSPHERE_PARAMETERS)))
+    readings[:, 0] = partial[:, O2] / HPA_PER_MMHG
+    readings[:, 1] = np.divide(partial[:, CO2], pressure, out=np.zeros(network.count), where=pressure > 0) * 1e6
+    readings[:, 2] = pressure
+    readings[:, 3] = network.temperature
+    readings[:, 4] = partial[:, H2O] / saturation_vapour_pressure(network.temperature) * 100.0
+    return readings
+
+
+class AtmosphereAlerts(AlertEngine):
+    """
+    Alerting for every room of a ship's atmosphere against the crew's tolerances.
+    """
+    def __init__(self, network, **kwargs):
+        low, high = atmosphere_limits()
+        super().__init__(ATMOSPHERE_PARAMETERS, low, high, **kwargs)
+        self.network = network
+
+    def update(self, game_dt):
+        return self.evaluate(atmosphere_readings(self.network), game_dt)
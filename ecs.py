@@ -0,0 +1,254 @@
+# ecs.py
+
+"""
+Entity-component store.
+
+An entity is just an integer id. Each component type keeps its data in its own
+NumPy columns, packed densely (no holes), with a sparse id -> row array beside it;
+removing a component moves the last row into the gap, so columns stay contiguous.
+Systems ask for the entities that have a set of components and get back row
+indices into each component's columns, then work on whole arrays at once instead
+of walking Person, Room and Item objects.
+"""
+
+import numpy as np
+import settings
+
+# Component types: name -> {field: (dtype, default)}. Components without fields are tags.
+COMPONENTS = {
+    "needs": {"thirst": (np.float64, 0.0), "bathroom_need": (np.float64, 0.0), "hunger": (np.float64, 0.0),
+              "sleep_need": (np.float64, 0.0), "happiness": (np.float64, 1.0)},
+    "position": {"x": (np.float64, 0.0), "y": (np.float64, 0.0), "speed": (np.float64, 0.5)},
+    "health": {"age": (np.int16, 0), "weight": (np.float64, 0.0), "height": (np.float64, 0.0),
+               "male": (np.bool_, False)},
+    "wear": {"condition": (np.float64, 1.0), "operational": (np.bool_, True)},
+    # Entity ids of the assigned bed and job, -1 for none
+    "assignment": {"bed": (np.int64, -1), "job": (np.int64, -1)},
+    "crew": {},
+    "room": {},
+    "item": {},
+}
+
+
+class ComponentStore():
+    """
+    Columns for one component type, one dense row per entity that has it.
+    """
+    def __init__(self, name, fields, capacity=64):
+        self.name = name
+        self.fields = dict(fields)
+        self.count = 0
+        self.entities = np.empty(capacity, dtype=np.int64)  # row -> entity
+        self.sparse = np.full(capacity, -1, dtype=np.int64)  # entity -> row, -1 if absent
+        self._columns = {field: np.zeros(capacity, dtype=dtype) for field, (dtype, _) in self.fields.items()}
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, entity):
+        return entity < len(self.sparse) and self.sparse[entity] >= 0
+
+    def column(self, field):
+        """
+        The live rows of one field. A view: writes go straight into the store.
+        """
+        return self._columns[field][:self.count]
+
+    def _grow_rows(self):
+        capacity = 2 * len(self.entities)
+        self.entities = np.resize(self.entities, capacity)
+        for field, column in self._columns.items():
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[:self.count] = column[:self.count]
+            self._columns[field] = grown
+
+    def _grow_ids(self, entity):
+        capacity = max(2 * len(self.sparse), entity + 1)
+        grown = np.full(capacity, -1, dtype=np.int64)
+        grown[:len(self.sparse)] = self.sparse
+        self.sparse = grown
+
+    def add(self, entity, values):
+        if entity >= len(self.sparse):
+            self._grow_ids(entity)
+        row = self.sparse[entity]
+        if row < 0:
+            if self.count == len(self.entities):
+                self._grow_rows()
+            row = self.count
+            self.count += 1
+            self.entities[row] = entity
+            self.sparse[entity] = row
+            for field, (_, default) in self.fields.items():
+                self._columns[field][row] = default
+        for field, value in values.items():
+            if field not in self._columns:
+                raise KeyError(f"{self.name} has no field {field!r}")
+            self._columns[field][row] = value
+
+    def add_many(self, entities, values):
+        """
+        Adds the component to an array of entities that do not have it yet.
+        values maps fields to a scalar or one value per entity.
+        """
+        entities = np.asarray(entities, dtype=np.int64)
+        if len(entities) == 0:
+            return
+        if entities.max() >= len(self.sparse):
+            self._grow_ids(int(entities.max()))
+        while self.count + len(entities) > len(self.entities):
+            self._grow_rows()
+        rows = np.arange(self.count, self.count + len(entities))
+        self.entities[rows] = entities
+        self.sparse[entities] = rows
+        for field, (_, default) in self.fields.items():
+            self._columns[field][rows] = values.get(field, default)
+        self.count += len(entities)
+
+    def remove(self, entity):
+        row = self.sparse[entity] if entity < len(self.sparse) else -1
+        if row < 0:
+            return False
+        last = self.count - 1
+        if row != last:
+            # Fill the gap with the last row
+            moved = self.entities[last]
+            self.entities[row] = moved
+            self.sparse[moved] = row
+            for column in self._columns.values():
+                column[row] = column[last]
+        self.sparse[entity] = -1
+        self.count -= 1
+        return True
+
+    def get(self, entity):
+        row = self.sparse[entity] if entity < len(self.sparse) else -1
+        if row < 0:
+            return None
+        return {field: column[row].item() for field, column in self._columns.items()}
+
+    def rows(self, entities):
+        """
+        Row of each entity in an array of ids, -1 where the entity lacks this component.
+        """
+        entities = np.asarray(entities, dtype=np.int64)
+        rows = np.full(len(entities), -1, dtype=np.int64)
+        known = entities < len(self.sparse)
+        rows[known] = self.sparse[entities[known]]
+        return rows
+
+
+class World():
+    """
+    All entities and their component stores.
+    """
+    def __init__(self, components=None):
+        self.stores = {name: ComponentStore(name, fields)
+                       for name, fields in (COMPONENTS if components is None else components).items()}
+        self.next_id = 0
+        self.alive = set()
+
+    def __len__(self):
+        return len(self.alive)
+
+    def store(self, component):
+        return self.stores[component]
+
+    def create(self, **components):
+        """
+        A new entity id, optionally with components: create(needs={}, position={"x": 3.0}).
+        Ids are never reused, so they stay valid as references after the entity is gone.
+        """
+        entity = self.next_id
+        self.next_id += 1
+        self.alive.add(entity)
+        for component, values in components.items():
+            self.add(entity, component, **(values or {}))
+        return entity
+
+    def create_many(self, count, **components):
+        """
+        count new entities at once; component values may be arrays of length count.
+        """
+        entities = np.arange(self.next_id, self.next_id + count, dtype=np.int64)
+        self.next_id += count
+        self.alive.update(entities.tolist())
+        for component, values in components.items():
+            self.stores[component].add_many(entities, values or {})
+        return entities
+
+    def destroy(self, entity):
+        for store in self.stores.values():
+            store.remove(entity)
+        self.alive.discard(entity)
+
+    def add(self, entity, component, **values):
+        self.stores[component].add(entity, values)
+
+    def remove(self, entity, component):
+        return self.stores[component].remove(entity)
+
+    def has(self, entity, component):
+        return entity in self.stores[component]
+
+    def get(self, entity, component):
+        return self.stores[component].get(entity)
+
+    def query(self, *components):
+        """
+        Entities that have every one of the components, and their row in each store:
+        returns (entities, {component: rows}). Cost is set by the smallest store.
+        """
+        stores = [self.stores[component] for component in components]
+        smallest = min(stores, key=len)
+        entities = smallest.entities[:smallest.count].copy()
+        for store in stores:
+            if store is not smallest:
+                entities = entities[store.rows(entities) >= 0]
+        return entities, {component: store.rows(entities) for component, store in zip(components, stores)}
+
+
+def update_needs(world, dt):
+    """
+    Needs system: the per-person loop of Metabolism.update_person_needs as four array updates.
+    """
+    time_settings = settings.current().time
+    needs = world.store("needs")
+    for field, increment, cap in (("thirst", time_settings.thirst_inc, 1.0),
+                                  ("bathroom_need", time_settings.bathroom_inc, 1.0),
+                                  ("hunger", time_settings.hunger_inc, 1.0),
+                                  ("sleep_need", time_settings.sleep_inc, 3.0)):
+        column = needs.column(field)
+        np.minimum(column + increment * dt, cap, out=column)
+
+
+def spawn_person(world, person):
+    """
+    Copies a Person into the world as a crew entity and returns its id.
+    """
+    x, y = person.position
+    return world.create(
+        crew=None,
+        needs={"thirst": person.thirst, "bathroom_need": person.bathroom_need, "hunger": person.hunger,
+               "sleep_need": person.sleep_need, "happiness": person.happiness},
+        position={"x": x, "y": y, "speed": person.speed},
+        health={"age": person.age, "weight": person.weight, "height": person.height, "male": person.sex == "M"},
+        assignment=None,
+    )
+
+
+if __name__ == "__main__":
+    import time
+    world = World()
+    rng = np.random.default_rng(0)
+    started = time.perf_counter()
+    world.create_many(150_000, crew=None, needs=None,
+                      position={"x": rng.random(150_000) * 100, "y": rng.random(150_000) * 100})
+    world.create_many(50_000, item=None, wear={"condition": rng.random(50_000)})
+    print(f"{len(world)} entities created in {time.perf_counter() - started:.2f} s")
+    started = time.perf_counter()
+    update_needs(world, 1.0)
+    crew, rows = world.query("crew", "position")
+    positions = np.stack([world.store("position").column("x")[rows["position"]],
+                          world.store("position").column("y")[rows["position"]]], axis=1)
+    print(f"needs update and position query over {len(crew)} crew: {(time.perf_counter() - started) * 1000:.1f} ms")
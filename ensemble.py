@@ -0,0 +1,203 @@
+# ensemble.py
+
+"""
+Ensemble mode: K variants of one colony advanced in lockstep.
+
+Every variant starts from the same crew but gets its own settings (penalty weights,
+need durations, BMI limits, initial resources...). All crew and resource state carries
+a leading variant axis, shape (K, crew) or (K,), so one tick is the same handful of
+array operations whether there are 1 or 100 variants. Per-variant time series of
+population, mood and gases are sampled as the ensemble runs.
+"""
+
+import copy
+import numpy as np
+import settings
+from entities.person.metabolism import ACTIVITIES, ACTIVITY_ALIASES, rate_table
+
+# Need columns, in the order of the need arrays' last axis
+NEEDS = ("thirst", "bathroom_need", "hunger", "sleep_need")
+NEED_CAPS = np.array([1.0, 1.0, 1.0, 3.0])
+SERIES = ("population", "mean_mood", "min_mood", "o2", "co2")
+# What changes as the ensemble runs, or comes from the crew it was built from; the rest comes from the variants
+STATE = ("needs", "happiness", "weight", "alive", "days_without_job", "height", "male", "has_job", "has_bed",
+         "o2_rate", "co2_rate", "o2", "co2", "game_time", "day", "next_sample")
+
+
+def variant_settings(overrides, base=None):
+    """
+    Settings with some values replaced: {"penalties": {"hunger": 0.4}, "initial_resources": {"o2": 3000}}.
+    """
+    raw = copy.deepcopy(settings.config if base is None else base)
+    for section, values in overrides.items():
+        raw.setdefault(section, {}).update(values)
+    return settings.build_settings(raw)
+
+
+class Ensemble():
+    """
+    The crew's needs, mood, weight and survival, and the O2/CO2 totals, for K variants at once.
+    """
+    def __init__(self, crew, variants, sample_interval=600.0):
+        """
+        crew is a list of Person to copy into every variant; variants is a list of Settings
+        or override dicts (see variant_settings). sample_interval is in game seconds.
+        """
+        self.variants = [v if isinstance(v, settings.Settings) else variant_settings(v) for v in variants]
+        time_scales = {config.time.time_scale for config in self.variants}
+        if len(time_scales) > 1:
+            raise settings.SettingsError("ensemble: all variants must share time.time_scale to run in lockstep")
+        k, n = len(self.variants), len(crew)
+        self.time_scale = time_scales.pop() if time_scales else 1.0
+
+        # Per-variant parameters, one row per variant
+        self.need_inc = np.array([[c.time.thirst_inc, c.time.bathroom_inc, c.time.hunger_inc, c.time.sleep_inc]
+                                  for c in self.variants]).reshape(k, 4)
+        self.need_weights = np.array([[c.penalties.thirst, c.penalties.bathroom, c.penalties.hunger, c.penalties.sleep]
+                                      for c in self.variants]).reshape(k, 4)
+        self.jobless_penalty = np.array([c.penalties.jobless for c in self.variants])
+        self.bedless_penalty = np.array([c.penalties.bedless for c in self.variants])
+        self.bmi_male = np.array([c.bmi.threshold_male for c in self.variants])
+        self.bmi_female = np.array([c.bmi.threshold_female for c in self.variants])
+        self.weight_loss = np.array([c.bmi.daily_weight_loss_rate for c in self.variants])
+
+        # Crew state, (K, n) copies of the template crew
+        def per_variant(values, dtype=np.float64):
+            return np.repeat(np.asarray(values, dtype=dtype).reshape(1, n), k, axis=0)
+        self.needs = np.repeat(np.array([[getattr(p, need) for need in NEEDS] for p in crew]).reshape(1, n, 4), k, axis=0)
+        self.happiness = per_variant([p.happiness for p in crew])
+        self.weight = per_variant([p.weight for p in crew])
+        self.alive = np.ones((k, n), dtype=bool)
+        self.days_without_job = np.zeros((k, n))
+        self.height = np.array([p.height for p in crew], dtype=np.float64)
+        self.male = np.array([p.gender.upper() == "M" for p in crew], dtype=bool)
+        self.has_job = np.array([p.assigned_job for p in crew], dtype=bool)
+        self.has_bed = np.array([p.assigned_bed for p in crew], dtype=bool)
+        # Gas exchange per game second at each person's current activity (rates are per body, not per variant)
+        rates = [rate_table(p) for p in crew]
+        activities = [ACTIVITY_ALIASES.get(p.activity, p.activity) for p in crew]
+        activities = [a if a in ACTIVITIES else "rest" for a in activities]
+        self.o2_rate = np.array([r[a].o2 for r, a in zip(rates, activities)], dtype=np.float64)
+        self.co2_rate = np.array([r[a].co2 for r, a in zip(rates, activities)], dtype=np.float64)
+
+        self.o2 = np.array([c.initial_resources.o2 for c in self.variants], dtype=np.float64)
+        self.co2 = np.array([c.initial_resources.co2 for c in self.variants], dtype=np.float64)
+
+        self.game_time = 0.0
+        self.day = 0
+        self.sample_interval = sample_interval
+        self.next_sample = 0.0
+        self.times = []
+        self.samples = {name: [] for name in SERIES}
+
+    def __len__(self):
+        return len(self.variants)
+
+    def population(self):
+        return self.alive.sum(axis=1)
+
+    def update_needs(self, dt):
+        np.minimum(self.needs + self.need_inc[:, None, :] * dt, NEED_CAPS, out=self.needs)
+
+    def update_happiness(self):
+        # Metabolism.update_happiness, with each variant's own weights
+        penalty = np.einsum("knj,kj->kn", np.minimum(self.needs, 1.0), self.need_weights)
+        extra_sleep = np.maximum(self.needs[:, :, 3] - 1.0, 0.0)
+        penalty += extra_sleep * (2.0 * self.need_weights[:, 3:4])
+        jobless = np.minimum(self.days_without_job / 7.0, 1.0) * ~self.has_job
+        penalty += jobless * self.jobless_penalty[:, None]
+        penalty += ~self.has_bed * self.bedless_penalty[:, None]
+        np.clip(1.0 - penalty, 0.0, 1.0, out=self.happiness)
+
+    def update_gases(self, game_dt):
+        self.o2 = np.maximum(0.0, self.o2 - (self.alive @ self.o2_rate) * game_dt)
+        self.co2 += (self.alive @ self.co2_rate) * game_dt
+
+    def end_of_day(self):
+        """
+        end_of_day_mortality for every variant at once. Returns the number of deaths per variant.
+        """
+        sleep_death = self.alive & (self.needs[:, :, 3] >= 3.0)
+        starving = self.alive & (self.needs[:, :, 2] >= 1.0) & ~sleep_death
+        self.weight = np.where(starving, self.weight * (1.0 - self.weight_loss[:, None]), self.weight)
+        threshold = np.where(self.male, self.bmi_male[:, None], self.bmi_female[:, None])
+        starved = starving & (self.weight / self.height ** 2 < threshold)
+        dead = sleep_death | starved
+        self.alive &= ~dead
+        self.days_without_job += ~self.has_job
+        return dead.sum(axis=1)
+
+    def tick(self, dt):
+        """
+        Advances every variant by dt real seconds.
+        """
+        game_dt = dt * self.time_scale
+        self.game_time += game_dt
+        self.update_needs(dt)
+        self.update_happiness()
+        self.update_gases(game_dt)
+        day = int(self.game_time // 86400)
+        if day > self.day:
+            self.end_of_day()
+            self.day = day
+        if self.game_time >= self.next_sample:
+            self.sample()
+            self.next_sample = self.game_time + self.sample_interval
+
+    def sample(self):
+        population = self.population()
+        mood = np.where(self.alive, self.happiness, np.nan)
+        with np.errstate(all="ignore"):
+            mean_mood = np.where(population > 0, np.nansum(mood, axis=1) / np.maximum(population, 1), np.nan)
+            min_mood = np.where(population > 0, np.nanmin(np.where(self.alive, mood, np.inf), axis=1), np.nan)
+        self.times.append(self.game_time)
+        for name, values in zip(SERIES, (population, mean_mood, min_mood, self.o2, self.co2)):
+            self.samples[name].append(np.array(values, dtype=np.float64))
+
+    def save_state(self):
+        state = {name: getattr(self, name) for name in STATE}
+        state["times"] = self.times
+        state["samples"] = self.samples
+        return state
+
+    def load_state(self, state):
+        """
+        Restores a saved run into an ensemble built with the same variants.
+        """
+        if state["needs"].shape[0] != len(self):
+            raise ValueError(f"ensemble: saved {state['needs'].shape[0]} variants, this one has {len(self)}")
+        for name in STATE:
+            value = state[name]
+            setattr(self, name, value.copy() if isinstance(value, np.ndarray) else value)
+        self.times = list(state["times"])
+        self.samples = {name: [np.array(values) for values in state["samples"][name]] for name in SERIES}
+
+    def series(self, name=None):
+        """
+        Sampled history: (times, {series: (samples, K) array}), or (times, array) for one series.
+        """
+        times = np.array(self.times)
+        if name is not None:
+            return times, np.array(self.samples[name]).reshape(len(times), len(self))
+        return times, {key: np.array(values).reshape(len(times), len(self)) for key, values in self.samples.items()}
+
+
+if __name__ == "__main__":
+    import time
+    from entities.person import Person
+
+    crew = [Person() for _ in range(50)]
+    for person in crew[::2]:
+        person.job = "Engineer"
+    variants = [{"penalties": {"hunger": 0.1 + 0.004 * i}, "initial_resources": {"o2": 2000.0 + 50.0 * i}}
+                for i in range(100)]
+    for count in (1, 100):
+        ensemble = Ensemble(crew, variants[:count])
+        started = time.perf_counter()
+        for _ in range(10_000):
+            ensemble.tick(1 / 60)
+        elapsed = time.perf_counter() - started
+        print(f"{count} variants x {len(crew)} crew: 10000 ticks in {elapsed:.2f} s")
+    times, series = ensemble.series()
+    print(f"{len(times)} samples; final mean mood {series['mean_mood'][-1].min():.3f}..{series['mean_mood'][-1].max():.3f}, "
+          f"final O2 {series['o2'][-1].min():.0f}..{series['o2'][-1].max():.0f} L")
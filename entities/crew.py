@@ -1,8 +1,85 @@
-from entities.person import Person
+import copy
+import itertools
+import random
+import numpy as np
+from entities.person import Person, name_pool
+from entities.palette import get_palette
+from aggregates import CrewAggregates
+
+# Person attributes saved as columns, one entry per person
+FLOAT_FIELDS = ("weight", "height", "thirst", "bathroom_need", "hunger", "sleep_need", "happiness", "speed")
+INT_FIELDS = ("age", "first_name_index", "last_name_index", "hair_index", "entity_id")
+TEXT_FIELDS = ("sex", "gender", "career", "bed", "job", "activity")
+
 
 class Crew():
     
     def __init__(self):
-        first_colonist = Person(first_name="Alice", last_name="Laine", gender="F", age=20, career="Eng", weight=70.0, height=170.0, hair_color="Red", assigned_bed=False, assigned_job=False)
-        self.crew = [first_colonist]
-   
\ No newline at end of file
+        self.crew = []
+        # Colony-wide statistics, kept current as people join, leave and change
+        self.aggregates = CrewAggregates()
+        self.next_id = itertools.count(1)
+        self.add_person(Person())
+
+    def add_person(self, person):
+        if person.entity_id is None:
+            person.entity_id = next(self.next_id)
+        self.crew.append(person)
+        self.aggregates.add(person)
+
+    def remove_person(self, person):
+        self.crew.remove(person)
+        self.aggregates.remove(person)
+
+    def populate(self, count, rooms=()):
+        """
+        Fills the crew up to count people and scatters everyone over random spots in the rooms.
+        """
+        while len(self.crew) < count:
+            self.add_person(Person())
+        bounds = [room.bounds for room in rooms if room.bounds is not None]
+        if not bounds:
+            return
+        for person in self.crew:
+            x, y, width, height = random.choice(bounds)
+            person.position = (x + random.random() * width, y + random.random() * height)
+
+    def hair_display_colors(self):
+        """
+        Age-greyed hair colors for the whole crew as an (n, 3) array, in crew order.
+        """
+        indices = [person.hair_index for person in self.crew]
+        ages = [person.age for person in self.crew]
+        return get_palette().display_colors(indices, ages)
+
+    def save_state(self):
+        """
+        The crew as columns (NumPy arrays for numbers), which is far quicker to copy than a dict per person.
+        """
+        people = self.crew
+        state = {name: np.array([getattr(person, name) for person in people], dtype=np.float64)
+                 for name in FLOAT_FIELDS}
+        state.update({name: np.array([getattr(person, name) for person in people], dtype=np.int64)
+                      for name in INT_FIELDS})
+        state.update({name: [getattr(person, name) for person in people] for name in TEXT_FIELDS})
+        state["position"] = np.array([person.position for person in people], dtype=np.float64).reshape(-1, 2)
+        # Peek at the counter without using up an id
+        state["next_id"] = next(copy.copy(self.next_id))
+        state["names"] = name_pool().save_state()
+        return state
+
+    def load_state(self, state):
+        self.crew = []
+        columns = {name: state[name].tolist() for name in FLOAT_FIELDS + INT_FIELDS}
+        columns.update({name: state[name] for name in TEXT_FIELDS})
+        columns["position"] = [tuple(position) for position in state["position"].tolist()]
+        for values in zip(*columns.values()):
+            # A blank Person: every slot comes from the save, nothing is drawn at random
+            person = Person.__new__(Person)
+            person.rates = None
+            for name, value in zip(columns, values):
+                setattr(person, name, value)
+            self.crew.append(person)
+        self.next_id = itertools.count(state["next_id"])
+        name_pool().load_state(state["names"])
+        self.aggregates.rebuild(self.crew)
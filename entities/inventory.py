@@ -0,0 +1,374 @@
+# entities/inventory.py
+
+"""
+Ship-wide inventory.
+
+Fungible items are counts in (room, type) stacks. Replacement parts, which wear out
+one by one, are rows in typed arrays (wear, wear limit, room) instead of objects.
+Stock is indexed by type and by room, so "how many are left" is a dict lookup. The
+spares in each (room, type) sit in a heap keyed on wear, so the least worn one comes
+out in O(log k). The rooms holding each type are bucketed in a coarse grid, and
+"where is the nearest spare" searches outwards ring by ring from the asker's cell,
+so it only looks at rooms that are nearby and actually hold one.
+"""
+
+from collections import defaultdict
+import heapq
+import math
+import numpy as np
+
+# Room of parts that have been taken out of storage and fitted somewhere
+INSTALLED = -1
+
+
+class PartPool():
+    """
+    Wear-tracked parts in parallel arrays. A part's id is its row; freed rows are reused.
+    """
+    def __init__(self, capacity=64):
+        self.types = []  # type name per type code
+        self.type_codes = {}
+        self.type = np.zeros(capacity, dtype=np.int32)
+        self.wear = np.zeros(capacity)
+        self.wear_limit = np.zeros(capacity)
+        self.room = np.full(capacity, INSTALLED, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.size = 0
+        self.free = []
+
+    def __len__(self):
+        return self.size - len(self.free)
+
+    def type_code(self, item_type):
+        code = self.type_codes.get(item_type)
+        if code is None:
+            code = self.type_codes[item_type] = len(self.types)
+            self.types.append(item_type)
+        return code
+
+    def _grow(self):
+        capacity = 2 * len(self.alive)
+        for name in ("type", "wear", "wear_limit", "room", "alive"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+    def add(self, item_type, wear_limit, room, wear=0.0):
+        if self.free:
+            part = self.free.pop()
+        else:
+            if self.size == len(self.alive):
+                self._grow()
+            part = self.size
+            self.size += 1
+        self.type[part] = self.type_code(item_type)
+        self.wear[part] = wear
+        self.wear_limit[part] = wear_limit
+        self.room[part] = room
+        self.alive[part] = True
+        return part
+
+    def discard(self, part):
+        if not self.alive[part]:
+            return
+        self.alive[part] = False
+        self.room[part] = INSTALLED
+        self.free.append(part)
+
+    def operational(self, parts):
+        parts = np.asarray(parts, dtype=np.intp)
+        return self.wear[parts] < self.wear_limit[parts]
+
+    def save_state(self):
+        size = self.size
+        return {"types": self.types, "type": self.type[:size], "wear": self.wear[:size],
+                "wear_limit": self.wear_limit[:size], "room": self.room[:size], "alive": self.alive[:size],
+                "free": self.free}
+
+    def load_state(self, state):
+        self.__init__(max(64, len(state["alive"])))
+        for code, item_type in enumerate(state["types"]):
+            self.type_codes[item_type] = code
+        self.types = list(state["types"])
+        self.size = len(state["alive"])
+        for name in ("type", "wear", "wear_limit", "room", "alive"):
+            getattr(self, name)[:self.size] = state[name]
+        self.free = list(state["free"])
+
+    def apply_wear(self, parts, amount):
+        """
+        Adds wear to an array of parts (amount is a scalar or one value per part).
+        Returns the parts that wore out with this call.
+        """
+        parts = np.asarray(parts, dtype=np.intp)
+        was_working = self.wear[parts] < self.wear_limit[parts]
+        self.wear[parts] += amount
+        return parts[was_working & (self.wear[parts] >= self.wear_limit[parts])]
+
+
+class Inventory():
+    """
+    Item stacks and spare parts per room. Rooms are indices into the ship's room list.
+    """
+    def __init__(self, room_positions=None, cell=32.0):
+        self.stacks = defaultdict(int)  # (room, type) -> count, parts in storage included
+        self.totals = defaultdict(int)  # type -> count over all rooms
+        self.rooms_with = defaultdict(set)  # type -> rooms holding at least one
+        self.stored_parts = defaultdict(set)  # (room, type) -> part ids in storage there
+        # (room, type) -> heap of (wear, part); entries for parts no longer there are skipped lazily
+        self.wear_heaps = {}
+        self.parts = PartPool()
+        # (x, y) tile position per room, for nearest-stock queries
+        self.room_positions = np.asarray(room_positions if room_positions is not None else [],
+                                         dtype=np.float64).reshape(-1, 2)
+        # type -> {(cx, cy): rooms}, over rooms with a position; cell is in tiles
+        self.cell = cell
+        self.room_cells = defaultdict(dict)
+        self.unplaced = defaultdict(set)  # type -> rooms holding it that have no position yet
+        self._extent = None  # (min cx, min cy, max cx, max cy) over all room positions
+        if len(self.room_positions):
+            cells = np.floor(self.room_positions / self.cell).astype(np.int64)
+            self._extent = (*cells.min(axis=0).tolist(), *cells.max(axis=0).tolist())
+
+    def save_state(self):
+        # The indexes (totals, rooms holding each type, wear heaps, grid cells) are rebuilt on load
+        return {"stacks": dict(self.stacks), "parts": self.parts, "room_positions": self.room_positions,
+                "cell": self.cell}
+
+    def load_state(self, state):
+        self.__init__(state["room_positions"], state["cell"])
+        self.parts.load_state(state["parts"])
+        for (room, item_type), count in state["stacks"].items():
+            self._change(room, item_type, count)
+        parts = self.parts
+        for part in np.flatnonzero(parts.alive[:parts.size] & (parts.room[:parts.size] != INSTALLED)).tolist():
+            self._stow(part, int(parts.room[part]), parts.types[parts.type[part]])
+
+    def _room_cell(self, room):
+        if room >= len(self.room_positions):
+            return None
+        x, y = self.room_positions[room]
+        return math.floor(x / self.cell), math.floor(y / self.cell)
+
+    def _index_room(self, room, item_type):
+        cell = self._room_cell(room)
+        if cell is None:
+            self.unplaced[item_type].add(room)
+        else:
+            self.room_cells[item_type].setdefault(cell, set()).add(room)
+
+    def _unindex_room(self, room, item_type):
+        cell = self._room_cell(room)
+        if cell is None:
+            self.unplaced[item_type].discard(room)
+            return
+        cells = self.room_cells[item_type]
+        rooms = cells.get(cell)
+        if rooms is not None:
+            rooms.discard(room)
+            if not rooms:
+                del cells[cell]
+
+    def _change(self, room, item_type, delta):
+        key = (room, item_type)
+        previous = self.stacks.get(key, 0)
+        count = previous + delta
+        if count:
+            if not previous:
+                self._index_room(room, item_type)
+            self.stacks[key] = count
+            self.rooms_with[item_type].add(room)
+        else:
+            del self.stacks[key]
+            self.rooms_with[item_type].discard(room)
+            self._unindex_room(room, item_type)
+        self.totals[item_type] += delta
+
+    def count(self, item_type, room=None):
+        if room is None:
+            return self.totals.get(item_type, 0)
+        return self.stacks.get((room, item_type), 0)
+
+    def add(self, item_type, count, room):
+        if count > 0:
+            self._change(room, item_type, count)
+
+    def take(self, item_type, count, room):
+        """
+        Removes up to count fungible items of a type from a room. Returns how many were taken.
+        """
+        available = self.count(item_type, room) - len(self.stored_parts.get((room, item_type), ()))
+        taken = max(0, min(count, available))
+        if taken:
+            self._change(room, item_type, -taken)
+        return taken
+
+    def _stow(self, part, room, item_type):
+        key = (room, item_type)
+        stored = self.stored_parts[key]
+        stored.add(part)
+        heap = self.wear_heaps.setdefault(key, [])
+        heapq.heappush(heap, (float(self.parts.wear[part]), part))
+        if len(heap) > 2 * len(stored) + 16:
+            # Mostly stale entries: rebuild from what is actually there
+            heap[:] = [(float(self.parts.wear[p]), p) for p in stored]
+            heapq.heapify(heap)
+
+    def add_part(self, item_type, wear_limit, room, wear=0.0):
+        part = self.parts.add(item_type, wear_limit, room, wear)
+        self._stow(part, room, item_type)
+        self._change(room, item_type, 1)
+        return part
+
+    def take_part(self, item_type, room):
+        """
+        Takes the least worn spare of a type out of a room's storage, to be fitted. Returns its id, or None.
+        """
+        key = (room, item_type)
+        stored = self.stored_parts.get(key)
+        if not stored:
+            return None
+        heap = self.wear_heaps[key]
+        while True:
+            wear, part = heapq.heappop(heap)
+            if part not in stored:
+                continue
+            current = float(self.parts.wear[part])
+            if current != wear:
+                # Worn in storage since it was queued: back in at its current wear
+                heapq.heappush(heap, (current, part))
+                continue
+            break
+        stored.discard(part)
+        if not stored:
+            del self.stored_parts[key]
+            del self.wear_heaps[key]
+        self.parts.room[part] = INSTALLED
+        self._change(room, item_type, -1)
+        return part
+
+    def store_part(self, part, room):
+        """
+        Puts a fitted part back into storage.
+        """
+        item_type = self.parts.types[self.parts.type[part]]
+        self.parts.room[part] = room
+        self._stow(part, room, item_type)
+        self._change(room, item_type, 1)
+
+    def discard_part(self, part):
+        """
+        Scraps a part, stored or fitted. Discarding one that is already gone does nothing.
+        """
+        if not self.parts.alive[part]:
+            return
+        room = int(self.parts.room[part])
+        if room != INSTALLED:
+            key = (room, self.parts.types[self.parts.type[part]])
+            stored = self.stored_parts[key]
+            stored.discard(part)
+            if not stored:
+                del self.stored_parts[key]
+                self.wear_heaps.pop(key, None)
+            self._change(room, key[1], -1)
+        self.parts.discard(part)
+
+    def add_item(self, item, room, count=1):
+        """
+        Stores Item objects: ReplacementParts become tracked parts, anything else joins a stack.
+        """
+        if hasattr(item, "wear_limit"):
+            return self.add_part(item.name, item.wear_limit, room, item.wear)
+        self.add(item.name, count, room)
+        return None
+
+    def set_room_position(self, room, position):
+        # Stock in this room is re-bucketed under its new cell
+        held = [item_type for item_type, rooms in self.rooms_with.items() if room in rooms]
+        for item_type in held:
+            self._unindex_room(room, item_type)
+        grew = room >= len(self.room_positions)
+        if grew:
+            grown = np.zeros((room + 1, 2))
+            grown[:len(self.room_positions)] = self.room_positions
+            self.room_positions = grown
+        self.room_positions[room] = position
+        self._extend(self._room_cell(room))
+        for item_type in held:
+            self._index_room(room, item_type)
+        if grew:
+            # Rooms skipped over now sit at the origin, as they did for nearest() before
+            for item_type, rooms in self.unplaced.items():
+                for other in [r for r in rooms if r < room]:
+                    rooms.discard(other)
+                    self._index_room(other, item_type)
+                    self._extend(self._room_cell(other))
+
+    def _extend(self, cell):
+        cx, cy = cell
+        if self._extent is None:
+            self._extent = (cx, cy, cx, cy)
+        else:
+            x0, y0, x1, y1 = self._extent
+            self._extent = (min(x0, cx), min(y0, cy), max(x1, cx), max(y1, cy))
+
+    def nearest(self, item_type, position):
+        """
+        The room holding item_type that is closest to position (x, y) in tiles, or None when none is left.
+        """
+        if not self.rooms_with.get(item_type):
+            return None
+        cells = self.room_cells.get(item_type)
+        if not cells:
+            return next(iter(self.unplaced[item_type]))
+        x, y = float(position[0]), float(position[1])
+        cx, cy = math.floor(x / self.cell), math.floor(y / self.cell)
+        x0, y0, x1, y1 = self._extent
+        last_ring = max(cx - x0, x1 - cx, cy - y0, y1 - cy, 0)
+        best, best_distance = None, math.inf
+        for ring in range(last_ring + 1):
+            # Rooms in this ring or further out are more than ring - 1 cells away
+            if best is not None and best_distance <= ((ring - 1) * self.cell) ** 2:
+                break
+            rooms = [room for cell in _ring(cx, cy, ring) for room in cells.get(cell, ())]
+            if not rooms:
+                continue
+            offsets = self.room_positions[rooms] - (x, y)
+            distances = np.einsum("ij,ij->i", offsets, offsets)
+            closest = int(np.argmin(distances))
+            if distances[closest] < best_distance:
+                best, best_distance = rooms[closest], float(distances[closest])
+        return int(best)
+
+
+def _ring(cx, cy, ring):
+    # Cells at Chebyshev distance ring from (cx, cy)
+    if ring == 0:
+        yield cx, cy
+        return
+    for dx in range(-ring, ring + 1):
+        yield cx + dx, cy - ring
+        yield cx + dx, cy + ring
+    for dy in range(-ring + 1, ring):
+        yield cx - ring, cy + dy
+        yield cx + ring, cy + dy
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    inventory = Inventory(rng.random((2000, 2)) * 500)
+    started = time.perf_counter()
+    for room in range(2000):
+        inventory.add("canned_food", 500, room)
+        for _ in range(50):
+            inventory.add_part("co2_filter", 30.0, room)
+    print(f"{inventory.count('canned_food')} food, {len(inventory.parts)} filters stocked in "
+          f"{time.perf_counter() - started:.2f} s")
+    started = time.perf_counter()
+    for _ in range(1000):
+        room = inventory.nearest("co2_filter", rng.random(2) * 500)
+        inventory.take_part("co2_filter", room)
+    print(f"1000 nearest-spare lookups and takes: {(time.perf_counter() - started) * 1000:.1f} ms, "
+          f"{inventory.count('co2_filter')} filters left")
@@ -0,0 +1,228 @@
+# entities/layout.py
+
+"""
+Procedural ship layouts on an occupancy bitmap.
+
+Rooms grow outwards from the Core as a tree. Each new room picks a placed room,
+a side and a corridor length, and the candidate rectangle (plus a one tile wall
+margin) and its corridor are tested against the bitmap with a single array slice.
+Rooms that keep failing to fit anything next to them drop out of the frontier, so
+placement stays fast as the ship fills up. Every corridor links two rooms through a
+door at each end, and those links form the door graph.
+The same seed always gives the same layout.
+"""
+
+import itertools
+import math
+import random
+from collections import namedtuple
+import numpy as np
+from entities import room
+
+# Tile values in ShipLayout.tiles; rooms use their index (0 and up)
+EMPTY = -1
+CORRIDOR = -2
+
+# name, relative frequency, (min width, min height), (max width, max height)
+RoomType = namedtuple("RoomType", ["name", "weight", "min_size", "max_size"])
+ROOM_TYPES = (
+    RoomType("Quarters", 6, (3, 3), (5, 4)),
+    RoomType("Storage", 3, (2, 2), (4, 4)),
+    RoomType("Hydroponics", 2, (4, 3), (7, 5)),
+    RoomType("Workshop", 2, (3, 3), (5, 5)),
+    RoomType("Medbay", 1, (3, 3), (4, 4)),
+)
+CORE_SIZE = (6, 6)
+
+RoomPlan = namedtuple("RoomPlan", ["kind", "x", "y", "width", "height"])
+# A corridor between rooms a and b; doors are the corridor's first and last tiles
+Door = namedtuple("Door", ["a", "b", "door_a", "door_b"])
+
+# (dx, dy) for east, west, south, north
+SIDES = ((1, 0), (-1, 0), (0, 1), (0, -1))
+
+
+class ShipLayout():
+    """
+    Rooms, corridors and doors on a width x height tile map.
+    """
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.occupied = np.zeros((height, width), dtype=bool)
+        self.tiles = np.full((height, width), EMPTY, dtype=np.int32)
+        self.rooms = []
+        self.doors = []
+
+    def is_free(self, x, y, width, height, margin=0):
+        x0, y0 = x - margin, y - margin
+        x1, y1 = x + width + margin, y + height + margin
+        if x0 < 0 or y0 < 0 or x1 > self.width or y1 > self.height:
+            return False
+        return not self.occupied[y0:y1, x0:x1].any()
+
+    def place_room(self, kind, x, y, width, height):
+        index = len(self.rooms)
+        self.rooms.append(RoomPlan(kind, x, y, width, height))
+        self.occupied[y:y + height, x:x + width] = True
+        self.tiles[y:y + height, x:x + width] = index
+        return index
+
+    def place_corridor(self, x0, y0, x1, y1):
+        # Straight corridors only: one of the spans is a single tile
+        xs = slice(min(x0, x1), max(x0, x1) + 1)
+        ys = slice(min(y0, y1), max(y0, y1) + 1)
+        self.occupied[ys, xs] = True
+        self.tiles[ys, xs] = CORRIDOR
+
+    def neighbours(self, index):
+        """
+        Rooms reachable from room `index` through one door.
+        """
+        return [door.b if door.a == index else door.a for door in self.doors if index in (door.a, door.b)]
+
+    def adjacency(self):
+        """
+        The door graph as a list of neighbour lists, one per room.
+        """
+        graph = [[] for _ in self.rooms]
+        for door in self.doors:
+            graph[door.a].append(door.b)
+            graph[door.b].append(door.a)
+        return graph
+
+    def save_state(self):
+        return {"width": self.width, "height": self.height, "occupied": self.occupied, "tiles": self.tiles,
+                "rooms": self.rooms, "doors": self.doors}
+
+    def load_state(self, state):
+        self.width = state["width"]
+        self.height = state["height"]
+        self.occupied = np.array(state["occupied"], dtype=bool)
+        self.tiles = np.array(state["tiles"], dtype=np.int32)
+        self.rooms = [RoomPlan(*plan) for plan in state["rooms"]]
+        self.doors = [Door(*door) for door in state["doors"]]
+
+
+def _between(rng, low, high):
+    # rng.randint without its argument checking, which dominates the generator's run time
+    return low + int(rng.random() * (high - low + 1))
+
+
+def _candidate(rng, parent, width, height, side, corridor):
+    """
+    Position for a width x height room `corridor` tiles away from the parent's side,
+    and the corridor's end tiles (next to each room).
+    """
+    dx, dy = side
+    if dx:
+        # Door row must lie on both rooms' facing walls
+        low, high = parent.y - height + 1, parent.y + parent.height - 1
+        y = _between(rng, low, high)
+        row = _between(rng, max(y, parent.y), min(y + height, parent.y + parent.height) - 1)
+        if dx > 0:
+            x = parent.x + parent.width + corridor
+            return x, y, (parent.x + parent.width, row), (x - 1, row)
+        x = parent.x - corridor - width
+        return x, y, (parent.x - 1, row), (x + width, row)
+    low, high = parent.x - width + 1, parent.x + parent.width - 1
+    x = _between(rng, low, high)
+    column = _between(rng, max(x, parent.x), min(x + width, parent.x + parent.width) - 1)
+    if dy > 0:
+        y = parent.y + parent.height + corridor
+        return x, y, (column, parent.y + parent.height), (column, y - 1)
+    y = parent.y - corridor - height
+    return x, y, (column, parent.y - 1), (column, y + height)
+
+
+def generate_layout(room_count, seed=None, room_types=ROOM_TYPES, corridor_length=(1, 3),
+                    attempts=12, max_failures=6, density=0.25):
+    """
+    Lays out a Core plus room_count - 1 other rooms. Returns a ShipLayout.
+    A room leaves the frontier after max_failures failed attempts to attach something to it.
+    density is the share of the map that rooms are expected to cover; the map is sized from it.
+    """
+    rng = random.Random(seed)
+    weights = [room_type.weight for room_type in room_types]
+    cumulative = list(itertools.accumulate(weights))
+    mean_area = sum(((t.min_size[0] + t.max_size[0]) / 2 + 1) * ((t.min_size[1] + t.max_size[1]) / 2 + 1) * t.weight
+                    for t in room_types) / sum(weights)
+    side = math.ceil(math.sqrt(max(room_count, 1) * mean_area / density)) + 2 * CORE_SIZE[0]
+    layout = ShipLayout(side, side)
+
+    core_x = (side - CORE_SIZE[0]) // 2
+    core_y = (side - CORE_SIZE[1]) // 2
+    layout.place_room("Core", core_x, core_y, *CORE_SIZE)
+    # Rooms that may still get a neighbour, and how often that has failed
+    frontier = [0]
+    failures = [0]
+
+    while len(layout.rooms) < room_count and frontier:
+        room_type = rng.choices(room_types, cum_weights=cumulative)[0]
+        width = _between(rng, room_type.min_size[0], room_type.max_size[0])
+        height = _between(rng, room_type.min_size[1], room_type.max_size[1])
+        if rng.random() < 0.5:
+            width, height = height, width
+        for _ in range(attempts):
+            slot = int(rng.random() * len(frontier))
+            parent_index = frontier[slot]
+            parent = layout.rooms[parent_index]
+            corridor = _between(rng, *corridor_length)
+            side = SIDES[int(rng.random() * 4)]
+            x, y, door_a, door_b = _candidate(rng, parent, width, height, side, corridor)
+            corridor_x, corridor_y = min(door_a[0], door_b[0]), min(door_a[1], door_b[1])
+            corridor_w = abs(door_a[0] - door_b[0]) + 1
+            corridor_h = abs(door_a[1] - door_b[1]) + 1
+            if (layout.is_free(x, y, width, height, margin=1)
+                    and layout.is_free(corridor_x, corridor_y, corridor_w, corridor_h)):
+                index = layout.place_room(room_type.name, x, y, width, height)
+                layout.place_corridor(*door_a, *door_b)
+                layout.doors.append(Door(parent_index, index, door_a, door_b))
+                frontier.append(index)
+                failures.append(0)
+                break
+            failures[slot] += 1
+            if failures[slot] > max_failures:
+                # Boxed in: swap-remove from the frontier
+                frontier[slot], failures[slot] = frontier[-1], failures[-1]
+                frontier.pop()
+                failures.pop()
+                if not frontier:
+                    break
+    if len(layout.rooms) < room_count:
+        print(f"Ship layout is full: placed {len(layout.rooms)} of {room_count} rooms.")
+    return layout
+
+
+def room_of_kind(kind, ship):
+    """
+    A new game Room of a kind: "Core" or a RoomType name.
+    """
+    if kind == "Core":
+        return room.Core(ship)
+    if kind == "Quarters":
+        return room.Quarters()
+    return room.Room(kind)
+
+
+def build_room(plan, ship):
+    """
+    The game Room for a planned room.
+    """
+    new_room = room_of_kind(plan.kind, ship)
+    new_room.bounds = (plan.x, plan.y, plan.width, plan.height)
+    return new_room
+
+
+if __name__ == "__main__":
+    import time
+    for count in (100, 1000, 5000):
+        started = time.perf_counter()
+        layout = generate_layout(count, seed=1)
+        elapsed = time.perf_counter() - started
+        print(f"{len(layout.rooms)} rooms, {len(layout.doors)} doors on {layout.width}x{layout.height} tiles "
+              f"in {elapsed * 1000:.0f} ms")
+    small = generate_layout(12, seed=3)
+    symbols = {EMPTY: ".", CORRIDOR: "+"}
+    for row in small.tiles.tolist():
+        print("".join(symbols.get(tile, chr(ord("A") + tile % 26)) for tile in row))
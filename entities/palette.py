@@ -0,0 +1,140 @@
+# entities/palette.py
+
+"""
+Hair colors for the crew.
+
+The CSS3 color table is read from webcolors once and kept as name/RGB/HSL arrays.
+Greyed versions of every color for every age bucket are computed in a single
+vectorized pass when the palette is built, so spawning a person is an index draw and
+rendering the whole crew is one array lookup.
+"""
+
+import random
+import numpy as np
+import webcolors
+
+AGE_BUCKET_YEARS = 5
+MAX_AGE = 125
+GREYING_START_AGE = 30  # first grey hairs
+GREYING_FULL_AGE = 80   # fully grey
+GREY_LIGHTNESS = 0.75   # lightness that grey hair converges to
+
+
+def rgb_to_hsl(rgb):
+    """
+    Converts an (..., 3) array of RGB values in [0, 1] to HSL in [0, 1].
+    """
+    rgb = np.asarray(rgb, dtype=np.float64)
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    c_max = rgb.max(axis=-1)
+    c_min = rgb.min(axis=-1)
+    delta = c_max - c_min
+    lightness = (c_max + c_min) / 2.0
+
+    chromatic = delta > 0
+    safe_delta = np.where(chromatic, delta, 1.0)
+    saturation = np.where(chromatic, delta / np.maximum(1.0 - np.abs(2.0 * lightness - 1.0), 1e-12), 0.0)
+
+    hue = np.where(c_max == r, ((g - b) / safe_delta) % 6.0,
+          np.where(c_max == g, (b - r) / safe_delta + 2.0,
+                               (r - g) / safe_delta + 4.0))
+    hue = np.where(chromatic, hue / 6.0, 0.0)
+    return np.stack([hue, np.clip(saturation, 0.0, 1.0), lightness], axis=-1)
+
+
+def hsl_to_rgb(hsl):
+    """
+    Converts an (..., 3) array of HSL values in [0, 1] to RGB in [0, 1].
+    """
+    hsl = np.asarray(hsl, dtype=np.float64)
+    hue, saturation, lightness = hsl[..., 0], hsl[..., 1], hsl[..., 2]
+    a = saturation * np.minimum(lightness, 1.0 - lightness)
+    channels = []
+    for n in (0, 8, 4):
+        k = (n + hue * 12.0) % 12.0
+        channels.append(lightness - a * np.clip(np.minimum(k - 3.0, 9.0 - k), -1.0, 1.0))
+    return np.stack(channels, axis=-1)
+
+
+def greying_amount(ages):
+    """
+    How grey hair is at the given ages, from 0 (original color) to 1 (fully grey).
+    """
+    ages = np.asarray(ages, dtype=np.float64)
+    return np.clip((ages - GREYING_START_AGE) / (GREYING_FULL_AGE - GREYING_START_AGE), 0.0, 1.0)
+
+
+class HairPalette():
+    """
+    Holds the base hair colors and the precomputed (color, age bucket) display table.
+    """
+    def __init__(self, spec=webcolors.CSS3):
+        self.names = tuple(webcolors.names(spec=spec))
+        self.hex = tuple(webcolors.name_to_hex(name, spec=spec) for name in self.names)
+        self.rgb = np.array([tuple(webcolors.name_to_rgb(name, spec=spec)) for name in self.names], dtype=np.uint8)
+        self.hsl = rgb_to_hsl(self.rgb / 255.0)
+        self.index_of = {name: i for i, name in enumerate(self.names)}
+
+        # Greyed colors for every base color at the middle of every age bucket: (colors, buckets, 3)
+        bucket_ages = np.arange(0, MAX_AGE + 1, AGE_BUCKET_YEARS) + AGE_BUCKET_YEARS / 2.0
+        grey = greying_amount(bucket_ages)[np.newaxis, :]
+        hue = np.repeat(self.hsl[:, np.newaxis, 0], len(bucket_ages), axis=1)
+        saturation = self.hsl[:, np.newaxis, 1] * (1.0 - grey)
+        lightness = self.hsl[:, np.newaxis, 2] + (GREY_LIGHTNESS - self.hsl[:, np.newaxis, 2]) * grey
+        greyed = hsl_to_rgb(np.stack([hue, saturation, lightness], axis=-1))
+        self.display_table = np.rint(greyed * 255.0).astype(np.uint8)
+        self.display_table.setflags(write=False)
+
+    def __len__(self):
+        return len(self.names)
+
+    def sample(self, count=None, rng=random):
+        """
+        Draws random color indices. Returns one int, or a list of `count` ints.
+        """
+        if count is None:
+            return rng.randrange(len(self.names))
+        return [rng.randrange(len(self.names)) for _ in range(count)]
+
+    def hair_color(self, index):
+        """
+        The bio entry for a color index, in the shape Person.bio has always used.
+        """
+        return {"name": self.names[index], "hex": self.hex[index], "index": index}
+
+    def age_buckets(self, ages):
+        ages = np.asarray(ages)
+        return np.clip(ages // AGE_BUCKET_YEARS, 0, self.display_table.shape[1] - 1).astype(np.intp)
+
+    def display_colors(self, indices, ages):
+        """
+        Age-greyed RGB colors for a whole crew in one lookup: returns an (n, 3) uint8 array.
+        """
+        indices = np.asarray(indices, dtype=np.intp)
+        return self.display_table[indices, self.age_buckets(ages)]
+
+    def display_color(self, index, age):
+        """
+        Age-greyed RGB tuple for one person.
+        """
+        bucket = min(max(int(age) // AGE_BUCKET_YEARS, 0), self.display_table.shape[1] - 1)
+        return tuple(int(channel) for channel in self.display_table[index, bucket])
+
+
+_palette = None
+
+def get_palette():
+    """
+    Returns the shared palette, building it on first use.
+    """
+    global _palette
+    if _palette is None:
+        _palette = HairPalette()
+    return _palette
+
+
+if __name__ == "__main__":
+    palette = get_palette()
+    index = palette.index_of.get("red", 0)
+    for age in (20, 40, 60, 80):
+        print(age, palette.names[index], palette.display_color(index, age))
@@ -0,0 +1,339 @@
+# entities/person/__init__.py
+
+import random
+from collections.abc import MutableMapping
+from enum import Enum
+from entities.palette import get_palette
+from Data.name_generator import NamePool
+#from person import Metabolism
+
+# First names are drawn without repeats from the lazily generated name space,
+# last names are read from disk once.
+_name_pool = None
+_last_names = None
+
+def name_pool():
+    global _name_pool
+    if _name_pool is None:
+        _name_pool = NamePool()
+    return _name_pool
+
+def last_names():
+    global _last_names
+    if _last_names is None:
+        with open("Data/last_names.txt", 'r', encoding='utf-8') as f:
+            _last_names = f.read().splitlines()
+    return _last_names
+
+
+class Sex(Enum):
+    M = "M"
+    F = "F"
+
+
+class Gender(Enum):
+    M = "M"
+    F = "F"
+    N = "N"
+
+
+class Career(Enum):
+    PHYSICIAN = "Physician"
+    MECHANICAL_ENGINEER = "Mechanical Engineer"
+    CHEMICAL_ENGINEER = "Chemical Engineer"
+    ELECTRICAL_ENGINEER = "Electrical Engineer"
+    AEROSPACE_ENGINEER = "Aerospace Engineer"
+    COMPUTER_ENGINEER = "Computer Engineer"
+    PILOT = "Pilot"
+    BOTANIST = "Botanist"
+
+
+SEXES = tuple(Sex)
+GENDERS = tuple(Gender)
+CAREERS = tuple(Career)
+
+
+class FieldView(MutableMapping):
+    """
+    Dict-style window onto a few of a Person's attributes, so code written against the
+    old per-person dicts (person.needs["food"] += ...) keeps working. Nothing is copied:
+    reads and writes go straight to the attributes.
+    """
+    __slots__ = ("_person", "_fields")
+
+    def __init__(self, person, fields):
+        self._person = person
+        self._fields = fields  # key -> (getter, setter)
+
+    def __getitem__(self, key):
+        return self._fields[key][0](self._person)
+
+    def __setitem__(self, key, value):
+        setter = self._fields[key][1]
+        if setter is None:
+            raise KeyError(f"{key!r} is read-only")
+        setter(self._person, value)
+
+    def __delitem__(self, key):
+        raise TypeError("Person fields cannot be removed")
+
+    def __iter__(self):
+        return iter(self._fields)
+
+    def __len__(self):
+        return len(self._fields)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def _attribute(name):
+    return (lambda person: getattr(person, name), lambda person, value: setattr(person, name, value))
+
+
+class Person:
+    """
+    One colonist, stored compactly: every field is a slot holding a number, an enum member
+    or an index into a shared table (first names from the name generator, last names from
+    Data/last_names.txt, hair colors from the palette). Nothing per person is a dict.
+    The old dict layout (health, bio, needs, movement, assignments) is still available as views.
+    """
+    __slots__ = ("_sex", "_age", "_weight", "height", "rates",
+                 "_gender", "first_name_index", "last_name_index", "hair_index", "_career",
+                 "thirst", "bathroom_need", "hunger", "sleep_need", "happiness",
+                 "position", "speed", "bed", "job", "activity", "entity_id")
+
+    def __init__(self):
+        self.generate_health()
+        self.generate_bio()
+        # Needs managed by metabolism.py
+        self.thirst = 0.0
+        self.bathroom_need = 0.0
+        self.hunger = 0.0
+        self.sleep_need = 0.0
+        self.happiness = 1.0
+        self._career = self.generate_career()
+        self.position = (0, 0)
+        self.speed = 0.5
+        self.bed = ""
+        self.job = ""
+        # Set by the CrewScheduler: "sleep", "work" or "free"
+        self.activity = "free"
+        # Stable id, handed out by the Crew; list positions change as people die
+        self.entity_id = None
+        #self.Metabolism()
+
+    # Enum fields read as the plain strings they have always been
+    @property
+    def sex(self):
+        return self._sex.value
+
+    @sex.setter
+    def sex(self, value):
+        self._sex = Sex(value)
+
+    @property
+    def gender(self):
+        return self._gender.value
+
+    @gender.setter
+    def gender(self, value):
+        self._gender = Gender(value)
+
+    @property
+    def career(self):
+        return self._career.value
+
+    @career.setter
+    def career(self, value):
+        self._career = Career(value)
+
+    # Changing weight or age drops the cached metabolic rate table (see metabolism.rate_table)
+    @property
+    def age(self):
+        return self._age
+
+    @age.setter
+    def age(self, value):
+        self._age = value
+        self.rates = None
+
+    @property
+    def weight(self):
+        return self._weight
+
+    @weight.setter
+    def weight(self, value):
+        self._weight = value
+        self.rates = None
+
+    @property
+    def first_name(self):
+        return name_pool().generator.name(self.first_name_index, self._gender.value)
+
+    @property
+    def last_name(self):
+        return last_names()[self.last_name_index]
+
+    @property
+    def name(self):
+        return f"{self.first_name} {self.last_name}"
+
+    @property
+    def hair_color(self):
+        return get_palette().hair_color(self.hair_index)
+
+    @property
+    def assigned_bed(self):
+        return bool(self.bed)
+
+    @property
+    def assigned_job(self):
+        return bool(self.job)
+
+    def bmi(self):
+        return self.weight / self.height ** 2
+
+    # Views in the layout of the old per-person dicts
+    HEALTH_FIELDS = {key: _attribute(key) for key in ("age", "sex", "weight", "height")}
+    BIO_FIELDS = {
+        "first name": (lambda person: person.first_name, None),
+        "last name": (lambda person: person.last_name, None),
+        "gender": _attribute("gender"),
+        "hair color": (lambda person: person.hair_color, None),
+    }
+    NEEDS_FIELDS = {"water": _attribute("thirst"), "bathroom": _attribute("bathroom_need"),
+                    "food": _attribute("hunger"), "sleep": _attribute("sleep_need"),
+                    "mood": _attribute("happiness")}
+    MOVEMENT_FIELDS = {key: _attribute(key) for key in ("position", "speed")}
+    ASSIGNMENT_FIELDS = {key: _attribute(key) for key in ("bed", "job")}
+
+    @property
+    def health(self):
+        return FieldView(self, self.HEALTH_FIELDS)
+
+    @property
+    def bio(self):
+        return FieldView(self, self.BIO_FIELDS)
+
+    @property
+    def needs(self):
+        return FieldView(self, self.NEEDS_FIELDS)
+
+    @property
+    def movement(self):
+        return FieldView(self, self.MOVEMENT_FIELDS)
+
+    @property
+    def assignments(self):
+        return FieldView(self, self.ASSIGNMENT_FIELDS)
+
+
+    def generate_health(self):
+        self._sex = random.choice(SEXES)
+
+        while True:
+            age = random.gammavariate(2, 10) # for now implying space elves live as long as humans
+            if 13 <= age <= 113:
+                age = round(age)
+                break
+
+        self.age = age
+        self.height = Person.calculate_height(self._sex.value, age)
+        self.weight = Person.calculate_weight(self.height)
+
+    def generate_bio(self):
+        self._gender = random.choice(GENDERS)
+        self.first_name_index = name_pool().draw_index(self._gender.value)
+        first_name = self.first_name
+        names = last_names()
+        last_name_index = random.randrange(len(names))
+        # ensures that the last name doesn't end the same way the first name does.
+        # I don't mind the first part of the name matching, people do that often.
+        while names[last_name_index][-2:] == first_name[-2:]:
+            last_name_index = random.randrange(len(names))
+        self.last_name_index = last_name_index
+        # Palette is built once; the age-greyed display color comes from palette.display_color
+        self.hair_index = get_palette().sample()
+
+
+    def generate_career(self):
+        return random.choice(CAREERS)
+
+
+    def calculate_weight(height):
+        # Calculate mean weight based on BMI = 22
+        mean_weight = 22 * (height ** 2)  # BMI formula rearranged
+        # Set variance as 10% of the mean squared for realistic variability
+        variance = (0.1 * mean_weight) ** 2
+        # Calculate gamma distribution parameters
+        shape = (mean_weight ** 2) / variance
+        scale = variance / mean_weight
+        # Generate weight using gamma distribution
+        weight = random.gammavariate(shape, scale)
+        return round(weight, 1)
+
+
+    def calculate_height(gender,age):
+
+        female_teen_height = [156.4,159.8,161.7,162.5,162.9,163.1,163.2]
+        male_teen_height = [156.0,163.2,169.0,172.9,175.2,176.1,176.5]
+        # Generate height based on age and gender
+        if age < 19:
+            # Simple linear growth model until age 18
+            if gender == 'M':
+                # Assume height at age 13 is 140 cm and grows ~6 cm per year
+                mean_height = male_teen_height[age-13]
+            else:
+                # Assume height at age 13 is 135 cm and grows ~5.5 cm per year
+                mean_height = female_teen_height[age-13]
+            height = random.gauss(mean_height, 5)  # Reduced std dev for children
+        else:
+            # Adult height distribution
+            if gender == 'M':
+                mean_height = 178.4  # Average adult male height in cm
+                height = random.gauss(mean_height, 7.59)
+            else:
+                mean_height = 164.7  # Average adult female height in cm
+                height = random.gauss(mean_height, 7.07)
+
+        return round(height/100,2)
+    
+    
+def legacy_layout(person):
+    """
+    The same colonist in the old layout: five dicts per person with its own strings.
+    Only used to compare memory use.
+    """
+    return {
+        "health": dict(person.health),
+        "bio": {**person.bio, "hair color": dict(person.hair_color)},
+        "needs": dict(person.needs),
+        "career": person.career,
+        "movement": dict(person.movement),
+        "assignments": dict(person.assignments),
+    }
+
+
+def memory_benchmark(count=1_000_000, legacy_sample=10_000):
+    """
+    Prints the bytes per person for `count` colonists, against the old dict layout.
+    Shared tables (names, palette) are loaded first so they are not counted.
+    """
+    import time
+    import tracemalloc
+    Person()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    people = [Person() for _ in range(count)]
+    elapsed = time.perf_counter() - started
+    compact = (tracemalloc.get_traced_memory()[0] - before) / count
+
+    before = tracemalloc.get_traced_memory()[0]
+    legacy = [legacy_layout(person) for person in people[:min(legacy_sample, count)]]
+    legacy_bytes = (tracemalloc.get_traced_memory()[0] - before) / len(legacy)
+    tracemalloc.stop()
+    print(f"{count} people built in {elapsed:.1f} s")
+    print(f"compact Person: {compact:.0f} bytes per person ({compact * count / 2**20:.0f} MiB total)")
+    print(f"old dict layout: {legacy_bytes:.0f} bytes per person (measured over {len(legacy)})")
@@ -0,0 +1,19 @@
+# entities/person/__main__.py
+
+import sys
+from entities.person import Person, memory_benchmark
+
+if "--benchmark" in sys.argv:
+    # python -m entities.person --benchmark [count]
+    arguments = sys.argv[sys.argv.index("--benchmark") + 1:]
+    memory_benchmark(int(arguments[0]) if arguments else 1_000_000)
+    sys.exit()
+# Generate and print 25 sample persons
+for _ in range(25):
+    print("----------------------")
+    person = Person()
+    print(person.bio)
+    print(person.health)
+    print(person.needs)
+    print(person.movement)
+    print(person.assignments)
@@ -11,45 +11,198 @@ Metabolism is the set of life-sustaining chemical reactions in organisms. The th
     
 """
 
+import functools
+from collections import namedtuple
+import numpy as np
+import settings
+
+# Per game second output of one person: O2 used and CO2 made (L), water lost (L), heat (W)
+ActivityRates = namedtuple("ActivityRates", ["o2", "co2", "water", "heat"])
+
+# Emitted by the end of day pass for everyone who died
+DeathEvent = namedtuple("DeathEvent", ["entity_id", "name", "cause"])
+
+ACTIVITIES = ("sleep", "rest", "work", "exercise")
+# Scheduler activities that share a table row with one of the above
+ACTIVITY_ALIASES = {"free": "rest"}
+
+# Resting VO2 and respiratory exchange ratio (drafts/metabolism_science.py, PMC7429865)
+REST_VO2 = 3.3       # mL O2 / kg / min
+REST_RER = 0.788
+SLEEP_FACTOR = 0.9   # sleeping metabolic rate relative to rest
+WORK_METS = 2.5      # light to moderate shipboard work, 1 MET = 3.5 mL/kg/min
+EXERCISE_INTENSITY = 0.75  # countermeasure exercise at 75% of VO2max
+EXERCISE_RER = 0.898
+# Insensible water loss (breath and skin) at rest; it scales with metabolic heat
+REST_WATER_PER_DAY = 0.9   # L
+# Sweat rate against metabolic heat during exercise, from the article's 1.50 m and 1.90 m astronauts
+SWEAT_POINTS = ((667.0, 10.1), (1070.0, 17.1))  # (W, mL/min)
+
+
+def vo2_max(sex, age):
+    """
+    VO2max in mL/kg/min from the resting and maximal heart rate, as in the METs model below.
+    """
+    max_hr = 220 - age
+    if sex == "M":
+        return 15.3 * max_hr / max(60, 70 - 0.5 * age)
+    return 14.7 * max_hr / max(65, 75 - 0.5 * age)
+
+
+def weir_heat(vo2_l_min, vco2_l_min):
+    """
+    Metabolic heat in W from the Weir equation (kcal/min = 3.94 VO2 + 1.11 VCO2).
+    """
+    return (3.94 * vo2_l_min + 1.11 * vco2_l_min) * 4184.0 / 60.0
+
+
+@functools.lru_cache(maxsize=8192)
+def activity_rate_table(sex, age, weight):
+    """
+    ActivityRates for every activity, for one body. Tables are shared by everyone with
+    the same sex, age and weight (to 0.1 kg), so most people never compute their own.
+    """
+    exercise_vo2 = EXERCISE_INTENSITY * vo2_max(sex, age)
+    # RER rises with intensity: interpolate between rest and exercise
+    def rates(vo2, sweat=False):
+        fraction = min(max((vo2 - REST_VO2) / (exercise_vo2 - REST_VO2), 0.0), 1.0)
+        rer = REST_RER + (EXERCISE_RER - REST_RER) * fraction
+        vo2_l_min = vo2 * weight / 1000.0
+        vco2_l_min = vo2_l_min * rer
+        heat = weir_heat(vo2_l_min, vco2_l_min)
+        water = REST_WATER_PER_DAY / 86400.0 * heat / rest_heat
+        if sweat:
+            (heat_a, sweat_a), (heat_b, sweat_b) = SWEAT_POINTS
+            sweat_ml_min = sweat_a + (sweat_b - sweat_a) * (heat - heat_a) / (heat_b - heat_a)
+            water += max(sweat_ml_min, 0.0) / 1000.0 / 60.0
+        return ActivityRates(vo2_l_min / 60.0, vco2_l_min / 60.0, water, heat)
+
+    rest_l_min = REST_VO2 * weight / 1000.0
+    rest_heat = weir_heat(rest_l_min, rest_l_min * REST_RER)
+    table = {
+        "sleep": rates(REST_VO2 * SLEEP_FACTOR),
+        "rest": rates(REST_VO2),
+        "work": rates(min(WORK_METS * 3.5, exercise_vo2)),
+        "exercise": rates(exercise_vo2, sweat=True),
+    }
+    for alias, activity in ACTIVITY_ALIASES.items():
+        table[alias] = table[activity]
+    return table
+
+
+def rate_table(person):
+    """
+    The person's table, rebuilt only after their weight or age changed.
+    """
+    table = person.rates
+    if table is None:
+        table = person.rates = activity_rate_table(person.sex, person.age, round(person.weight, 1))
+    return table
+
+
+def current_rates(person):
+    """
+    What the person is putting out right now, for their current activity.
+    """
+    table = rate_table(person)
+    return table.get(person.activity, table["rest"])
+
+
+def end_of_day_mortality(crew, resources, aggregates=None):
+    """
+    Day rollover for the whole crew as one batch: masks over arrays of the crew's
+    values pick out who dies of sleep deprivation, who starves and who drops below
+    the BMI limit, then the survivors are kept in a single pass over the list.
+    Returns the DeathEvents in crew order.
+    """
+    if not crew:
+        return []
+    bmi_settings = settings.current().bmi
+    count = len(crew)
+    sleep_need = np.fromiter((c.sleep_need for c in crew), np.float64, count)
+    hunger = np.fromiter((c.hunger for c in crew), np.float64, count)
+    weight = np.fromiter((c.weight for c in crew), np.float64, count)
+    height = np.fromiter((c.height for c in crew), np.float64, count)
+    male = np.fromiter((c.gender.upper() == "M" for c in crew), bool, count)
+
+    # Mortality due to extreme sleep deprivation
+    sleep_death = sleep_need >= 3.0
+    # Starvation: weight loss, then death below the BMI threshold
+    starving = (hunger >= 1.0) & ~sleep_death
+    weight = np.where(starving, weight * (1.0 - bmi_settings.daily_weight_loss_rate), weight)
+    threshold = np.where(male, bmi_settings.threshold_male, bmi_settings.threshold_female)
+    starved = starving & (weight / height ** 2 < threshold)
+    dead = sleep_death | starved
+
+    for i in np.flatnonzero(starving & ~starved).tolist():
+        crew[i].weight = float(weight[i])
+        if aggregates is not None:
+            aggregates.update(crew[i])
+    deaths = []
+    for i in np.flatnonzero(dead).tolist():
+        person = crew[i]
+        deaths.append(DeathEvent(person.entity_id, person.name,
+                                 "sleep deprivation" if sleep_death[i] else "starvation"))
+        if aggregates is not None:
+            aggregates.remove(person)
+    if deaths:
+        # Compact in place; survivors keep their order and their entity ids
+        crew[:] = [person for person, died in zip(crew, dead.tolist()) if not died]
+        resources["Population"] = max(0, resources["Population"] - len(deaths))
+    return deaths
+
+
 class Metabolism():
     def __init__(self):
-        # Precompute increments per IRL second
-        self.thirst_inc = self.need_increment_per_irl_sec(THIRST_TIME)
-        self.bathroom_inc = self.need_increment_per_irl_sec(BATHROOM_TIME)
-        self.hunger_inc = self.need_increment_per_irl_sec(HUNGER_TIME)
-        self.sleep_inc = self.need_increment_per_irl_sec(SLEEP_TIME_100)
+        # Increments per IRL second are precomputed when the settings are loaded
+        time_settings = settings.current().time
+        self.thirst_inc = time_settings.thirst_inc
+        self.bathroom_inc = time_settings.bathroom_inc
+        self.hunger_inc = time_settings.hunger_inc
+        self.sleep_inc = time_settings.sleep_inc
         self.aerobic_capacity = 1.0
-        self.max_co2_tolerance = 1000.0
-        self.o2_partial_pressure_range = (140.0, 300.0)
-        self.pressure_tolerance = (700.0, 1013.0)
-        self.rh_preference = 50.0
-        self.temp_preference = 22.0
-        self.temp_adjustability = 5.0
+
+    # Crew tolerances are the limits in the alerts settings, so the alarms and the crew agree
+    @property
+    def max_co2_tolerance(self):
+        return settings.current().alerts.co2_high
+
+    @property
+    def o2_partial_pressure_range(self):
+        alerts = settings.current().alerts
+        return (alerts.o2_low, alerts.o2_high)
+
+    @property
+    def pressure_tolerance(self):
+        alerts = settings.current().alerts
+        return (alerts.pressure_low, alerts.pressure_high)
+
+    @property
+    def rh_preference(self):
+        alerts = settings.current().alerts
+        return (alerts.humidity_low + alerts.humidity_high) / 2.0
+
+    @property
+    def temp_preference(self):
+        alerts = settings.current().alerts
+        return (alerts.temperature_low + alerts.temperature_high) / 2.0
+
+    @property
+    def temp_adjustability(self):
+        alerts = settings.current().alerts
+        return (alerts.temperature_high - alerts.temperature_low) / 2.0
 
     def need_increment_per_irl_sec(self, in_game_time_for_100):
         # Calculate how fast a need increases per real second
-        return (1.0 / in_game_time_for_100) * TIME_SCALE
+        return (1.0 / in_game_time_for_100) * settings.current().time.time_scale
 
     def daily_o2_consumption(self, person):
-        # Base: ~0.84 kg O2/day for a reference adult (NASA), ~588 L O2/day.
-        # Adjust by weight (linear), gender (males slightly higher), and aerobic capacity.
-        # For simplicity: Males +5% O2 need, females base 1.0.
-        # Could also factor age in if desired. For now, we skip age complexity.
-
-        gender_factor = 1.05 if person.gender.upper() == "M" else 1.0
-        weight_factor = person.weight / 70.0
-        # Daily O2 in L/day:
-        daily_o2 = 588.0 * weight_factor * gender_factor * person.aerobic_capacity
-        return daily_o2
+        # L O2/day at rest, from the person's activity rate table
+        return rate_table(person)["rest"].o2 * 86400.0
 
     def daily_co2_production(self, person):
-        # According to NASA references, CO2 production roughly correlates with O2 consumption.
-        # Typical respiratory quotient ~0.85, meaning CO2 produced is about 85% of O2 volume consumed.
-        # So if daily O2 ~ 588 L/day, CO2 ~ 588 * 0.85 = ~500 L/day.
-        # We'll dynamically compute based on their adjusted O2 consumption:
-        daily_o2 = self.daily_o2_consumption(person)
-        RQ = 0.85
-        return daily_o2 * RQ  # L CO2/day
+        # L CO2/day at rest; the respiratory quotient is built into the table
+        return rate_table(person)["rest"].co2 * 86400.0
 
     def update_person_needs(self, person, dt):
         # Increment metabolic needs over dt seconds
@@ -60,26 +213,28 @@ class Metabolism():
 
     def update_happiness(self, person):
         # Calculate happiness based on needs and conditions
+        penalties = settings.current().penalties
         thirst_val = min(person.thirst, 1.0)
         bathroom_val = min(person.bathroom_need, 1.0)
         hunger_val = min(person.hunger, 1.0)
         sleep_val = min(person.sleep_need, 1.0)
 
-        base_need_penalty = (thirst_val * THIRST_WEIGHT) + \
-                            (bathroom_val * BATHROOM_WEIGHT) + \
-                            (hunger_val * HUNGER_WEIGHT) + \
-                            (sleep_val * SLEEP_WEIGHT)
+        base_need_penalty = (thirst_val * penalties.thirst) + \
+                            (bathroom_val * penalties.bathroom) + \
+                            (hunger_val * penalties.hunger) + \
+                            (sleep_val * penalties.sleep)
 
         if person.sleep_need > 1.0:
             extra_sleep = person.sleep_need - 1.0
-            base_need_penalty += extra_sleep * SLEEP_WEIGHT * 2.0
+            base_need_penalty += extra_sleep * penalties.sleep * 2.0
 
         if not person.assigned_job:
-            jobless_scale = min(person.days_without_job / 7.0, 1.0)
-            base_need_penalty += JOBLESS_PENALTY * jobless_scale
+            # Days without a job are tracked by Mood; a Person without one counts as just laid off
+            jobless_scale = min(getattr(person, "days_without_job", 0) / 7.0, 1.0)
+            base_need_penalty += penalties.jobless * jobless_scale
 
         if not person.assigned_bed:
-            base_need_penalty += NO_BED_PENALTY
+            base_need_penalty += penalties.bedless
 
         # Clamp happiness
         person.happiness = max(0.0, min(1.0, 1.0 - base_need_penalty))
@@ -87,61 +242,38 @@ class Metabolism():
     def check_mortality(self, person):
         # Check if person dies due to low BMI
         current_bmi = person.bmi()
+        bmi_settings = settings.current().bmi
         if person.gender.upper() == "M":
-            return current_bmi < BMI_THRESHOLD_MALE
+            return current_bmi < bmi_settings.threshold_male
         else:
-            return current_bmi < BMI_THRESHOLD_FEMALE
+            return current_bmi < bmi_settings.threshold_female
 
     def adjust_crew_resources(self, person, dt, resources):
-        # O2 consumption:
-        daily_o2 = self.daily_o2_consumption(person)
-        o2_per_day = daily_o2  # L/day
-        o2_per_game_sec = o2_per_day / 86400.0
-        o2_consumed = o2_per_game_sec * (dt * TIME_SCALE)
-        resources["O2"] = max(0, resources["O2"] - o2_consumed)
-
-        # CO2 production:
-        daily_co2 = self.daily_co2_production(person)
-        co2_per_day = daily_co2  # L/day equivalent
-        # Convert CO2 volume to ppm increment: 
-        # Previously, CO2 was tracked as ppm directly. For simplicity, we can assume a linear environment volume.
-        # Let's say 1 ppm increment = 1 L in some reference volume. This is a gross simplification.
-        # Without a defined habitat volume, we just treat this "CO2" resource as ppm units.
-        # We'll scale similarly to how O2 is consumed. For now, let's keep increment directly as if CO2 resource is ppm storage.
-        co2_per_game_sec = co2_per_day / 86400.0
-        co2_produced = co2_per_game_sec * (dt * TIME_SCALE)
-        resources["CO2"] += co2_produced
-
-    def update_crew(self, dt, crew, resources):
+        # Gas exchange at the rate of the person's current activity: a table lookup, no physiology per tick
+        rates = current_rates(person)
+        game_dt = dt * settings.current().time.time_scale
+        resources["O2"] = max(0, resources["O2"] - rates.o2 * game_dt)
+        # Without a defined habitat volume the "CO2" resource is a plain running total
+        resources["CO2"] += rates.co2 * game_dt
+
+    def update_crew(self, dt, crew, resources, aggregates=None):
         # Update all crew for this tick
         for c in crew:
             self.update_person_needs(c, dt)
             self.update_happiness(c)
             self.adjust_crew_resources(c, dt, resources)
+            if aggregates is not None:
+                aggregates.update(c)
 
-    def end_of_day_update(self, crew, resources):
-        # Check for mortality due to extreme sleep deprivation
-        for c in crew[:]:
-            if c.sleep_need >= 3.0:
-                crew.remove(c)
-                resources["Population"] = max(0, resources["Population"] - 1)
-
-        # Check for starvation/low BMI mortality
-        for c in crew[:]:
-            if c.hunger >= 1.0:
-                c.weight = c.weight * (1.0 - DAILY_WEIGHT_LOSS_RATE)
-                if self.check_mortality(c):
-                    # Remove crew who died from starvation (low BMI)
-                    crew.remove(c)
-                    resources["Population"] = max(0, resources["Population"] - 1)
-                    
-    def bmi(self):
-        h_m = self.height / 100.0
-        return self.weight / (h_m * h_m)
-    
+    def end_of_day_update(self, crew, resources, aggregates=None):
+        return end_of_day_mortality(crew, resources, aggregates)
 
 
-class Metabolism():
+class MetsCalculator():
+    """
+    Heart rate and VO2 estimates for one body at a fixed activity level (METs).
+    Kept apart from Metabolism, which runs the crew's needs and gas exchange.
+    """
     def __init__(self, weight_kg, height_m, age, gender, activity_level):
         """
         Initialize with basic user data.
@@ -157,6 +289,8 @@ class Metabolism():
         self.gender = gender.lower()
         self.activity_level = activity_level
 
+    def bmi(self):
+        return self.weight_kg / (self.height_m * self.height_m)
 
     def resting_heart_rate(self):
         """
@@ -215,7 +349,7 @@ if __name__ == "__main__":
     activity_level = 3.0  # Moderate activity (METs)
 
     # Initialize calculator
-    calculator = Metabolism(weight_kg, height_m, age, gender, activity_level)
+    calculator = MetsCalculator(weight_kg, height_m, age, gender, activity_level)
 
     # Outputs
     print("Adjusted BMI:", calculator.bmi())
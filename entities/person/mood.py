@@ -1,4 +1,4 @@
-from metabolism import Metabolism
+from entities.person.metabolism import Metabolism
 
 class Mood():
 
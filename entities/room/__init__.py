@@ -0,0 +1,100 @@
+# entities/room/__init__.py
+from entities.room.environment import EnvironmentalConditions
+
+class Room():
+    def __init__(self, name):
+        self.name = name
+        self.activities = {}
+        self.environment = EnvironmentalConditions()
+        # (x, y, width, height) in grid tiles, once the room is placed on a ship layout
+        self.bounds = None
+
+    def save_state(self):
+        # People are saved by entity id; the activities hold a Person or ""
+        return {"name": self.name, "bounds": self.bounds,
+                "activities": {activity: person.entity_id if person else None
+                               for activity, person in self.activities.items()}}
+
+    def load_state(self, state, people):
+        self.name = state["name"]
+        self.bounds = state["bounds"]
+        self.activities = {activity: people.get(person, "") if person is not None else ""
+                           for activity, person in state["activities"].items()}
+
+    def assign_person(self, person, requested_activity):
+        assigned = False
+        for activity in self.activities:
+            #check that activity exists
+            if activity == requested_activity:
+                #what do if someone is already assigned? Solve later.
+                self.activities[activity] = person
+                assigned = True
+        if assigned == False:
+            # DO SOMETHING WITH THIS VISUALLY
+            print("Unable to assign the activity, no activity available.")
+    
+    def unassign_person(self, person):
+        unassigned = False
+        for activity in self.activities:
+            if self.activities[activity] == person:
+                self.activities[activity] = ""
+                unassigned = True
+        if unassigned == False:
+            # DO SOMETHING WITH THIS VISUALLY
+            print("Unable to unassign the activity, crewman not assigned to this activity.")
+
+
+class Core(Room):      
+
+    def __init__(self, ship):
+        super().__init__("Core")
+
+        ship.resources = {"o2":ship.resources["o2"]+3360.0,
+                          "h2o":ship.resources["h2o"]+1000.0,
+                          "canned_food":ship.resources["canned_food"]+80,
+                          "solid_waste":0,
+                          "liquid_waste":0}
+        ship.resource_caps = {"o2":ship.resource_caps["o2"]+3360.0,
+                          "h2o":ship.resource_caps["h2o"]+1000.0,
+                          "canned_food":ship.resource_caps["canned_food"]+80,
+                          "solid_waste":ship.resource_caps["solid_waste"]+10,
+                          "liquid_waste":ship.resource_caps["liquid_waste"]+30}
+
+        # Add environmental components    
+
+class Quarters(Room):
+    def __init__(self):
+        # Capacity of 4 beds as per previous discussions
+        super().__init__("Quarters")
+        self.activities = {"sleep":""}
+        self.beds = [None] * 4
+
+    def assign_person(self, person, requested_activity="sleep"):
+        # Beds stay assigned after the crew member is done sleeping, so they return to the same one
+        if person in self.beds:
+            return self.beds.index(person)
+        if requested_activity != "sleep" or None not in self.beds:
+            # DO SOMETHING WITH THIS VISUALLY
+            print("Unable to assign the activity, no activity available.")
+            return None
+        bed = self.beds.index(None)
+        self.beds[bed] = person
+        person.assignments["bed"] = f"{self.name} bed {bed + 1}"
+        return bed
+
+    def save_state(self):
+        state = super().save_state()
+        state["beds"] = [person.entity_id if person is not None else None for person in self.beds]
+        return state
+
+    def load_state(self, state, people):
+        super().load_state(state, people)
+        self.beds = [people.get(person) if person is not None else None for person in state["beds"]]
+
+    def unassign_person(self, person):
+        if person not in self.beds:
+            # DO SOMETHING WITH THIS VISUALLY
+            print("Unable to unassign the activity, crewman not assigned to this activity.")
+            return
+        self.beds[self.beds.index(person)] = None
+        person.assignments["bed"] = ""
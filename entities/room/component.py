@@ -3,8 +3,11 @@
 
 
 class Component:
-    def __init__(self, name):
+    def __init__(self, name, trade="mechanical", life_support=False):
         self.name = name
+        # Kind of repair work (see maintenance.TRADES) and whether the crew's air and water depend on it
+        self.trade = trade
+        self.life_support = life_support
         self.operational = True
         self.condition = 1.0  # 1.0 = perfect condition, 0.0 = broken
     
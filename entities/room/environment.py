@@ -1,3 +1,325 @@
+# entities/room/environment.py
+
+"""
+Room atmospheres (NASA-STD-3001 V2 6003/6004/6006/6107).
+
+Gas state for every room lives in one AtmosphereNetwork as rows of NumPy arrays:
+partial pressures of O2, N2, CO2 and water vapour in hPa, plus air temperature.
+Rooms are joined by ventilation ducts, each moving a volume flow of air in both
+directions. Mixing along the ducts is advanced with implicit Euler:
+
+    (V + dt * L) x_new = V x_old
+
+V is the diagonal of room volumes and L is the weighted graph Laplacian of the duct
+flows. The system is symmetric positive definite, so it is solved matrix-free with
+Jacobi-preconditioned conjugate gradients over the duct edge list. Each step costs
+O(rooms + ducts) per iteration, stays stable at any time step and conserves gas.
+"""
+
+import numpy as np
+import settings
+
+O2, N2, CO2, H2O = range(4)
+SPECIES = ("o2", "n2", "co2", "h2o")
+STANDARD_PRESSURE = 1013.25  # hPa
+HPA_PER_MMHG = 1.33322
+
+
+def saturation_vapour_pressure(temperature):
+    """
+    Magnus formula, hPa over water at the given temperature in °C. Works on arrays.
+    """
+    return 6.112 * np.exp(17.62 * np.asarray(temperature) / (243.12 + np.asarray(temperature)))
+
+
+def litres_to_gas_amount(litres):
+    """
+    Converts a gas volume at standard pressure to the network's amount unit (hPa·m³).
+    """
+    return np.asarray(litres) / 1000.0 * STANDARD_PRESSURE
+
 
 class EnvironmentalConditions():
-    pass
+    """
+    One room's view of the atmosphere network.
+    Before the room is added to a network it keeps the nominal values from settings.json.
+    """
+    def __init__(self, volume=None):
+        atmosphere = settings.current().atmosphere
+        self.network = None
+        self.index = None
+        self._volume = atmosphere.room_volume if volume is None else volume
+
+    @property
+    def attached(self):
+        return self.network is not None
+
+    def _read(self, species):
+        if self.network is None:
+            return nominal_partial_pressures()[species]
+        return float(self.network.partial[self.index, species])
+
+    def _write(self, species, value):
+        if self.network is None:
+            raise RuntimeError("room is not part of an atmosphere network yet")
+        self.network.partial[self.index, species] = max(0.0, value)
+
+    @property
+    def volume(self):
+        return self._volume if self.network is None else float(self.network.volume[self.index])
+
+    @property
+    def o2(self):
+        return self._read(O2)
+
+    @o2.setter
+    def o2(self, value):
+        self._write(O2, value)
+
+    @property
+    def n2(self):
+        return self._read(N2)
+
+    @n2.setter
+    def n2(self, value):
+        self._write(N2, value)
+
+    @property
+    def co2(self):
+        return self._read(CO2)
+
+    @co2.setter
+    def co2(self, value):
+        self._write(CO2, value)
+
+    @property
+    def h2o(self):
+        return self._read(H2O)
+
+    @h2o.setter
+    def h2o(self, value):
+        self._write(H2O, value)
+
+    @property
+    def temperature(self):
+        if self.network is None:
+            return settings.current().atmosphere.temperature
+        return float(self.network.temperature[self.index])
+
+    @temperature.setter
+    def temperature(self, value):
+        if self.network is None:
+            raise RuntimeError("room is not part of an atmosphere network yet")
+        self.network.temperature[self.index] = value
+
+    @property
+    def pressure(self):
+        """Total pressure in hPa."""
+        return self.o2 + self.n2 + self.co2 + self.h2o
+
+    @property
+    def o2_mmhg(self):
+        return self.o2 / HPA_PER_MMHG
+
+    @property
+    def co2_ppm(self):
+        pressure = self.pressure
+        return self.co2 / pressure * 1e6 if pressure > 0 else 0.0
+
+    @property
+    def relative_humidity(self):
+        return float(self.h2o / saturation_vapour_pressure(self.temperature) * 100.0)
+
+
+def nominal_partial_pressures():
+    atmosphere = settings.current().atmosphere
+    h2o = saturation_vapour_pressure(atmosphere.temperature) * atmosphere.relative_humidity / 100.0
+    return (atmosphere.o2_partial_pressure, atmosphere.n2_partial_pressure,
+            atmosphere.co2_partial_pressure, float(h2o))
+
+
+class AtmosphereNetwork():
+    """
+    Gas state for all rooms of a ship plus the ventilation graph between them.
+    """
+    def __init__(self, capacity=16):
+        atmosphere = settings.current().atmosphere
+        self.tolerance = atmosphere.solver_tolerance
+        self.max_iterations = atmosphere.solver_max_iterations
+        self.default_flow = atmosphere.ventilation_flow
+        self.count = 0
+        self._partial = np.zeros((capacity, len(SPECIES)))
+        self._temperature = np.zeros(capacity)
+        self._volume = np.zeros(capacity)
+        # Gas produced (+) or consumed (-) per room in litres per game second, e.g. by crew
+        self._rates = np.zeros((capacity, len(SPECIES)))
+        self.rooms = []
+        # Ducts: edge list of room pairs and their flows (m³/s)
+        self.ducts = {}
+        self._edges = None
+        self.last_iterations = 0
+
+    # Views trimmed to the rooms that exist. They share memory with the backing arrays.
+    @property
+    def partial(self):
+        return self._partial[:self.count]
+
+    @property
+    def temperature(self):
+        return self._temperature[:self.count]
+
+    @property
+    def volume(self):
+        return self._volume[:self.count]
+
+    @property
+    def rates(self):
+        return self._rates[:self.count]
+
+    @property
+    def pressure(self):
+        return self.partial.sum(axis=1)
+
+    def _grow(self):
+        capacity = max(16, len(self._volume) * 2)
+        for name in ("_partial", "_rates"):
+            grown = np.zeros((capacity, len(SPECIES)))
+            grown[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, grown)
+        for name in ("_temperature", "_volume"):
+            grown = np.zeros(capacity)
+            grown[:self.count] = getattr(self, name)[:self.count]
+            setattr(self, name, grown)
+
+    def add_room(self, environment):
+        """
+        Moves a room's EnvironmentalConditions into the network and returns its index.
+        """
+        if environment.network is not None:
+            raise ValueError("room already belongs to an atmosphere network")
+        if self.count == len(self._volume):
+            self._grow()
+        index = self.count
+        self._volume[index] = environment.volume
+        self._partial[index] = nominal_partial_pressures()
+        self._temperature[index] = settings.current().atmosphere.temperature
+        self._rates[index] = 0.0
+        self.count += 1
+        environment.network = self
+        environment.index = index
+        self.rooms.append(environment)
+        return index
+
+    def connect(self, room_a, room_b, flow=None):
+        """
+        Adds or updates a duct between two room indices. flow is in m³/s, both ways.
+        """
+        if room_a == room_b:
+            raise ValueError("a duct needs two different rooms")
+        if not (0 <= room_a < self.count and 0 <= room_b < self.count):
+            raise IndexError("room index out of range")
+        flow = self.default_flow if flow is None else flow
+        if flow < 0:
+            raise ValueError("duct flow can't be negative")
+        self.ducts[(min(room_a, room_b), max(room_a, room_b))] = flow
+        self._edges = None
+
+    def disconnect(self, room_a, room_b):
+        self.ducts.pop((min(room_a, room_b), max(room_a, room_b)), None)
+        self._edges = None
+
+    def _edge_arrays(self):
+        if self._edges is None:
+            if self.ducts:
+                pairs = np.array(list(self.ducts.keys()), dtype=np.intp)
+                flows = np.array(list(self.ducts.values()), dtype=np.float64)
+            else:
+                pairs = np.zeros((0, 2), dtype=np.intp)
+                flows = np.zeros(0)
+            self._edges = (pairs[:, 0], pairs[:, 1], flows)
+        return self._edges
+
+    def _laplacian(self, x, a, b, flows):
+        # (L x)_i = sum over ducts (i, j) of flow * (x_i - x_j)
+        exchange = (x[a] - x[b]) * flows[:, np.newaxis]
+        out = np.empty_like(x)
+        for column in range(x.shape[1]):
+            out[:, column] = (np.bincount(a, exchange[:, column], minlength=self.count)
+                              - np.bincount(b, exchange[:, column], minlength=self.count))
+        return out
+
+    def step(self, dt):
+        """
+        Advances the network by dt game seconds: sources first, then duct mixing.
+        """
+        if self.count == 0 or dt <= 0:
+            return
+        volume = self.volume
+
+        # Sources and sinks, explicit: the amounts are tiny compared to the room contents
+        partial = self.partial
+        partial += litres_to_gas_amount(self.rates * dt) / volume[:, np.newaxis]
+        np.maximum(partial, 0.0, out=partial)
+
+        a, b, flows = self._edge_arrays()
+        if len(flows) == 0:
+            return
+        # Temperature mixes like the gases (same heat capacity per m³ assumed everywhere)
+        state = np.column_stack([partial, self.temperature])
+        rhs = state * volume[:, np.newaxis]
+        scaled_flows = flows * dt
+        degree = np.bincount(a, scaled_flows, minlength=self.count) + np.bincount(b, scaled_flows, minlength=self.count)
+        preconditioner = (volume + degree)[:, np.newaxis]
+
+        def apply(x):
+            return x * volume[:, np.newaxis] + self._laplacian(x, a, b, scaled_flows)
+
+        # Conjugate gradients, one independent solve per column, all columns at once
+        x = state.copy()
+        residual = rhs - apply(x)
+        rhs_norm = np.maximum(np.linalg.norm(rhs, axis=0), 1e-30)
+        z = residual / preconditioner
+        direction = z.copy()
+        rz = np.einsum('ij,ij->j', residual, z)
+        iterations = 0
+        while iterations < self.max_iterations:
+            if np.all(np.linalg.norm(residual, axis=0) / rhs_norm < self.tolerance):
+                break
+            iterations += 1
+            applied = apply(direction)
+            curvature = np.einsum('ij,ij->j', direction, applied)
+            alpha = np.divide(rz, curvature, out=np.zeros_like(rz), where=curvature > 0)
+            x += direction * alpha
+            residual -= applied * alpha
+            z = residual / preconditioner
+            rz_next = np.einsum('ij,ij->j', residual, z)
+            beta = np.divide(rz_next, rz, out=np.zeros_like(rz), where=rz > 0)
+            direction = z + direction * beta
+            rz = rz_next
+        self.last_iterations = iterations
+
+        np.maximum(x[:, :len(SPECIES)], 0.0, out=partial)
+        self.temperature[:] = x[:, len(SPECIES)]
+
+    def total_gas(self):
+        """
+        Gas amount per species summed over the ship (hPa·m³), useful to check conservation.
+        """
+        return (self.partial * self.volume[:, np.newaxis]).sum(axis=0)
+
+    def save_state(self):
+        return {"partial": self.partial, "temperature": self.temperature, "volume": self.volume,
+                "rates": self.rates, "ducts": self.ducts}
+
+    def load_state(self, state):
+        """
+        Restores the air of rooms that are already in the network, e.g. after the ship rebuilt them.
+        """
+        if len(state["volume"]) != self.count:
+            raise ValueError(f"atmosphere: saved {len(state['volume'])} rooms, the network has {self.count}")
+        self.partial[:] = state["partial"]
+        self.temperature[:] = state["temperature"]
+        self.volume[:] = state["volume"]
+        self.rates[:] = state["rates"]
+        self.ducts = dict(state["ducts"])
+        self._edges = None
@@ -1,10 +1,75 @@
-import room
+from entities import room
+from entities.room.environment import AtmosphereNetwork
+from entities.layout import ShipLayout, generate_layout, build_room, room_of_kind
+from entities.inventory import Inventory
 
 class Ship():
     
-    def __init__(self):
+    def __init__(self, layout=None):
         self.resources = {"o2":0,"h2o":0,"canned_food":0,"solid_waste":0,"liquid_waste":0}
         self.resource_caps = {"o2":0,"h2o":0,"canned_food":0,"solid_waste":0,"liquid_waste":0}
-        #add random rooms with random number generator once more rooms are added
-        self.rooms = [room.Core()]
+        # Per-room air, stored as arrays for the whole ship
+        self.atmosphere = AtmosphereNetwork()
+        # Stored items and spare parts, by room index
+        self.inventory = Inventory()
+        self.rooms = []
+        # ShipLayout the rooms were built from, if any
+        self.layout = layout
+        if layout is None:
+            self.add_room(room.Core(self))
+        else:
+            for plan in layout.rooms:
+                self.add_room(build_room(plan, self))
+            # Air moves between rooms through their doors
+            for door in layout.doors:
+                self.atmosphere.connect(self.rooms[door.a].environment.index,
+                                        self.rooms[door.b].environment.index)
         self.crew = []
+
+    @classmethod
+    def generate(cls, room_count, seed=None):
+        """
+        A ship with a procedurally generated layout of room_count rooms. The same seed gives the same ship.
+        """
+        return cls(generate_layout(room_count, seed))
+
+    def add_room(self, new_room):
+        self.rooms.append(new_room)
+        self.atmosphere.add_room(new_room.environment)
+        if new_room.bounds is not None:
+            x, y, width, height = new_room.bounds
+            self.inventory.set_room_position(len(self.rooms) - 1, (x + width / 2, y + height / 2))
+        return new_room
+
+    def save_state(self):
+        return {"layout": self.layout, "rooms": self.rooms, "resources": self.resources,
+                "resource_caps": self.resource_caps, "atmosphere": self.atmosphere, "inventory": self.inventory,
+                "crew": [person.entity_id for person in self.crew]}
+
+    def load_state(self, state, people=None):
+        """
+        Rebuilds the rooms from the saved layout, then restores their air, stock and assignments.
+        people maps entity ids to the loaded Person objects.
+        """
+        people = people if people is not None else {}
+        layout = None
+        if state["layout"] is not None:
+            layout = ShipLayout(0, 0)
+            layout.load_state(state["layout"])
+        self.__init__(layout)
+        # Rooms added after the ship was built
+        for room_state in state["rooms"][len(self.rooms):]:
+            new_room = room_of_kind(room_state["name"], self)
+            new_room.bounds = room_state["bounds"]
+            self.add_room(new_room)
+        for new_room, room_state in zip(self.rooms, state["rooms"]):
+            new_room.load_state(room_state, people)
+        self.resources = dict(state["resources"])
+        self.resource_caps = dict(state["resource_caps"])
+        self.atmosphere.load_state(state["atmosphere"])
+        self.inventory.load_state(state["inventory"])
+        self.crew = [people[entity_id] for entity_id in state["crew"] if entity_id in people]
+
+    def update_atmosphere(self, game_dt):
+        # Advances room air by game_dt in-game seconds
+        self.atmosphere.step(game_dt)
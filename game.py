@@ -1,26 +1,157 @@
-from settings import TIME
+import settings
 import pygame
+import numpy as np
+from dataclasses import dataclass
+
+# Optional Game attributes that go into saves
+SAVED_SUBSYSTEMS = ("ship", "crew", "aggregates", "scheduler", "maintenance", "ensemble", "recorder")
+
+
+@dataclass(frozen=True)
+class CrewPositions:
+    """
+    Where the crew stands, for drawing and picking: read-only arrays in crew order.
+    """
+    ids: np.ndarray        # (n,) entity ids
+    positions: np.ndarray  # (n, 2) world tile coordinates
+    colors: np.ndarray     # (n, 3) age-greyed hair colors
+
+
+@dataclass(frozen=True)
+class GameSnapshot:
+    """
+    Read-only copy of the state the renderer needs, published once per tick.
+    """
+    tick: int
+    time: float
+    game_time: float
+    day_number: int
+    # CrewSummary from the CrewAggregates, when crew statistics are tracked
+    crew: object = None
+    # Trend tuples for the HUD channels, when a recorder tracks trends
+    trends: tuple = None
+    # CrewPositions, when the game has a crew
+    people: CrewPositions = None
+
 
 class Game:
     def __init__(self):
-        self.time_scale = TIME["time_scale"]
+        self.apply_settings(settings.current())
         self.time = 0.0
         self.game_time = 0.0
         self.day_number = 1
+        self.tick_count = 0
         self.previous_day = self.get_current_day()
         self.clock = pygame.time.Clock()
         self.running = True
+        # Optional Ship the colony lives on
+        self.ship = None
+        # Optional Crew, whose positions go into every snapshot
+        self.crew = None
+        # Optional CrewScheduler, advanced to game_time every tick
+        self.scheduler = None
+        # Optional MaintenanceDispatcher, staffing repair jobs every tick
+        self.maintenance = None
+        # Optional Ensemble of colony variants, advanced in lockstep with this game
+        self.ensemble = None
+        # Optional CrewAggregates, summarized into every snapshot
+        self.aggregates = None
+        # Optional ShipRecorder, sampled every tick
+        self.recorder = None
+        # HUD trends from the recorder, refreshed every trend_interval real seconds rather than every tick
+        self.trends = None
+        self.trends_time = None
+        # Optional Autosave, checked every tick
+        self.autosave = None
         # Initialize Pygame
         pygame.init()
 
+    def apply_settings(self, config):
+        self.time_scale = config.time.time_scale
+        self.trend_interval = config.trends.hud_interval
+
     def get_current_day(self):
         total_seconds = int(self.game_time)
         return total_seconds // 86400
 
+    def save_state(self):
+        """
+        The clock and every attached subsystem. Subsystems are handed over as objects;
+        autosave.capture copies them through their own save_state().
+        """
+        state = {
+            "time": self.time,
+            "game_time": self.game_time,
+            "day_number": self.day_number,
+            "tick_count": self.tick_count,
+        }
+        for name in SAVED_SUBSYSTEMS:
+            subsystem = getattr(self, name)
+            if subsystem is not None:
+                state[name] = subsystem
+        return state
+
+    def load_state(self, state):
+        """
+        Loads a save into this game's subsystems, which must be set up as they were when it was saved.
+        The crew goes first: everything else refers to people by entity id.
+        """
+        self.time = state["time"]
+        self.game_time = state["game_time"]
+        self.day_number = state["day_number"]
+        self.tick_count = state["tick_count"]
+        self.previous_day = self.get_current_day()
+        people = {}
+        if self.crew is not None and "crew" in state:
+            self.crew.load_state(state["crew"])
+            people = {person.entity_id: person for person in self.crew.crew}
+        if self.ship is not None and "ship" in state:
+            self.ship.load_state(state["ship"], people)
+        # The crew's own aggregates were rebuilt with it
+        rebuilt = self.crew is not None and self.aggregates is self.crew.aggregates
+        if self.aggregates is not None and "aggregates" in state and not rebuilt:
+            self.aggregates.load_state(state["aggregates"], people)
+        for name in ("scheduler", "maintenance"):
+            if getattr(self, name) is not None and name in state:
+                getattr(self, name).load_state(state[name], people)
+        for name in ("ensemble", "recorder"):
+            if getattr(self, name) is not None and name in state:
+                getattr(self, name).load_state(state[name])
+        self.trends = self.trends_time = None
+
+    def crew_positions(self):
+        people = self.crew.crew
+        ids = np.fromiter((person.entity_id for person in people), dtype=np.int64, count=len(people))
+        positions = np.array([person.position for person in people], dtype=np.float64).reshape(-1, 2)
+        colors = self.crew.hair_display_colors().reshape(-1, 3)
+        # The renderer reads these on another thread
+        for array in (ids, positions, colors):
+            array.flags.writeable = False
+        return CrewPositions(ids, positions, colors)
+
+    def snapshot(self):
+        crew = self.aggregates.summary() if self.aggregates is not None else None
+        people = self.crew_positions() if self.crew is not None else None
+        return GameSnapshot(self.tick_count, self.time, self.game_time, self.day_number, crew, self.trends, people)
+
     def tick(self, dt):
+        self.tick_count += 1
         self.time += dt
         self.game_time += dt * self.time_scale
         update_simulation(dt)
+        if self.ensemble is not None:
+            self.ensemble.tick(dt)
+        if self.scheduler is not None:
+            self.scheduler.update(self.game_time)
+        if self.maintenance is not None:
+            self.maintenance.dispatch(self.game_time)
+        if self.recorder is not None:
+            self.recorder.record(self.game_time)
+            if self.trends_time is None or self.time - self.trends_time >= self.trend_interval:
+                self.trends = self.recorder.hud_trends()
+                self.trends_time = self.time
+        if self.autosave is not None:
+            self.autosave.on_tick(self)
         current_day = self.get_current_day()
         if current_day > self.previous_day:
             end_of_day_update()
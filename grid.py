@@ -2,31 +2,50 @@
 
 import math
 import pygame
-from settings import GRID # Import the entire settings module
+import settings
+from gui.lod import LevelOfDetail
+from gui.tilemap_renderer import TileMapRenderer
 
 
 class Grid():
     def __init__(self):
-        self.base_grid_spacing = GRID["base_grid_spacing"]
-        self.grid_color = GRID["grid_color"]
+        self.lod = LevelOfDetail()
+        # Draws the tile data under the grid lines, once a TileMap is set
+        self.tiles = None
+        self.apply_settings(settings.current())
+
+    def set_tilemap(self, tilemap):
+        self.tiles = TileMapRenderer(tilemap) if tilemap is not None else None
+
+    def apply_settings(self, config):
+        self.config = config
+        self.base_grid_spacing = config.grid.base_grid_spacing
+        self.grid_color = config.grid.grid_color
+        self.lod.apply_settings(config)
+        if self.tiles is not None:
+            self.tiles.apply_settings(config)
 
     def draw_grid(self, window):
         """
         Draws a grid on the given surface based on the current offset and scale.
         The grid consists of two sets of parallel lines: one with a positive slope and one with a negative slope.
         """
-        
-        # Adjust grid spacing based on scale
-        grid_spacing = self.base_grid_spacing * window.scale
-        rotated_spacing = grid_spacing * math.sqrt(2)
+        if self.tiles is not None:
+            self.tiles.draw(window)
 
-        # Calculate the starting c values for both sets of lines
+        # Distance between parallel lines at the current scale (base spacing * scale * sqrt(2))
+        rotated_spacing = self.config.grid_period(window.scale)
+        # When zoomed out only the major lines are drawn, so line count never explodes
+        rotated_spacing *= self.lod.grid_stride(rotated_spacing / math.sqrt(2))
+
+        # Calculate the starting c values for both sets of lines from where the camera puts world (0, 0)
+        origin_x, origin_y = window.camera.offset
         # For y = x + c (positive slope)
         # c = (y - mx)
-        c_positive = (window.offset_y - window.offset_x) % rotated_spacing
+        c_positive = (origin_y - origin_x) % rotated_spacing
 
         # For y = -x + c (negative slope)
-        c_negative = (window.offset_y + window.offset_x) % rotated_spacing
+        c_negative = (origin_y + origin_x) % rotated_spacing
 
         # Determine the number of lines needed based on the window size
         num_lines_positive = int(math.ceil(window.width / rotated_spacing)) + int(math.ceil(window.height / rotated_spacing))
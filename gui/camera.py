@@ -0,0 +1,119 @@
+# gui/camera.py
+
+import math
+import numpy as np
+
+# pan_speed in settings.json is in pixels per frame at this frame rate
+PAN_REFERENCE_FPS = 60
+
+
+class Camera():
+    """
+    Maps world tile coordinates (u, v) to screen pixels with one affine transform:
+
+        screen = offset + scale * tile_size / sqrt(2) * [[1, -1], [1, 1]] @ (u, v)
+
+    which is the 45° rotated grid drawn by Grid. Conversions take (n, 2) arrays, so
+    transforming every entity on screen is a single matrix product.
+    Zoom and pan targets are approached over time (dt), not per frame.
+    """
+    BASIS = np.array([[1.0, -1.0], [1.0, 1.0]]) / math.sqrt(2)
+
+    def __init__(self, tile_size, scale=1.0, min_scale=0.1, max_scale=5.0, smoothing=0.1):
+        self.tile_size = tile_size
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.smoothing = smoothing  # seconds for the remaining distance to shrink by a factor e
+        self.scale = self.target_scale = scale
+        self.offset = np.zeros(2)
+        self.target_offset = np.zeros(2)
+        # While zooming, this world point stays under this screen point
+        self.anchor_screen = None
+        self.anchor_world = None
+
+    @property
+    def matrix(self):
+        return self.BASIS * (self.scale * self.tile_size)
+
+    @property
+    def inverse(self):
+        # BASIS is orthonormal, so its inverse is its transpose
+        return self.BASIS.T / (self.scale * self.tile_size)
+
+    def world_to_screen(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        return points @ self.matrix.T + self.offset
+
+    def screen_to_world(self, points):
+        points = np.asarray(points, dtype=np.float64)
+        return (points - self.offset) @ self.inverse.T
+
+    def zoom_at(self, screen_pos, delta):
+        """
+        Starts a smooth zoom by delta towards the point under screen_pos.
+        """
+        self.target_scale = min(max(self.target_scale + delta, self.min_scale), self.max_scale)
+        self.anchor_screen = np.asarray(screen_pos, dtype=np.float64)
+        self.anchor_world = self.screen_to_world(self.anchor_screen)
+
+    def pan(self, dx, dy):
+        """
+        Moves the view immediately by (dx, dy) pixels.
+        """
+        shift = np.array((dx, dy), dtype=np.float64)
+        self.offset += shift
+        self.target_offset += shift
+        if self.anchor_screen is not None:
+            self.anchor_screen = self.anchor_screen + shift
+
+    def pan_to(self, world_point, screen_pos):
+        """
+        Smoothly moves the view so world_point ends up at screen_pos.
+        """
+        self.anchor_screen = self.anchor_world = None
+        self.target_offset = np.asarray(screen_pos, dtype=np.float64) - np.asarray(world_point) @ (
+            self.BASIS * (self.target_scale * self.tile_size)).T
+
+    def set_view(self, offset=None, scale=None):
+        """
+        Jumps straight to a view without interpolating.
+        """
+        if scale is not None:
+            self.scale = self.target_scale = min(max(scale, self.min_scale), self.max_scale)
+        if offset is not None:
+            self.offset = np.array(offset, dtype=np.float64)
+            self.target_offset = self.offset.copy()
+        self.anchor_screen = self.anchor_world = None
+
+    def set_limits(self, min_scale, max_scale):
+        """
+        Changes the zoom range, keeping any zoom in progress going inside the new range.
+        """
+        self.min_scale = min_scale
+        self.max_scale = max_scale
+        self.target_scale = min(max(self.target_scale, min_scale), max_scale)
+        clamped = min(max(self.scale, min_scale), max_scale)
+        if clamped != self.scale:
+            self.set_view(scale=clamped)
+
+    def update(self, dt):
+        """
+        Advances zoom and pan interpolation by dt real seconds.
+        """
+        alpha = 1.0 if self.smoothing <= 0 else 1.0 - math.exp(-dt / self.smoothing)
+        if self.anchor_screen is not None:
+            self.scale += (self.target_scale - self.scale) * alpha
+            if abs(self.target_scale - self.scale) < 1e-4:
+                self.scale = self.target_scale
+            self.offset = self.anchor_screen - self.anchor_world @ self.matrix.T
+            self.target_offset = self.offset.copy()
+            if self.scale == self.target_scale:
+                self.anchor_screen = self.anchor_world = None
+        else:
+            self.offset += (self.target_offset - self.offset) * alpha
+            if np.all(np.abs(self.target_offset - self.offset) < 1e-3):
+                self.offset = self.target_offset.copy()
+
+    @property
+    def moving(self):
+        return self.anchor_screen is not None or not np.array_equal(self.offset, self.target_offset)
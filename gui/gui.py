@@ -1,7 +1,7 @@
 # ui.py
 
 import pygame
-from settings import GUI
+import settings
 
 class GraphicalUserInterface():
     """
@@ -9,13 +9,39 @@ class GraphicalUserInterface():
     """
     def __init__(self):
         pygame.font.init()
-        self.font_size = GUI["font_size"]
-        self.font = pygame.font.SysFont(None, self.font_size)
-        self.scale_text_color = GUI["scale_text_color"]
+        self.font_size = None
+        # Pick of the last thing clicked on
+        self.selection = None
+        # (frames drawn, CPU seconds) per real second, from the FramePacer
+        self.frame_stats = None
+        self.apply_settings(settings.current())
+
+    def apply_settings(self, config):
+        if config.gui.font_size != self.font_size:
+            self.font_size = config.gui.font_size
+            self.font = pygame.font.SysFont(None, self.font_size)
+        self.scale_text_color = config.gui.scale_text_color
 
     def render_ui(self, window,game):
         self.render_scale(window)
         self.draw_simulation_time(window,game)
+        if game.crew is not None:
+            self.draw_crew_panel(window, game.crew)
+        if self.selection is not None:
+            self.draw_selection(window)
+        if self.frame_stats is not None:
+            self.draw_frame_stats(window)
+        if game.trends:
+            self.draw_trends(window, game.trends)
+
+    def hud_state(self, game):
+        """
+        Everything the HUD text shows for a snapshot; the screen only needs redrawing when this changes.
+        Frame stats are left out: they change every second and would keep an idle screen redrawing.
+        """
+        crew = tuple(self.crew_lines(game.crew)) if game.crew is not None else None
+        trends = tuple(self.trend_lines(game.trends)) if game.trends else None
+        return game.day_number, int(game.game_time) // 60, crew, trends, self.selection
 
     def render_scale(self, window):
         """
@@ -33,6 +59,61 @@ class GraphicalUserInterface():
         time_position = (int(window.width*0.08),int(window.height * 0.01))
         window.display.blit(time_surf, time_position)
 
+    def crew_lines(self, crew):
+        lines = [f"{settings.RESOURCE_LABELS['Population']}: {crew.population}"]
+        if crew.population:
+            lines.append(f"Mood: {crew.mean_mood:.2f} avg, {crew.min_mood:.2f} min")
+            lines.append("Pressing needs: " + ", ".join(f"{need.replace('_need', '')} {count}"
+                                                         for need, count in crew.needs_over.items()))
+            lines.append(f"O₂ use: {crew.o2_per_day:.0f} L/day, CO₂ output: {crew.co2_per_day:.0f} L/day")
+        return lines
+
+    def draw_crew_panel(self, window, crew):
+        """
+        Colony-wide crew statistics. The summary is precomputed, so this costs the same for any crew size.
+        """
+        x = int(window.width * 0.01)
+        y = int(window.height * 0.05)
+        for line in self.crew_lines(crew):
+            surface = self.font.render(line, True, self.scale_text_color)
+            window.display.blit(surface, (x, y))
+            y += surface.get_height()
+
+    def draw_selection(self, window):
+        kind, selected, tile = self.selection
+        text = f"Selected {kind}: {selected}" if kind != "tile" else f"Selected tile: {tile[0]}, {tile[1]}"
+        surface = self.font.render(text, True, self.scale_text_color)
+        window.display.blit(surface, (int(window.width * 0.01), window.height - surface.get_height() - int(window.height * 0.01)))
+
+    def trend_lines(self, trends):
+        lines = []
+        for trend in trends:
+            name = trend.channel.split(".", 1)[-1]
+            if trend.value != trend.value:
+                # nan: no reading right now
+                lines.append(f"{name}: -")
+                continue
+            direction = ("falling", "steady", "rising")[trend.direction + 1]
+            shift = ", shifted" if trend.changed else ""
+            lines.append(f"{name}: {trend.value:.2f} {direction}{shift}")
+        return lines
+
+    def draw_trends(self, window, trends):
+        """
+        One line per HUD channel with its trend, read from the recorder's streaming statistics.
+        """
+        y = int(window.height * 0.05)
+        for line in self.trend_lines(trends):
+            surface = self.font.render(line, True, self.scale_text_color)
+            window.display.blit(surface, (window.width - surface.get_width() - int(window.width * 0.01), y))
+            y += surface.get_height()
+
+    def draw_frame_stats(self, window):
+        frames, cpu = self.frame_stats
+        surface = self.font.render(f"{frames:.0f} fps, CPU {cpu * 100:.0f}%", True, self.scale_text_color)
+        window.display.blit(surface, (window.width - surface.get_width() - int(window.width * 0.01),
+                                      int(window.height * 0.01)))
+
     def format_in_game_time(seconds):
         days = seconds // 86400
         remainder = seconds % 86400
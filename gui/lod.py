@@ -0,0 +1,150 @@
+# gui/lod.py
+
+import math
+import numpy as np
+import pygame
+import settings
+
+# Crew detail levels, from cheapest to most detailed
+DENSITY, DOTS, SPRITES = range(3)
+# Cached images are rendered for zoom levels this far apart
+ZOOM_BUCKET_RATIO = math.sqrt(2)
+
+
+def zoom_bucket(scale):
+    """
+    The smallest power of ZOOM_BUCKET_RATIO at or above scale. Images cached for a bucket
+    are only ever shrunk to the exact scale when drawn, never blown up.
+    """
+    return ZOOM_BUCKET_RATIO ** math.ceil(math.log(scale, ZOOM_BUCKET_RATIO) - 1e-9)
+
+
+class LevelOfDetail():
+    """
+    Decides how much detail to draw for the current zoom (Window.scale).
+    Zoomed out views draw less, so the overview is the cheapest view to render.
+    """
+    def __init__(self):
+        self.apply_settings(settings.current())
+
+    def apply_settings(self, config):
+        lod = config.lod
+        self.min_grid_line_spacing = lod.min_grid_line_spacing
+        self.density_scale = lod.density_scale
+        self.sprite_scale = lod.sprite_scale
+        self.density_cell = lod.density_cell
+        self.dot_cell = lod.dot_cell
+        self.dot_radius = lod.dot_radius
+        self.density_color = lod.density_color
+
+    def grid_stride(self, line_spacing):
+        """
+        Draw every stride-th grid line so lines stay at least min_grid_line_spacing pixels apart.
+        The stride is a power of two, so the major lines stay put while zooming.
+        """
+        if line_spacing >= self.min_grid_line_spacing:
+            return 1
+        return 2 ** math.ceil(math.log2(self.min_grid_line_spacing / line_spacing))
+
+    def entity_level(self, scale):
+        if scale < self.density_scale:
+            return DENSITY
+        if scale < self.sprite_scale:
+            return DOTS
+        return SPRITES
+
+
+class CrewLayer():
+    """
+    Draws crew members at the level of detail for the current zoom:
+    density markers when far out, one dot per occupied screen cell in between,
+    full sprites when zoomed in.
+    """
+    def __init__(self, lod=None):
+        self.lod = lod if lod is not None else LevelOfDetail()
+        self.sprite_cache = {}
+
+    def draw(self, window, positions, colors=None, sprite=None):
+        """
+        positions is an (n, 2) array of world tile coordinates, colors an optional (n, 3) array.
+        """
+        screen = window.camera.world_to_screen(np.asarray(positions, dtype=np.float64).reshape(-1, 2))
+        margin = self.lod.density_cell
+        visible = ((screen[:, 0] >= -margin) & (screen[:, 0] < window.width + margin)
+                   & (screen[:, 1] >= -margin) & (screen[:, 1] < window.height + margin))
+        screen = screen[visible]
+        if colors is not None:
+            colors = np.asarray(colors)[visible]
+        if len(screen) == 0:
+            return
+
+        level = self.lod.entity_level(window.scale)
+        if level == DENSITY:
+            self._draw_density(window, screen)
+        elif level == DOTS or sprite is None:
+            self._draw_dots(window, screen, colors)
+        else:
+            self._draw_sprites(window, screen, sprite)
+
+    def _cells(self, screen, cell):
+        # Occupied screen cells: one entry per cell, with how many people and the first person in it
+        cells = np.floor(screen / cell).astype(np.int64)
+        unique, first, counts = np.unique(cells, axis=0, return_index=True, return_counts=True)
+        return unique, first, counts
+
+    def _draw_density(self, window, screen):
+        cell = self.lod.density_cell
+        unique, _, counts = self._cells(screen, cell)
+        # Marker area grows with the head count, capped at the cell size
+        radii = np.minimum(cell / 2.0, 2.0 + np.sqrt(counts) * 1.5)
+        centers = unique * cell + cell // 2
+        for (x, y), radius in zip(centers.tolist(), radii.tolist()):
+            pygame.draw.circle(window.display, self.lod.density_color, (x, y), int(radius))
+
+    def _draw_dots(self, window, screen, colors):
+        cell = self.lod.dot_cell
+        _, first, _ = self._cells(screen, cell)
+        points = screen[first].astype(np.int64).tolist()
+        if colors is None:
+            dot_colors = [self.lod.density_color] * len(points)
+        else:
+            dot_colors = [tuple(color) for color in colors[first].tolist()]
+        for point, color in zip(points, dot_colors):
+            pygame.draw.circle(window.display, color, point, self.lod.dot_radius)
+
+    def _sprite_at(self, sprite, scale):
+        # Rendered once per zoom bucket, then shrunk to the exact pixel size; the shrunk copy is
+        # kept while that size holds, so a glide only rescales when the sprite actually grows or shrinks
+        bucket = zoom_bucket(scale)
+        width, height = sprite.get_size()
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        cached = self.sprite_cache.get(id(sprite))
+        if cached is None or cached[0] != bucket:
+            base = pygame.transform.smoothscale(sprite, (max(1, int(width * bucket)), max(1, int(height * bucket))))
+            cached = (bucket, base, None, None)
+        if cached[2] != size:
+            base = cached[1]
+            cached = (bucket, base, size, base if base.get_size() == size else pygame.transform.smoothscale(base, size))
+            self.sprite_cache[id(sprite)] = cached
+        return cached[3]
+
+    def _draw_sprites(self, window, screen, sprite):
+        scaled = self._sprite_at(sprite, window.scale)
+        half_width, height = scaled.get_width() // 2, scaled.get_height()
+        # Back to front: lower on screen is nearer, ties drawn left to right. Picker ranks hits the same way.
+        screen = screen[np.lexsort((screen[:, 0], screen[:, 1]))]
+        # Sprites stand on their position: anchor at the bottom centre
+        window.display.blits([(scaled, (x - half_width, y - height)) for x, y in screen.astype(np.int64).tolist()],
+                             doreturn=False)
+
+
+def person_sprite(width=16, height=32, color=(225, 225, 230)):
+    """
+    Stand-in crew sprite until there is art for it: a head over a rounded body, on a transparent background.
+    """
+    sprite = pygame.Surface((width, height), pygame.SRCALPHA)
+    head = width // 2
+    pygame.draw.circle(sprite, color, (width // 2, head // 2 + 1), head // 2)
+    pygame.draw.rect(sprite, color, (width // 8, head + 2, width - width // 4, height - head - 2),
+                     border_radius=width // 4)
+    return sprite
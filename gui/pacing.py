@@ -0,0 +1,120 @@
+# gui/pacing.py
+
+"""
+Frame pacing for the render loop.
+
+The simulation runs on its own thread at its own rate; this only decides how often
+the main loop wakes up and whether it redraws. With input or a moving camera it runs
+at active_fps. After idle_after seconds without either it wakes at idle_fps and only
+redraws when what is on screen would change. While the window is minimized or hidden
+nothing is drawn at all. Idle waits block on the event queue, so the first input
+after a quiet spell is handled at once rather than on the next idle frame.
+"""
+
+import time
+import pygame
+import settings
+
+# Events that count as the user doing something
+INPUT_EVENTS = {pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEBUTTONDOWN, pygame.MOUSEBUTTONUP,
+                pygame.MOUSEMOTION, pygame.MOUSEWHEEL, pygame.VIDEORESIZE, pygame.QUIT}
+HIDDEN_EVENTS = {pygame.WINDOWMINIMIZED, pygame.WINDOWHIDDEN}
+SHOWN_EVENTS = {pygame.WINDOWRESTORED, pygame.WINDOWSHOWN, pygame.WINDOWEXPOSED, pygame.WINDOWMAXIMIZED}
+
+
+class FramePacer():
+    """
+    Chooses the loop rate each frame and tracks the process's CPU use.
+    """
+    def __init__(self, clock=None):
+        self.clock = clock if clock is not None else pygame.time.Clock()
+        self.hidden = False
+        self.last_activity = time.monotonic()
+        self.last_frame = self.last_activity
+        self.dirty = True
+        self.shown_key = None
+        # CPU seconds used per real second by the whole process (simulation thread included)
+        self.cpu_per_second = 0.0
+        self.frames_drawn = 0
+        self.draw_rate = 0.0  # frames drawn per real second
+        self._cpu_mark = (self.last_activity, time.process_time(), 0)
+        self.apply_settings(settings.current())
+
+    def apply_settings(self, config):
+        pacing = config.pacing
+        self.active_fps = pacing.active_fps
+        self.idle_fps = pacing.idle_fps
+        self.hidden_fps = pacing.hidden_fps
+        self.idle_after = pacing.idle_after
+        self.dirty = True
+
+    def note_activity(self):
+        """
+        Something is changing on screen (held keys, a camera glide): stay at the active rate.
+        """
+        self.last_activity = time.monotonic()
+        self.dirty = True
+
+    def show(self, key):
+        """
+        Call with whatever identifies the displayed content (e.g. the HUD's clock minute); a new key means a redraw.
+        """
+        if key != self.shown_key:
+            self.shown_key = key
+            self.dirty = True
+
+    def idle(self):
+        return time.monotonic() - self.last_activity >= self.idle_after
+
+    def frame_rate(self):
+        if self.hidden:
+            return self.hidden_fps
+        return self.idle_fps if self.idle() else self.active_fps
+
+    def wait(self):
+        """
+        Sleeps until the next frame is due, or until input arrives when idle or hidden.
+        Returns (dt, events): real seconds since the last frame and the pending events.
+        """
+        fps = self.frame_rate()
+        if fps == self.active_fps and not self.hidden:
+            self.clock.tick(fps)
+            events = pygame.event.get()
+        else:
+            remaining = self.last_frame + 1.0 / fps - time.monotonic()
+            if remaining <= 0:
+                # Already due; event.wait(0) would block until the next event
+                events = pygame.event.get()
+            else:
+                first = pygame.event.wait(max(1, int(remaining * 1000)))
+                events = ([first] if first.type != pygame.NOEVENT else []) + pygame.event.get()
+            self.clock.tick()
+        now = time.monotonic()
+        dt = now - self.last_frame
+        self.last_frame = now
+        for event in events:
+            if event.type in HIDDEN_EVENTS:
+                self.hidden = True
+            elif event.type in SHOWN_EVENTS:
+                self.hidden = False
+                self.dirty = True
+            if event.type in INPUT_EVENTS:
+                self.note_activity()
+        self._measure(now)
+        return dt, events
+
+    def should_draw(self):
+        if self.hidden:
+            return False
+        return self.dirty or not self.idle()
+
+    def drew(self):
+        self.frames_drawn += 1
+        self.dirty = False
+
+    def _measure(self, now):
+        wall, cpu, frames = self._cpu_mark
+        if now - wall >= 1.0:
+            self.cpu_per_second = (time.process_time() - cpu) / (now - wall)
+            self.draw_rate = (self.frames_drawn - frames) / (now - wall)
+            self._cpu_mark = (now, time.process_time(), self.frames_drawn)
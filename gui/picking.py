@@ -0,0 +1,129 @@
+# gui/picking.py
+
+"""
+Mouse picking: what is under the cursor.
+
+The cursor goes through the camera's inverse transform to world tile coordinates.
+The tile and its room come straight out of the TileMap. Entities are found through a
+spatial hash (sorted cell keys, searched with np.searchsorted), so only the few
+entities near the cursor are hit-tested, however many there are on the map.
+"""
+
+import math
+from collections import namedtuple
+import numpy as np
+from gui.lod import LevelOfDetail, SPRITES
+from tilemap import NO_ROOM
+
+# kind is "entity", "room" or "tile"; id is the entity id, room id or (x, y) tile
+Pick = namedtuple("Pick", ["kind", "id", "tile"])
+
+
+def _cell_keys(cx, cy):
+    # Ordered like (cx, cy) tuples, for cell coordinates within ±2**31
+    return cx.astype(np.int64) * (1 << 32) + cy.astype(np.int64)
+
+
+class EntityIndex():
+    """
+    Spatial hash of entity positions in world tile coordinates, rebuilt in one sort.
+    """
+    def __init__(self, cell=2.0):
+        self.cell = cell
+        self.ids = np.empty(0, dtype=np.int64)
+        self.positions = np.empty((0, 2))
+        self.keys = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def update(self, ids, positions):
+        """
+        Replaces the indexed entities. ids is a sequence of n ints, positions an (n, 2) array.
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        cells = np.floor(positions / self.cell).astype(np.int64)
+        keys = _cell_keys(cells[:, 0], cells[:, 1])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.ids = np.asarray(ids, dtype=np.int64)[order]
+        self.positions = positions[order]
+
+    def query(self, x0, y0, x1, y1):
+        """
+        Indices (into ids and positions) of entities whose cell overlaps the world box.
+        """
+        cx0, cx1 = math.floor(x0 / self.cell), math.floor(x1 / self.cell)
+        cy0, cy1 = math.floor(y0 / self.cell), math.floor(y1 / self.cell)
+        if len(self.keys) == 0:
+            return np.empty(0, dtype=np.intp)
+        # One contiguous run of keys per cell column
+        columns = np.arange(cx0, cx1 + 1, dtype=np.int64)
+        starts = np.searchsorted(self.keys, _cell_keys(columns, np.full_like(columns, cy0)), side="left")
+        ends = np.searchsorted(self.keys, _cell_keys(columns, np.full_like(columns, cy1)), side="right")
+        runs = [np.arange(start, end) for start, end in zip(starts.tolist(), ends.tolist()) if end > start]
+        return np.concatenate(runs) if runs else np.empty(0, dtype=np.intp)
+
+
+class Picker():
+    """
+    Resolves a screen position to the entities, room and tile under it, front-most first.
+    """
+    def __init__(self, tilemap=None, entities=None, lod=None, pick_radius=6):
+        self.tilemap = tilemap
+        self.entities = entities if entities is not None else EntityIndex()
+        self.lod = lod if lod is not None else LevelOfDetail()
+        self.pick_radius = pick_radius  # px around a dot that still counts as a hit
+
+    def tile_at(self, window, screen_pos):
+        u, v = window.camera.screen_to_world(screen_pos)
+        return math.floor(u), math.floor(v)
+
+    def entities_at(self, window, screen_pos, sprite_size=None):
+        """
+        Entity ids under screen_pos, front-most first. sprite_size is the unscaled
+        (width, height) of the sprites, which stand on their position; without it,
+        or when the zoom level draws dots, anything within pick_radius pixels is hit.
+        """
+        camera = window.camera
+        px, py = screen_pos
+        if sprite_size is not None and self.lod.entity_level(window.scale) == SPRITES:
+            half_width = sprite_size[0] * window.scale / 2
+            height = sprite_size[1] * window.scale
+            # A sprite covering the cursor has its anchor in this screen box
+            box = [(px - half_width, py), (px + half_width, py), (px - half_width, py + height),
+                   (px + half_width, py + height)]
+        else:
+            r = self.pick_radius
+            half_width = height = None
+            box = [(px - r, py - r), (px + r, py - r), (px - r, py + r), (px + r, py + r)]
+        corners = camera.screen_to_world(box)
+        (x0, y0), (x1, y1) = corners.min(axis=0), corners.max(axis=0)
+        candidates = self.entities.query(x0, y0, x1, y1)
+        if len(candidates) == 0:
+            return []
+
+        screen = camera.world_to_screen(self.entities.positions[candidates])
+        dx = screen[:, 0] - px
+        dy = screen[:, 1] - py
+        if half_width is not None:
+            hit = (np.abs(dx) <= half_width) & (dy >= 0) & (dy <= height)
+        else:
+            hit = dx * dx + dy * dy <= self.pick_radius ** 2
+        candidates, screen, dx = candidates[hit], screen[hit], dx[hit]
+        # Front to back in CrewLayer's draw order: lower on screen is drawn later, then further right
+        order = np.lexsort((-screen[:, 0], -screen[:, 1]))
+        return self.entities.ids[candidates[order]].tolist()
+
+    def pick(self, window, screen_pos, sprite_size=None):
+        """
+        Ranked candidates under the cursor: entities front to back, then the room, then the tile.
+        """
+        tile = self.tile_at(window, screen_pos)
+        picks = [Pick("entity", entity, tile) for entity in self.entities_at(window, screen_pos, sprite_size)]
+        if self.tilemap is not None:
+            room = self.tilemap.get(*tile)[2]
+            if room != NO_ROOM:
+                picks.append(Pick("room", room, tile))
+        picks.append(Pick("tile", tile, tile))
+        return picks
@@ -0,0 +1,184 @@
+# gui/tilemap_renderer.py
+
+import math
+from collections import OrderedDict
+import numpy as np
+import pygame
+import settings
+from gui.lod import zoom_bucket
+from tilemap import CHUNK_SIZE
+
+# Transparent background of cached blocks
+COLOR_KEY = (255, 0, 255)
+# Index into the color table: the floor type, or WALL for wall tiles
+WALL = 3
+
+
+class TileMapRenderer():
+    """
+    Draws a TileMap from cached, pre-rotated images of square blocks of tiles.
+
+    A block is a whole chunk, or a power-of-two part of one when a chunk would be too
+    big an image at the current zoom. Block images are rendered for the zoom bucket of
+    the camera's target scale (see lod.zoom_bucket) and rebuilt only when their chunk's
+    version or the bucket changes. They are shrunk to the exact scale when drawn, and the
+    shrunk copy is kept while the scale holds still, so a resting frame is just one blit
+    per visible block and a wheel notch within the same bucket rebuilds nothing.
+    """
+    def __init__(self, tilemap):
+        self.tilemap = tilemap
+        self.cache = OrderedDict()  # (cx, cy, bx, by, block tiles) -> (version, bucket, surface)
+        self.resized = {}  # same keys -> (bucket surface, size, surface resized to the current scale)
+        self.cached_pixels = 0
+        self.rebuilds = 0
+        self.apply_settings(settings.current())
+
+    def apply_settings(self, config):
+        tilemap = config.tilemap
+        self.max_block_pixels = tilemap.max_block_pixels
+        self.cache_pixels = tilemap.cache_pixels
+        self.colors = np.array([COLOR_KEY, tilemap.floor_color, tilemap.corridor_color, tilemap.wall_color],
+                               dtype=np.uint8)
+        self.clear()
+
+    def clear(self):
+        self.cache.clear()
+        self.resized.clear()
+        self.cached_pixels = 0
+
+    def block_tiles(self, tile_pixels):
+        """
+        Tiles along a block's side: the largest power of two up to CHUNK_SIZE whose image fits max_block_pixels.
+        """
+        if tile_pixels * CHUNK_SIZE <= self.max_block_pixels:
+            return CHUNK_SIZE
+        return max(1, 2 ** int(math.floor(math.log2(max(self.max_block_pixels / tile_pixels, 1)))))
+
+    def _render_block(self, chunk, bx, by, block, tile_pixels):
+        floor = chunk.floor[by:by + block, bx:bx + block]
+        wall = chunk.wall[by:by + block, bx:bx + block]
+        if not (floor.any() or wall.any()):
+            return None
+        rgb = self.colors[np.where(wall, WALL, floor)]
+        # surfarray indexes [x, y], the tile arrays [y, x]
+        surface = pygame.surfarray.make_surface(rgb.transpose(1, 0, 2))
+        side = max(1, round(block * tile_pixels))
+        surface = pygame.transform.scale(surface, (side, side))
+        surface.set_colorkey(COLOR_KEY)
+        # Tile x runs down-right and tile y down-left on screen: turn the image 45° clockwise
+        surface = pygame.transform.rotate(surface, -45)
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+        surface.set_colorkey(COLOR_KEY, pygame.RLEACCEL)
+        return surface
+
+    def _block_surface(self, key, chunk, bucket, tile_pixels):
+        cached = self.cache.get(key)
+        if cached is not None and cached[0] == chunk.version and cached[1] == bucket:
+            self.cache.move_to_end(key)
+            return cached[2]
+        if cached is not None:
+            self._forget(key)
+        _, _, bx, by, block = key
+        surface = self._render_block(chunk, bx, by, block, tile_pixels)
+        self.rebuilds += 1
+        self.cache[key] = (chunk.version, bucket, surface)
+        if surface is not None:
+            self.cached_pixels += surface.get_width() * surface.get_height()
+        # Least recently drawn blocks go first
+        while self.cached_pixels > self.cache_pixels and len(self.cache) > 1:
+            self._forget(next(iter(self.cache)))
+        return surface
+
+    def _forget(self, key):
+        self.resized.pop(key, None)
+        surface = self.cache.pop(key)[2]
+        if surface is not None:
+            self.cached_pixels -= surface.get_width() * surface.get_height()
+
+    def visible_tiles(self, window):
+        """
+        (x0, y0, x1, y1) range of tile coordinates that can be on screen.
+        """
+        corners = window.camera.screen_to_world([(0, 0), (window.width, 0), (0, window.height),
+                                                 (window.width, window.height)])
+        x0, y0 = np.floor(corners.min(axis=0)).astype(int)
+        x1, y1 = np.ceil(corners.max(axis=0)).astype(int)
+        return x0, y0, x1, y1
+
+    def draw(self, window):
+        camera = window.camera
+        bucket = zoom_bucket(camera.target_scale)
+        tile_pixels = camera.tile_size * bucket
+        block = self.block_tiles(tile_pixels)
+        # Screen x = offset + k (x - y), screen y = offset + k (x + y)
+        k = camera.scale * camera.tile_size / math.sqrt(2)
+        side = 2 * k * block
+        offset_x, offset_y = camera.offset
+        x0, y0, x1, y1 = self.visible_tiles(window)
+        cx0, cy0 = x0 // CHUNK_SIZE, y0 // CHUNK_SIZE
+        cx1, cy1 = x1 // CHUNK_SIZE, y1 // CHUNK_SIZE
+        if (cx1 - cx0 + 1) * (cy1 - cy0 + 1) <= len(self.tilemap.chunks):
+            keys = [(cx, cy) for cy in range(cy0, cy1 + 1) for cx in range(cx0, cx1 + 1)]
+        else:
+            keys = [key for key in self.tilemap.chunks if cx0 <= key[0] <= cx1 and cy0 <= key[1] <= cy1]
+
+        blits = []
+        for cx, cy in keys:
+            chunk = self.tilemap.chunks.get((cx, cy))
+            if chunk is None:
+                continue
+            for by in range(0, CHUNK_SIZE, block):
+                y = cy * CHUNK_SIZE + by
+                if y + block < y0 or y > y1:
+                    continue
+                for bx in range(0, CHUNK_SIZE, block):
+                    x = cx * CHUNK_SIZE + bx
+                    if x + block < x0 or x > x1:
+                        continue
+                    left = offset_x + k * (x - y - block)
+                    top = offset_y + k * (x + y)
+                    if left > window.width or top > window.height or left + side < 0 or top + side < 0:
+                        continue
+                    key = (cx, cy, bx, by, block)
+                    surface = self._block_surface(key, chunk, bucket, tile_pixels)
+                    if surface is None:
+                        continue
+                    size = round(side)
+                    if abs(surface.get_width() - size) > 1:
+                        # Scale is below the bucket: shrink the cached image, once per scale
+                        resized = self.resized.get(key)
+                        if resized is None or resized[0] is not surface or resized[1] != size:
+                            resized = (surface, size, pygame.transform.scale(surface, (size, size)))
+                            self.resized[key] = resized
+                        surface = resized[2]
+                    blits.append((surface, (round(left), round(top))))
+        window.display.blits(blits, doreturn=False)
+        return len(blits)
+
+
+if __name__ == "__main__":
+    import time
+    from entities.layout import generate_layout
+    from gui.window import Window
+    from tilemap import TileMap
+
+    pygame.init()
+    window = Window()
+    layout = generate_layout(2000, seed=1)
+    tilemap = TileMap.from_layout(layout)
+    renderer = TileMapRenderer(tilemap)
+    for scale in (0.1, 0.5, 1.0, 3.0):
+        window.camera.set_view(scale=scale)
+        window.camera.pan_to((layout.width / 2, layout.height / 2), (window.width / 2, window.height / 2))
+        window.camera.set_view(offset=window.camera.target_offset)
+        renderer.draw(window)  # builds the cache for this zoom
+        rebuilds = renderer.rebuilds
+        started = time.perf_counter()
+        for _ in range(100):
+            window.clear_window()
+            blits = renderer.draw(window)
+        elapsed = (time.perf_counter() - started) / 100
+        print(f"scale {scale}: {blits} blocks, {elapsed * 1000:.2f} ms per frame, "
+              f"{renderer.rebuilds - rebuilds} rebuilds after the first frame")
+    pygame.quit()
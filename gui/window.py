@@ -1,68 +1,76 @@
 # WINDOW["py
 
 import pygame
-from settings import WINDOW
+import settings
+from gui.camera import Camera, PAN_REFERENCE_FPS
 
 
 class Window():
     def __init__(self):
-        self.offset_x, self.offset_y = 0, 0
-        self.width, self.height = WINDOW["width"], WINDOW["height"]
-        self.bg_color = WINDOW["bg_color"]
-        self.pan_speed = WINDOW["pan_speed"]
-        self.min_scale = WINDOW["min_scale"]
-        self.max_scale = WINDOW["max_scale"]
-        self.zoom_step = WINDOW["zoom_step"]
-        self.caption = WINDOW["caption"]
-        self.scale = 1
+        config = settings.current()
+        self.width, self.height = config.window.width, config.window.height
+        self.camera = Camera(config.grid.base_grid_spacing, scale=config.window.initial_scale)
+        self.apply_settings(config)
         self.display = pygame.display.set_mode((self.width,self.height), pygame.RESIZABLE)
         self.clear_window()
         pygame.display.set_caption(self.caption)
-        
+
+    def apply_settings(self, config):
+        """
+        Picks up new window settings. The window size is left alone, the player owns it once it is open.
+        """
+        window = config.window
+        self.bg_color = window.bg_color
+        self.pan_speed = window.pan_speed
+        self.min_scale = window.min_scale
+        self.max_scale = window.max_scale
+        self.zoom_step = window.zoom_step
+        self.camera.tile_size = config.grid.base_grid_spacing
+        self.camera.set_limits(window.min_scale, window.max_scale)
+        self.camera.smoothing = window.camera_smoothing
+        if getattr(self, "caption", window.caption) != window.caption:
+            pygame.display.set_caption(window.caption)
+        self.caption = window.caption
+
+    # The view itself is owned by the camera
+    @property
+    def scale(self):
+        return self.camera.scale
+
+    @property
+    def offset_x(self):
+        return self.camera.offset[0]
+
+    @property
+    def offset_y(self):
+        return self.camera.offset[1]
     
     def resize(self,new_width,new_height):
         self.width, self.height = (new_width,new_height)
         self.display = pygame.display.set_mode((self.width,self.height), pygame.RESIZABLE)
 
     def zoom_in(self,mouse_pos):
-        # Calculate the world coordinates before scaling
-        world_x_before = (mouse_pos[0] - self.offset_x) / self.scale
-        world_y_before = (mouse_pos[1] - self.offset_y) / self.scale
-        # Adjust scale
-        new_scale = self.scale + self.zoom_step
-        if new_scale > self.max_scale:
-            new_scale = self.max_scale
-        # Calculate the new offsets to keep the world point under the mouse stationary
-        self.offset_x = mouse_pos[0] - world_x_before * new_scale
-        self.offset_y = mouse_pos[1] - world_y_before * new_scale
-        # Update the scale
-        self.scale = new_scale
+        # Keeps the world point under the mouse stationary while the zoom glides in
+        self.camera.zoom_at(mouse_pos, self.zoom_step)
     
     def zoom_out(self,mouse_pos):
-        # Calculate the world coordinates before scaling
-        world_x_before = (mouse_pos[0] - self.offset_x) / self.scale
-        world_y_before = (mouse_pos[1] - self.offset_y) / self.scale
-        # Adjust scale
-        new_scale = self.scale - self.zoom_step
-        if new_scale < self.min_scale:
-            new_scale = self.min_scale
-        # Calculate the new offsets to keep the world point under the mouse stationary
-        self.offset_x = mouse_pos[0] - world_x_before * new_scale
-        self.offset_y = mouse_pos[1] - world_y_before * new_scale
-        # Update the scale
-        self.scale = new_scale
+        self.camera.zoom_at(mouse_pos, -self.zoom_step)
+
+    def update(self, dt):
+        self.camera.update(dt)
 
-    def pan_left(self):
-        self.offset_x += self.pan_speed
+    # Panning is time based: pan_speed pixels per 1/60 s whatever the frame rate
+    def pan_left(self, dt=1/PAN_REFERENCE_FPS):
+        self.camera.pan(self.pan_speed * PAN_REFERENCE_FPS * dt, 0)
     
-    def pan_right(self):
-        self.offset_x -= self.pan_speed
+    def pan_right(self, dt=1/PAN_REFERENCE_FPS):
+        self.camera.pan(-self.pan_speed * PAN_REFERENCE_FPS * dt, 0)
 
-    def pan_down(self):
-        self.offset_y -= self.pan_speed
+    def pan_down(self, dt=1/PAN_REFERENCE_FPS):
+        self.camera.pan(0, -self.pan_speed * PAN_REFERENCE_FPS * dt)
 
-    def pan_up(self):
-        self.offset_y += self.pan_speed
+    def pan_up(self, dt=1/PAN_REFERENCE_FPS):
+        self.camera.pan(0, self.pan_speed * PAN_REFERENCE_FPS * dt)
 
     def clear_window(self):
-        self.display.fill((self.bg_color[0],self.bg_color[1],self.bg_color[2]))
\ No newline at end of file
+        self.display.fill((self.bg_color[0],self.bg_color[1],self.bg_color[2]))
@@ -2,32 +2,86 @@
 
 import pygame
 import sys
+import settings
 from grid import Grid
 from gui.window import Window
 from gui.gui import GraphicalUserInterface
 from game import Game
+from settings import SettingsWatcher
+from simulation import SimulationWorker
+from autosave import Autosave
+from gui.picking import Picker
+from gui.pacing import FramePacer
+from gui.lod import CrewLayer, person_sprite
+from entities.ship import Ship
+from entities.crew import Crew
+from tilemap import TileMap
+from recorder import ShipRecorder
 
 def main():
     # Start the game
     game = Game()
+    # Saves in the background every in-game hour
+    autosave = Autosave()
+    game.autosave = autosave
+    # Generate the ship and put its crew aboard
+    colony = settings.current().colony
+    game.ship = Ship.generate(colony.room_count)
+    game.crew = Crew()
+    game.crew.populate(colony.crew_size, game.ship.rooms)
+    # Crew statistics for the HUD, kept current by the Crew as people join and leave
+    game.aggregates = game.crew.aggregates
+    # Ship and crew history, with the streaming trends shown on the HUD
+    game.recorder = ShipRecorder(game.ship, game.aggregates)
     # Set up the display
     window = Window()
     # Initialize and draw grid
     grid = Grid()
+    grid.set_tilemap(TileMap.from_layout(game.ship.layout))
+    # Start looking at the Core
+    x, y, width, height = game.ship.rooms[0].bounds
+    window.camera.pan_to((x + width / 2, y + height / 2), (window.width / 2, window.height / 2))
+    window.camera.set_view(offset=window.camera.target_offset)
     grid.draw_grid(window)
+    # Draws the crew at the grid's level of detail
+    crew_layer = CrewLayer(grid.lod)
+    crew_sprite = person_sprite()
 
     # Initialize UI
     gui = GraphicalUserInterface()  
+    # Finds what is under the mouse when the player clicks
+    picker = Picker(lod=grid.lod)
+
+    # The simulation ticks on its own thread; the loop below only handles input and drawing
+    simulation = SimulationWorker(game)
+    # Slows the loop down when nothing happens on screen, and stops drawing while minimized
+    pacer = FramePacer(game.clock)
+
+    # Apply edits to settings.json while the game is running
+    settings_watcher = SettingsWatcher()
+    for component in (window, grid, gui, pacer):
+        settings_watcher.subscribe(component.apply_settings)
+    # The game only changes on its own thread
+    settings_watcher.subscribe(lambda config: simulation.submit(Game.apply_settings, config))
+
+    simulation.start()
 
     running = True
     while running:
-        dt = game.clock.tick(60) / 1000.0  # Maintain frame rate
-        game.tick(dt)
-        for event in pygame.event.get():
+        dt, events = pacer.wait()
+        simulation.check()
+        for event in events:
             if event.type == pygame.QUIT:
                 running = False
             elif event.type == pygame.VIDEORESIZE:
                 window.resize(event.w, event.h)
+            elif event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                # Select the front-most thing under the cursor
+                picker.tilemap = grid.tiles.tilemap if grid.tiles is not None else None
+                people = simulation.latest().people
+                if people is not None:
+                    picker.entities.update(people.ids, people.positions)
+                gui.selection = picker.pick(window, event.pos, crew_sprite.get_size())[0]
             elif event.type == pygame.MOUSEBUTTONDOWN and event.button in (4, 5):
                 # Handle zooming with mouse wheel
                 # Get the mouse position
@@ -39,23 +93,42 @@ def main():
         # Handle key presses for panning using WASD
         keys = pygame.key.get_pressed()
         if keys[pygame.K_a]:  # Move left
-            window.pan_left()
+            window.pan_left(dt)
         if keys[pygame.K_d]:  # Move right
-            window.pan_right()
+            window.pan_right(dt)
         if keys[pygame.K_w]:  # Move up
-            window.pan_up()
+            window.pan_up(dt)
         if keys[pygame.K_s]:  # Move down
-            window.pan_down()
+            window.pan_down(dt)
+        if keys[pygame.K_a] or keys[pygame.K_d] or keys[pygame.K_w] or keys[pygame.K_s] or window.camera.moving:
+            pacer.note_activity()
+
+        window.update(dt)
+        if settings_watcher.poll():
+            pacer.note_activity()
 
+        snapshot = simulation.latest()
+        pacer.show(gui.hud_state(snapshot))
+        if not pacer.should_draw():
+            continue
+        # Frame stats ride along on frames drawn for other reasons, so they never wake an idle screen
+        gui.frame_stats = (round(pacer.draw_rate), round(pacer.cpu_per_second, 2))
         # Delete everything on screen
         window.clear_window()
         # Draw the rotated grid with current scale and offsets
         grid.draw_grid(window)
+        if snapshot.people is not None:
+            crew_layer.draw(window, snapshot.people.positions, snapshot.people.colors, crew_sprite)
 
-        gui.render_ui(window,game)
+        gui.render_ui(window, snapshot)
         # Update the display
         pygame.display.flip()
+        pacer.drew()
 
+    simulation.stop()
+    autosave.save(game)
+    autosave.close()
+    game.recorder.close()
     pygame.quit()
     sys.exit()
 
@@ -0,0 +1,320 @@
+# maintenance.py
+
+"""
+Repair dispatch: broken components to qualified, idle crew.
+
+Open jobs wait in one heap per trade, ordered by life-support impact, then urgency,
+then age. Idle colonists are indexed by career, so finding candidates for a job only
+looks at the people who can do it. Each tick merges the heads of the trades that still
+have someone free and staffs at most jobs_per_tick of the most pressing jobs, picking
+the nearest candidate for each from one array per trade. A trade nobody can work on
+right now is skipped, so its backlog never holds up jobs in other trades, and a burst
+of failures is spread over a few ticks instead of stalling one frame. A job with nobody
+in range is parked off its queue, so jobs behind it get looked at; parked jobs rejoin
+when their queue runs dry or after retry_ticks ticks.
+"""
+
+import heapq
+import itertools
+import numpy as np
+import settings
+from entities.person import Career
+from entities.room.component import Component
+
+# Component trade -> careers that can repair it
+TRADES = {
+    "mechanical": (Career.MECHANICAL_ENGINEER, Career.AEROSPACE_ENGINEER),
+    "electrical": (Career.ELECTRICAL_ENGINEER, Career.COMPUTER_ENGINEER),
+    "life_support": (Career.CHEMICAL_ENGINEER, Career.MECHANICAL_ENGINEER),
+    "computing": (Career.COMPUTER_ENGINEER, Career.ELECTRICAL_ENGINEER),
+    "navigation": (Career.PILOT, Career.AEROSPACE_ENGINEER),
+    "hydroponics": (Career.BOTANIST, Career.CHEMICAL_ENGINEER),
+    "medical": (Career.PHYSICIAN,),
+}
+
+
+class RepairJob():
+    __slots__ = ("component", "urgency", "position", "created", "assignee", "cancelled")
+
+    def __init__(self, component, urgency, position, created):
+        self.component = component
+        self.urgency = urgency
+        self.position = position
+        self.created = created
+        self.assignee = None
+        self.cancelled = False
+
+    def priority(self):
+        # Smallest first in the heap
+        return (not self.component.life_support, -self.urgency, self.created)
+
+
+class MaintenanceDispatcher():
+    """
+    Queue of repair jobs and the colonists free to take them.
+    """
+    def __init__(self):
+        self.queues = {trade: [] for trade in TRADES}  # trade -> heap of (priority, order, job), cancelled jobs skipped lazily
+        self.parked = {trade: [] for trade in TRADES}  # trade -> jobs nobody was in range for
+        self.ticks = 0
+        self.parked_since = {trade: 0 for trade in TRADES}
+        self._order = itertools.count()
+        self.jobs = {}  # component -> open or assigned job
+        self.idle = {career: {} for career in Career}  # career -> {person: None}, in the order they became free
+        self.busy = {}  # person -> job
+        self.listeners = []
+        self.apply_settings(settings.current())
+
+    def apply_settings(self, config):
+        self.jobs_per_tick = config.maintenance.jobs_per_tick
+        self.search_radius = config.maintenance.search_radius
+        self.retry_ticks = config.maintenance.retry_ticks
+
+    def __len__(self):
+        return sum(1 for job in self.jobs.values() if job.assignee is None)
+
+    def report(self, component, position=None, urgency=None, game_time=0.0):
+        """
+        Queues a repair for a component, once. urgency defaults to how worn it is (0 to 1).
+        """
+        job = self.jobs.get(component)
+        if job is not None:
+            return job
+        if urgency is None:
+            urgency = 1.0 - component.condition
+        job = RepairJob(component, urgency, position, game_time)
+        self.jobs[component] = job
+        self._push(job)
+        return job
+
+    def _push(self, job):
+        heapq.heappush(self.queues[job.component.trade], (job.priority(), next(self._order), job))
+
+    def cancel(self, component):
+        job = self.jobs.pop(component, None)
+        if job is None:
+            return
+        job.cancelled = True
+        if job.assignee is not None:
+            self._release(job.assignee)
+
+    def set_available(self, person, available=True):
+        """
+        Adds a colonist to (or takes them out of) the idle index for their career.
+        """
+        idle = self.idle[Career(person.career)]
+        if available and person not in self.busy:
+            idle[person] = None
+        else:
+            idle.pop(person, None)
+
+    def remove_person(self, person):
+        self.set_available(person, False)
+        job = self.busy.pop(person, None)
+        if job is not None:
+            # Back in the queue for someone else
+            job.assignee = None
+            person.job = ""
+            self._push(job)
+
+    def on_routine(self, person, event, game_time):
+        """
+        CrewScheduler listener: people are on call while they work.
+        """
+        if event == "work":
+            self.set_available(person, True)
+        elif event in ("sleep", "free"):
+            self.set_available(person, False)
+
+    def _candidates(self, trade, cache):
+        # People and positions for one trade, built once per dispatch
+        entry = cache.get(trade)
+        if entry is None:
+            people = [person for career in TRADES[trade] for person in self.idle[career]]
+            entry = cache[trade] = {
+                "people": people,
+                "positions": np.array([person.position for person in people], dtype=np.float64).reshape(-1, 2),
+                "free": np.ones(len(people), dtype=bool),
+                "left": len(people),
+                "rows": {person: row for row, person in enumerate(people)},
+            }
+        return entry
+
+    def _head(self, trade):
+        # Drops finished or cancelled jobs from the top of a trade's heap
+        queue = self.queues[trade]
+        while queue and (queue[0][2].cancelled or queue[0][2].assignee is not None):
+            heapq.heappop(queue)
+        return queue[0] if queue else None
+
+    def _unpark(self):
+        # Parked jobs rejoin their queue once it has run dry, or after retry_ticks
+        for trade, parked in self.parked.items():
+            if parked and (self._head(trade) is None or self.ticks - self.parked_since[trade] >= self.retry_ticks):
+                for job in parked:
+                    if not job.cancelled and job.assignee is None:
+                        self._push(job)
+                parked.clear()
+
+    def _choose(self, job, entry):
+        # Row of the person to send, or None
+        free = entry["free"]
+        if not entry["left"]:
+            return None
+        if job.position is None:
+            return int(np.argmax(free))
+        offsets = entry["positions"] - np.asarray(job.position, dtype=np.float64)
+        distances = np.einsum("ij,ij->i", offsets, offsets)
+        available = free.copy()
+        if self.search_radius > 0:
+            available &= distances <= self.search_radius ** 2
+        distances[~available] = np.inf
+        choice = int(np.argmin(distances))
+        return choice if available[choice] else None
+
+    def dispatch(self, game_time=0.0):
+        """
+        Staffs up to jobs_per_tick of the most pressing jobs that someone is free for.
+        Returns the (job, person) pairs assigned.
+        """
+        self.ticks += 1
+        self._unpark()
+        cache = {}
+        assigned = []
+        # Most pressing job of every trade with someone free to do it
+        heads = []
+        for trade in self.queues:
+            head = self._head(trade)
+            if head is not None and self._candidates(trade, cache)["left"]:
+                heapq.heappush(heads, (head[0], head[1], trade))
+        # Every job looked at is either staffed or parked, so each trade's queue only moves forwards.
+        # Parking has its own budget per trade; a trade that spends it sits out the rest of the tick.
+        skipped = dict.fromkeys(self.queues, 0)
+        while heads and len(assigned) < self.jobs_per_tick:
+            _, _, trade = heapq.heappop(heads)
+            entry = cache[trade]
+            if not entry["left"]:
+                # Its last candidates were sent to other trades' jobs this tick
+                continue
+            _, _, job = heapq.heappop(self.queues[trade])
+            choice = self._choose(job, entry)
+            if choice is None:
+                if not self.parked[trade]:
+                    self.parked_since[trade] = self.ticks
+                self.parked[trade].append(job)
+                skipped[trade] += 1
+                if skipped[trade] >= self.jobs_per_tick:
+                    continue
+            else:
+                person = entry["people"][choice]
+                # Also gone from the other trades this career covers
+                for other in cache.values():
+                    row = other["rows"].get(person)
+                    if row is not None and other["free"][row]:
+                        other["free"][row] = False
+                        other["left"] -= 1
+                self._assign(job, person, game_time)
+                assigned.append((job, person))
+            head = self._head(trade)
+            if head is not None and entry["left"]:
+                heapq.heappush(heads, (head[0], head[1], trade))
+        return assigned
+
+    def _assign(self, job, person, game_time):
+        job.assignee = person
+        self.busy[person] = job
+        self.idle[Career(person.career)].pop(person, None)
+        person.job = f"Repair {job.component.name}"
+        for listener in self.listeners:
+            listener(job, person, game_time)
+
+    def _release(self, person):
+        self.busy.pop(person, None)
+        person.job = ""
+        self.set_available(person, person.activity == "work")
+
+    def complete(self, job):
+        """
+        The assignee has finished: repairs the component and frees them.
+        """
+        job.component.repair()
+        self.jobs.pop(job.component, None)
+        if job.assignee is not None:
+            self._release(job.assignee)
+
+
+    def save_state(self):
+        """
+        Open and assigned jobs with their components, in queue order, and the idle colonists by entity id.
+        """
+        order = {job: number for queue in self.queues.values() for _, number, job in queue}
+        parked = {job for jobs in self.parked.values() for job in jobs}
+        jobs = []
+        for job in sorted(self.jobs.values(), key=lambda job: order.get(job, -1)):
+            component = job.component
+            jobs.append({
+                "component": (component.name, component.trade, component.life_support, component.operational,
+                              component.condition),
+                "urgency": job.urgency,
+                "position": job.position,
+                "created": job.created,
+                "assignee": job.assignee.entity_id if job.assignee is not None else None,
+                "parked": job in parked,
+            })
+        return {"jobs": jobs, "ticks": self.ticks, "parked_since": self.parked_since,
+                "idle": {career.value: [person.entity_id for person in idle] for career, idle in self.idle.items()}}
+
+    def load_state(self, state, people):
+        """
+        Restores the jobs, with new Component objects owned by the dispatcher. Listeners are kept.
+        """
+        listeners = self.listeners
+        self.__init__()
+        self.listeners = listeners
+        self.ticks = state["ticks"]
+        self.parked_since = dict(state["parked_since"])
+        for saved in state["jobs"]:
+            name, trade, life_support, operational, condition = saved["component"]
+            component = Component(name, trade, life_support)
+            component.operational = operational
+            component.condition = condition
+            job = RepairJob(component, saved["urgency"], saved["position"], saved["created"])
+            self.jobs[component] = job
+            person = people.get(saved["assignee"])
+            if person is not None:
+                job.assignee = person
+                self.busy[person] = job
+            elif saved["parked"]:
+                self.parked[trade].append(job)
+            else:
+                self._push(job)
+        for career, entity_ids in state["idle"].items():
+            self.idle[Career(career)] = {people[entity_id]: None for entity_id in entity_ids if entity_id in people}
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from entities.person import Person
+    from entities.room.component import Component
+
+    rng = random.Random(0)
+    dispatcher = MaintenanceDispatcher()
+    crew = [Person() for _ in range(5000)]
+    for person in crew:
+        person.position = (rng.random() * 500, rng.random() * 500)
+        person.activity = "work"
+        dispatcher.set_available(person)
+    trades = list(TRADES)
+    for i in range(500):
+        component = Component(f"part {i}", trade=rng.choice(trades), life_support=rng.random() < 0.2)
+        component.condition = rng.random()
+        dispatcher.report(component, (rng.random() * 500, rng.random() * 500))
+    ticks = 0
+    worst = 0.0
+    while len(dispatcher):
+        started = time.perf_counter()
+        dispatcher.dispatch()
+        worst = max(worst, time.perf_counter() - started)
+        ticks += 1
+    print(f"500 failures staffed over {ticks} ticks, slowest tick {worst * 1000:.2f} ms")
@@ -0,0 +1,519 @@
+# recorder.py
+
+"""
+Atmospheric data recording (NASA-STD-3001 V2 6020) and history for trend analysis (V2 6001).
+
+Samples are stored column-wise in fixed-size ring buffers, in three tiers:
+    raw     every sample
+    minute  min/max/mean per in-game minute
+    hour    min/max/mean per in-game hour
+RAM use is fixed by the buffer capacities. Rows that fall out of a ring buffer can be
+spilled to memory-mapped files on disk, so long runs keep their full coarse history.
+"""
+
+import json
+import os
+import time
+import numpy as np
+import settings
+from trends import TrendTracker
+
+MIN, MAX, MEAN = range(3)
+
+# Spill paths in use by recorders in this process
+_open_spills = set()
+
+
+class RingBuffer():
+    """
+    Fixed-size buffer of timestamped rows. Rows are (stats, width) blocks of float64.
+    Appending to a full buffer overwrites the oldest row and returns it.
+    """
+    def __init__(self, capacity, width, stats):
+        self.capacity = capacity
+        self.times = np.zeros(capacity)
+        self.values = np.zeros((capacity, stats, width))
+        self.start = 0
+        self.size = 0
+
+    def __len__(self):
+        return self.size
+
+    def append(self, time, row):
+        evicted = None
+        if self.size < self.capacity:
+            index = (self.start + self.size) % self.capacity
+            self.size += 1
+        else:
+            index = self.start
+            evicted = (self.times[index], self.values[index].copy())
+            self.start = (self.start + 1) % self.capacity
+        self.times[index] = time
+        self.values[index] = row
+        return evicted
+
+    def oldest_time(self):
+        return self.times[self.start] if self.size else None
+
+    def _segments(self):
+        # Chronological slices of the backing arrays
+        end = self.start + self.size
+        if end <= self.capacity:
+            return [slice(self.start, end)]
+        return [slice(self.start, self.capacity), slice(0, end - self.capacity)]
+
+    def save_state(self):
+        # Just the rows in use, oldest first, as views that capture() copies
+        segments = self._segments() if self.size else []
+        return {"times": [self.times[segment] for segment in segments],
+                "values": [self.values[segment] for segment in segments]}
+
+    def load_state(self, state):
+        times = np.concatenate(state["times"]) if state["times"] else np.zeros(0)
+        values = np.concatenate(state["values"]) if state["values"] else np.zeros((0,) + self.values.shape[1:])
+        # Saved with a bigger buffer: the newest rows fit
+        times, values = times[-self.capacity:], values[-self.capacity:]
+        rows = len(times)
+        self.times[:rows] = times
+        self.values[:rows] = values
+        self.start = 0
+        self.size = rows
+
+    def query(self, t0, t1):
+        """
+        Rows with t0 <= time <= t1, oldest first. Binary search, no full scan.
+        """
+        times, values = [], []
+        for segment in self._segments():
+            segment_times = self.times[segment]
+            lo = np.searchsorted(segment_times, t0, side='left')
+            hi = np.searchsorted(segment_times, t1, side='right')
+            if hi > lo:
+                times.append(segment_times[lo:hi])
+                values.append(self.values[segment][lo:hi])
+        return times, values
+
+
+class SpillFile():
+    """
+    Append-only memory-mapped history of rows evicted from a ring buffer.
+    The row count and layout are kept in a small .meta file next to the data, so a
+    recorder that reopens the same path carries on from the history already on disk.
+    The .meta file is rewritten when the files grow, on flush() and on close(), not per row.
+    """
+    def __init__(self, path, width, stats, chunk_rows=1024, channels=None):
+        self.path = path
+        self.width = width
+        self.stats = stats
+        self.chunk_rows = chunk_rows
+        self.channels = list(channels) if channels is not None else None
+        self.size = 0
+        self.capacity = 0
+        self.times = None
+        self.values = None
+        meta = self._read_meta()
+        if meta is not None and (meta["width"], meta["stats"], meta.get("channels")) == (width, stats, self.channels) \
+                and self._has_rows(meta["size"]):
+            self.size = meta["size"]
+            self._map(max(chunk_rows, meta["capacity"]), existing=True)
+        else:
+            if meta is not None:
+                # A different channel layout: keep the old history aside instead of overwriting it
+                self._archive()
+            self._map(chunk_rows, existing=False)
+            self._write_meta()
+
+    def _read_meta(self):
+        try:
+            with open(self.path + ".meta", "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return None
+
+    def _has_rows(self, size):
+        # The data files are there and hold at least `size` rows
+        row_bytes = {".times": 8, ".values": 8 * self.stats * self.width}
+        try:
+            return all(os.path.getsize(self.path + suffix) >= size * nbytes for suffix, nbytes in row_bytes.items())
+        except OSError:
+            return False
+
+    def _write_meta(self):
+        meta = {"size": self.size, "capacity": self.capacity, "width": self.width, "stats": self.stats,
+                "channels": self.channels}
+        temp_path = self.path + ".meta.tmp"
+        with open(temp_path, "w") as file:
+            json.dump(meta, file)
+        os.replace(temp_path, self.path + ".meta")
+
+    def _archive(self):
+        stamp = base = time.strftime("%Y%m%d-%H%M%S")
+        number = 1
+        while os.path.exists(f"{self.path}-{stamp}.meta"):
+            number += 1
+            stamp = f"{base}-{number}"
+        for suffix in (".times", ".values", ".meta"):
+            if os.path.exists(self.path + suffix):
+                os.replace(self.path + suffix, f"{self.path}-{stamp}{suffix}")
+
+    def _map(self, capacity, existing):
+        if self.times is not None:
+            self.times.flush()
+            self.values.flush()
+        self.times = self.values = None
+        for suffix, shape in (('.times', (capacity,)), ('.values', (capacity, self.stats, self.width))):
+            # Grow (or create) the file without touching the rows already in it
+            with open(self.path + suffix, 'r+b' if existing or self.capacity else 'w+b') as file:
+                file.truncate(int(np.prod(shape)) * 8)
+        self.times = np.memmap(self.path + '.times', dtype=np.float64, mode='r+', shape=(capacity,))
+        self.values = np.memmap(self.path + '.values', dtype=np.float64, mode='r+',
+                                shape=(capacity, self.stats, self.width))
+        self.capacity = capacity
+
+    def append(self, time, row):
+        if self.size and time < self.times[self.size - 1]:
+            # Time went backwards: a new run is recording here, so the old one's history is set aside
+            self.close()
+            self._archive()
+            self.size = self.capacity = 0
+            self._map(self.chunk_rows, existing=False)
+            self._write_meta()
+        if self.size == self.capacity:
+            self._map(self.capacity * 2, existing=True)
+            self._write_meta()
+        self.times[self.size] = time
+        self.values[self.size] = row
+        self.size += 1
+
+    def oldest_time(self):
+        return self.times[0] if self.size else None
+
+    def query(self, t0, t1):
+        times = self.times[:self.size]
+        lo = np.searchsorted(times, t0, side='left')
+        hi = np.searchsorted(times, t1, side='right')
+        if hi <= lo:
+            return [], []
+        return [np.array(times[lo:hi])], [np.array(self.values[lo:hi])]
+
+    def flush(self):
+        """
+        Writes the mapped rows and the row count to disk.
+        """
+        if self.times is not None:
+            self.times.flush()
+            self.values.flush()
+            self._write_meta()
+
+    def close(self):
+        self.flush()
+        self.times = self.values = None
+        _open_spills.discard(self.path)
+
+
+class _Bucket():
+    """
+    Running min/max/mean of one aggregation period.
+    """
+    def __init__(self, width):
+        self.index = None
+        self.minimum = np.full(width, np.inf)
+        self.maximum = np.full(width, -np.inf)
+        self.total = np.zeros(width)
+        self.count = 0
+
+    def reset(self, index):
+        self.index = index
+        self.minimum.fill(np.inf)
+        self.maximum.fill(-np.inf)
+        self.total.fill(0.0)
+        self.count = 0
+
+    def add(self, minimum, maximum, mean, count=1):
+        np.minimum(self.minimum, minimum, out=self.minimum)
+        np.maximum(self.maximum, maximum, out=self.maximum)
+        self.total += mean * count
+        self.count += count
+
+    def row(self):
+        return np.stack([self.minimum, self.maximum, self.total / self.count])
+
+    def save_state(self):
+        return {"index": self.index, "minimum": self.minimum, "maximum": self.maximum, "total": self.total,
+                "count": self.count}
+
+    def load_state(self, state):
+        self.index = state["index"]
+        self.minimum[:] = state["minimum"]
+        self.maximum[:] = state["maximum"]
+        self.total[:] = state["total"]
+        self.count = state["count"]
+
+
+class Tier():
+    def __init__(self, name, period, capacity, width, spill_path=None, channels=None):
+        self.name = name
+        self.period = period  # seconds per row, None for raw samples
+        stats = 1 if period is None else 3
+        self.buffer = RingBuffer(capacity, width, stats)
+        self.spill = SpillFile(spill_path, width, stats, channels=channels) if spill_path else None
+        self.bucket = _Bucket(width) if period is not None else None
+
+    def append(self, time, row):
+        evicted = self.buffer.append(time, row)
+        if evicted is not None and self.spill is not None:
+            self.spill.append(*evicted)
+
+    def save_state(self):
+        # Spilled rows stay on disk; the save only notes how many there were
+        return {"buffer": self.buffer, "bucket": self.bucket,
+                "spilled": self.spill.size if self.spill is not None else None}
+
+    def load_state(self, state):
+        self.buffer.load_state(state["buffer"])
+        if self.bucket is not None:
+            self.bucket.load_state(state["bucket"])
+        if self.spill is not None and state["spilled"] is not None:
+            # Rows spilled after the save belong to a future this load has undone
+            self.spill.size = min(self.spill.size, state["spilled"])
+
+    def oldest_time(self):
+        if self.spill is not None and self.spill.size:
+            return self.spill.oldest_time()
+        return self.buffer.oldest_time()
+
+    def query(self, t0, t1):
+        times, values = [], []
+        if self.spill is not None:
+            times, values = self.spill.query(t0, t1)
+        ring_times, ring_values = self.buffer.query(t0, t1)
+        times += ring_times
+        values += ring_values
+        stats = 1 if self.period is None else 3
+        if not times:
+            return np.zeros(0), np.zeros((0, stats, self.buffer.values.shape[2]))
+        return np.concatenate(times), np.concatenate(values)
+
+
+class Recorder():
+    """
+    Records a fixed set of named channels over time.
+    """
+    def __init__(self, channels, raw_interval=None, raw_capacity=None, minute_capacity=None,
+                 hour_capacity=None, spill_dir=None, spill_tiers=("hour",), trends=True, name="recorder"):
+        config = settings.current().recorder
+        self.channels = list(channels)
+        self.channel_index = {name: i for i, name in enumerate(self.channels)}
+        width = len(self.channels)
+        self.raw_interval = config.raw_interval if raw_interval is None else raw_interval
+        spill_dir = config.spill_dir if spill_dir is None else spill_dir
+        if spill_dir:
+            os.makedirs(spill_dir, exist_ok=True)
+
+        # Spill files are named after the recorder; a second recorder with the same name gets a numbered one
+        self.name = name
+        if spill_dir:
+            number = 1
+            while any(os.path.join(spill_dir, f"{self.name}-{tier}") in _open_spills for tier in spill_tiers):
+                number += 1
+                self.name = f"{name}{number}"
+
+        def spill_path(tier):
+            if not spill_dir or tier not in spill_tiers:
+                return None
+            path = os.path.join(spill_dir, f"{self.name}-{tier}")
+            _open_spills.add(path)
+            return path
+
+        self.raw = Tier("raw", None, config.raw_capacity if raw_capacity is None else raw_capacity,
+                        width, spill_path("raw"), self.channels)
+        self.minute = Tier("minute", 60.0, config.minute_capacity if minute_capacity is None else minute_capacity,
+                           width, spill_path("minute"), self.channels)
+        self.hour = Tier("hour", 3600.0, config.hour_capacity if hour_capacity is None else hour_capacity,
+                         width, spill_path("hour"), self.channels)
+        self.tiers = (self.raw, self.minute, self.hour)
+        self.last_sample_time = None
+        # Streaming trend statistics over the same channels, fed every recorded sample
+        self.trends = TrendTracker(self.channels) if trends else None
+
+    def sample(self, time, values):
+        """
+        Adds one sample. Samples closer than raw_interval to the previous one are skipped.
+        Returns True when the sample was recorded.
+        """
+        if self.last_sample_time is not None and time - self.last_sample_time < self.raw_interval:
+            return False
+        self.last_sample_time = time
+        values = np.asarray(values, dtype=np.float64)
+        self.raw.append(time, values[np.newaxis, :])
+        self._aggregate(self.minute, time, values, values, values, 1)
+        if self.trends is not None:
+            self.trends.update(time, values)
+        return True
+
+    def _aggregate(self, tier, time, minimum, maximum, mean, count):
+        index = int(time // tier.period)
+        bucket = tier.bucket
+        if bucket.index is None:
+            bucket.reset(index)
+        elif index != bucket.index:
+            self._close(tier)
+            bucket.reset(index)
+        bucket.add(minimum, maximum, mean, count)
+
+    def _close(self, tier):
+        # Pushes a finished bucket into its tier and up into the next coarser one
+        bucket = tier.bucket
+        row = bucket.row()
+        bucket_time = bucket.index * tier.period
+        tier.append(bucket_time, row)
+        if tier is self.minute:
+            self._aggregate(self.hour, bucket_time, row[MIN], row[MAX], row[MEAN], bucket.count)
+
+    def flush(self):
+        """
+        Closes the open minute and hour buckets, e.g. before saving or charting the latest data.
+        """
+        for tier in (self.minute, self.hour):
+            if tier.bucket.index is not None and tier.bucket.count:
+                self._close(tier)
+                tier.bucket.reset(tier.bucket.index)
+        for tier in self.tiers:
+            if tier.spill is not None:
+                tier.spill.flush()
+
+    def _columns(self, channels):
+        if channels is None:
+            return slice(None)
+        return [self.channel_index[name] if isinstance(name, str) else name for name in channels]
+
+    def query(self, t0, t1, channels=None, tier=None):
+        """
+        History of the given channels between t0 and t1 (game seconds).
+        Uses the finest tier that still reaches back to t0 unless a tier name is given.
+        Returns (times, minimum, maximum, mean) arrays shaped (rows,) and (rows, channels).
+        """
+        if tier is None:
+            oldest = {candidate: candidate.oldest_time() for candidate in self.tiers}
+            recorded = [time for time in oldest.values() if time is not None]
+            # A range that starts before recording began only needs to reach the first sample
+            start = max(t0, min(recorded)) if recorded else t0
+            chosen = None
+            for candidate in self.tiers:
+                if oldest[candidate] is not None and oldest[candidate] <= start:
+                    chosen = candidate
+                    break
+            if chosen is None:
+                # Nothing reaches that far back: the tier with the longest history
+                reaching = [candidate for candidate in self.tiers if oldest[candidate] is not None]
+                chosen = min(reaching, key=oldest.get) if reaching else self.raw
+        else:
+            chosen = {t.name: t for t in self.tiers}[tier]
+        times, values = chosen.query(t0, t1)
+        values = values[:, :, self._columns(channels)]
+        if chosen.period is None:
+            return times, values[:, 0], values[:, 0], values[:, 0]
+        return times, values[:, MIN], values[:, MAX], values[:, MEAN]
+
+    def save_state(self):
+        return {"channels": self.channels, "last_sample_time": self.last_sample_time,
+                "tiers": {tier.name: tier for tier in self.tiers}, "trends": self.trends}
+
+    def load_state(self, state):
+        if list(state["channels"]) != self.channels:
+            raise ValueError(f"{self.name}: the save was recorded with different channels")
+        self.last_sample_time = state["last_sample_time"]
+        for tier in self.tiers:
+            tier.load_state(state["tiers"][tier.name])
+        if self.trends is not None and state["trends"] is not None:
+            self.trends.load_state(state["trends"])
+
+    def close(self):
+        for tier in self.tiers:
+            if tier.spill is not None:
+                tier.spill.close()
+
+
+ROOM_CHANNELS = ("o2", "n2", "co2", "h2o", "temperature")
+CREW_CHANNELS = ("mean_mood", "min_mood")
+
+
+class ShipRecorder(Recorder):
+    """
+    Records the ship's resources, every room's atmosphere and, given the CrewAggregates, crew mood.
+    The channel layout is fixed when the recorder is created; build it once the ship is laid out.
+    """
+    def __init__(self, ship, aggregates=None, **kwargs):
+        self.ship = ship
+        self.aggregates = aggregates
+        self.resource_names = list(ship.resources)
+        self.room_count = ship.atmosphere.count
+        channels = [f"resource.{name}" for name in self.resource_names]
+        channels += [f"room.{room}.{name}" for room in range(self.room_count) for name in ROOM_CHANNELS]
+        if aggregates is not None:
+            channels += [f"crew.{name}" for name in CREW_CHANNELS]
+        kwargs.setdefault("name", "ship")
+        super().__init__(channels, **kwargs)
+        self._row = np.zeros(len(channels))
+        # Channels with trends on the HUD: ship-wide values, not per room
+        self.hud_channels = [name for name in self.channels if not name.startswith("room.")]
+
+    def record(self, game_time):
+        if self.last_sample_time is not None and game_time - self.last_sample_time < self.raw_interval:
+            return False
+        resources = len(self.resource_names)
+        for i, name in enumerate(self.resource_names):
+            self._row[i] = self.ship.resources[name]
+        atmosphere = self.ship.atmosphere
+        rooms = self._row[resources:resources + self.room_count * len(ROOM_CHANNELS)].reshape(
+            self.room_count, len(ROOM_CHANNELS))
+        rooms[:, :4] = atmosphere.partial[:self.room_count]
+        rooms[:, 4] = atmosphere.temperature[:self.room_count]
+        if self.aggregates is not None:
+            crew = self._row[-len(CREW_CHANNELS):]
+            for i, name in enumerate(CREW_CHANNELS):
+                value = getattr(self.aggregates, name)
+                crew[i] = np.nan if value is None else value
+        return self.sample(game_time, self._row)
+
+    def hud_trends(self):
+        """
+        Trend tuples for the HUD, straight from the streaming statistics.
+        """
+        return self.trends.trends(self.hud_channels) if self.trends is not None else None
+
+
+if __name__ == "__main__":
+    import tempfile
+    spill_dir = tempfile.mkdtemp()
+    recorder = Recorder(["a", "b"], raw_interval=10.0, raw_capacity=360, minute_capacity=120, hour_capacity=24,
+                        spill_dir=spill_dir)
+    for step in range(721):
+        recorder.sample(step * 10.0, [step, -step])
+    now = recorder.last_sample_time
+    # A range starting before the first sample gets the same rows as one starting at it
+    early = recorder.query(now - 86400, now)[0]
+    first = recorder.query(0.0, now)[0]
+    assert len(early) == len(first) > 2, (len(early), len(first))
+    print(f"2 h of samples: {len(early)} rows for the last day, from the finest tier reaching back to the start")
+
+    # Spilled hourly history survives a restart in the same directory
+    for step in range(721, 200_000, 6):
+        recorder.sample(step * 10.0, [step, -step])
+    recorder.close()
+    spilled = recorder.hour.spill.size
+    reopened = Recorder(["a", "b"], raw_interval=10.0, raw_capacity=360, minute_capacity=120, hour_capacity=24,
+                        spill_dir=spill_dir)
+    assert reopened.hour.spill.size == spilled > 0, (reopened.hour.spill.size, spilled)
+    other = Recorder(["a", "b"], spill_dir=spill_dir)
+    assert other.name != reopened.name
+    print(f"{spilled} spilled hour rows reopened; a second recorder spills to {other.name}-hour")
+
+    # A .meta file whose data files are gone starts a fresh history instead of failing
+    reopened.close()
+    for suffix in (".times", ".values"):
+        os.remove(reopened.hour.spill.path + suffix)
+    fresh = Recorder(["a", "b"], raw_interval=10.0, raw_capacity=360, minute_capacity=120, hour_capacity=24,
+                     spill_dir=spill_dir)
+    assert fresh.hour.spill.size == 0
+    print("orphaned .meta file: fresh spill history")
@@ -0,0 +1,238 @@
+# scheduler.py
+
+"""
+Crew routines driven by a hierarchical timing wheel.
+
+Every colonist has at most a couple of pending timers (their next shift change and
+their next meal). Timers sit in wheel buckets by due time, so a tick only touches the
+bucket that is due: the cost is proportional to the transitions happening now, not
+to the size of the crew.
+"""
+
+import heapq
+import itertools
+import math
+
+
+class Timer():
+    __slots__ = ("time", "tick", "payload", "cancelled")
+
+    def __init__(self, time, tick, payload):
+        self.time = time
+        self.tick = tick
+        self.payload = payload
+        self.cancelled = False
+
+    def cancel(self):
+        # Lazy cancellation: the timer stays in its bucket and is skipped when it comes due
+        self.cancelled = True
+
+
+class TimingWheel():
+    """
+    Hierarchical timing wheel over game time.
+
+    Level 0 has one bucket per `resolution` game seconds; each higher level has buckets
+    spanning a whole turn of the level below. A timer goes into the coarsest bucket it
+    needs and moves down a level when that bucket's span begins. Timers beyond the top
+    level wait in an overflow heap.
+    """
+    def __init__(self, resolution=60.0, sizes=(60, 24, 64), start_time=0.0):
+        self.resolution = resolution
+        self.sizes = tuple(sizes)
+        self.spans = tuple(math.prod(self.sizes[:level]) for level in range(len(self.sizes)))
+        self.levels = [[[] for _ in range(size)] for size in self.sizes]
+        self.current_tick = int(start_time // resolution)
+        self.overflow = []
+        self._order = itertools.count()  # tie breaker for the overflow heap
+        self.ready = []  # timers that were already due when scheduled
+        self.count = 0
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, time, payload):
+        """
+        Returns a Timer that comes due at game time `time` (to the wheel's resolution).
+        """
+        tick = math.ceil(time / self.resolution)
+        timer = Timer(time, tick, payload)
+        self._insert(timer)
+        self.count += 1
+        return timer
+
+    def _insert(self, timer):
+        if timer.tick <= self.current_tick:
+            self.ready.append(timer)
+            return
+        for level, (size, span) in enumerate(zip(self.sizes, self.spans)):
+            if timer.tick // span - self.current_tick // span < size:
+                self.levels[level][(timer.tick // span) % size].append(timer)
+                return
+        heapq.heappush(self.overflow, (timer.tick, next(self._order), timer))
+
+    def _cascade(self):
+        # Runs when current_tick starts a new bucket on a higher level
+        tick = self.current_tick
+        top = len(self.sizes) - 1
+        if tick % (self.spans[top] * self.sizes[top]) == 0:
+            horizon = (tick // self.spans[top] + self.sizes[top]) * self.spans[top]
+            while self.overflow and self.overflow[0][0] < horizon:
+                self._insert(heapq.heappop(self.overflow)[2])
+        for level in range(top, 0, -1):
+            span = self.spans[level]
+            if tick % span == 0:
+                bucket_index = (tick // span) % self.sizes[level]
+                bucket = self.levels[level][bucket_index]
+                self.levels[level][bucket_index] = []
+                for timer in bucket:
+                    if not timer.cancelled:
+                        self._insert(timer)
+                    else:
+                        self.count -= 1
+
+    def _collect(self, timers, due):
+        for timer in timers:
+            self.count -= 1
+            if not timer.cancelled:
+                due.append(timer.payload)
+
+    def advance(self, time):
+        """
+        Moves the wheel to game time `time` and returns the due timers' payloads, oldest first.
+        """
+        due = []
+        target = int(time // self.resolution)
+        if self.ready:
+            ready, self.ready = self.ready, []
+            self._collect(ready, due)
+        while self.current_tick < target:
+            self.current_tick += 1
+            self._cascade()
+            slot = self.current_tick % self.sizes[0]
+            bucket = self.levels[0][slot]
+            if bucket:
+                self.levels[0][slot] = []
+                self._collect(bucket, due)
+            if self.ready:
+                # Timers cascaded down onto the current tick
+                ready, self.ready = self.ready, []
+                self._collect(ready, due)
+        return due
+
+
+DAY = 86400.0
+HOUR = 3600.0
+
+# The daily routine, as (activity, hours) from the start of a person's shift cycle
+ROUTINE = (("sleep", 8.0), ("work", 8.0), ("free", 8.0))
+# Meal times in hours after waking up
+MEALS = (0.5, 4.5, 10.0)
+
+
+class CrewScheduler():
+    """
+    Moves colonists through sleep, work and free time on staggered shifts, and calls them to meals.
+    Listeners are called as listener(person, event, game_time) for every transition.
+    """
+    def __init__(self, wheel=None, shifts=3):
+        self.wheel = wheel if wheel is not None else TimingWheel()
+        self.shifts = shifts
+        self.offsets = {}  # person -> shift offset in seconds
+        self.timers = {}   # person -> (routine timer, meal timer)
+        self.listeners = []
+        self.added = 0
+
+    def _cycle_position(self, person, time):
+        return (time - self.offsets[person]) % DAY
+
+    def _routine_at(self, person, time):
+        """
+        The activity a person should be doing at `time` and when it ends.
+        """
+        position = self._cycle_position(person, time)
+        end = 0.0
+        for activity, hours in ROUTINE:
+            end += hours * HOUR
+            # A timer firing exactly on a boundary belongs to the next activity
+            if position < end - 1e-6:
+                return activity, time + end - position
+        return ROUTINE[0][0], time + DAY - position + ROUTINE[0][1] * HOUR
+
+    def _next_meal(self, person, time):
+        position = self._cycle_position(person, time)
+        wake = ROUTINE[0][1] * HOUR
+        meals = [wake + hours * HOUR for hours in MEALS]
+        meals += [meal + DAY for meal in meals]
+        return time + min(meal for meal in meals if meal > position + 1e-6) - position
+
+    def add_person(self, person, now, shift=None):
+        """
+        Puts a person on a shift (0 .. shifts-1, staggered evenly over the day) starting at `now`.
+        """
+        if shift is None:
+            shift = self.added % self.shifts
+        self.added += 1
+        self.offsets[person] = shift * DAY / self.shifts
+        activity, ends = self._routine_at(person, now)
+        person.activity = activity
+        self.timers[person] = (self.wheel.schedule(ends, (person, "routine", ends)),
+                               self._schedule_meal(person, now))
+
+    def _schedule_meal(self, person, time):
+        meal = self._next_meal(person, time)
+        return self.wheel.schedule(meal, (person, "meal", meal))
+
+    def remove_person(self, person):
+        for timer in self.timers.pop(person, ()):
+            timer.cancel()
+        self.offsets.pop(person, None)
+
+    def save_state(self):
+        """
+        Each person's shift offset and when their next routine change and meal are due, by entity id.
+        """
+        wheel = self.wheel
+        people = [(person.entity_id, self.offsets[person], routine.time, meal.time)
+                  for person, (routine, meal) in self.timers.items()]
+        return {"resolution": wheel.resolution, "sizes": wheel.sizes, "current_tick": wheel.current_tick,
+                "shifts": self.shifts, "added": self.added, "people": people}
+
+    def load_state(self, state, people):
+        """
+        Puts the saved people (people maps entity ids to Person) back on their timers. Listeners are kept.
+        """
+        listeners = self.listeners
+        self.__init__(TimingWheel(state["resolution"], state["sizes"]), state["shifts"])
+        self.listeners = listeners
+        self.added = state["added"]
+        # Timers are placed relative to the current tick, so it goes first
+        self.wheel.current_tick = state["current_tick"]
+        for entity_id, offset, routine, meal in state["people"]:
+            person = people[entity_id]
+            self.offsets[person] = offset
+            self.timers[person] = (self.wheel.schedule(routine, (person, "routine", routine)),
+                                   self.wheel.schedule(meal, (person, "meal", meal)))
+
+    def update(self, game_time):
+        """
+        Processes the transitions due by game_time. Returns them as (person, event) pairs.
+        """
+        events = []
+        for person, kind, due in self.wheel.advance(game_time):
+            if person not in self.timers:
+                continue
+            routine_timer, meal_timer = self.timers[person]
+            if kind == "routine":
+                activity, ends = self._routine_at(person, due)
+                person.activity = activity
+                routine_timer = self.wheel.schedule(ends, (person, "routine", ends))
+                event = activity
+            else:
+                meal_timer = self._schedule_meal(person, due)
+                event = "meal"
+            self.timers[person] = (routine_timer, meal_timer)
+            events.append((person, event))
+            for listener in self.listeners:
+                listener(person, event, game_time)
+        return events
@@ -1,7 +1,10 @@
 # settings.py
 
 import json
+import math
 import os
+import time
+from dataclasses import dataclass, field, fields
 
 # Determine the path to the settings.json file
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -26,6 +29,10 @@ INITIAL_RESOURCES = config.get('initial_resources', {})
 
 # You can now access settings like:
 # WINDOW['width'], TEXT['color'], GRID['bg_color'], etc.
+#
+# The dictionaries above are kept for older code. New code should read the typed
+# SETTINGS object instead, which is validated once at load time and carries the
+# derived constants so nothing in a hot loop has to do string lookups.
 
 
 
@@ -42,3 +49,466 @@ RESOURCE_LABELS = {
     "Fe": "Fe"
 }
 
+
+class SettingsError(ValueError):
+    """
+    Raised when settings.json is missing a value or holds a value of the wrong type.
+    """
+
+
+Color = tuple
+
+
+@dataclass(frozen=True)
+class WindowSettings:
+    bg_color: Color
+    width: int
+    height: int
+    caption: str
+    pan_speed: float
+    initial_scale: float
+    min_scale: float
+    max_scale: float
+    zoom_step: float
+    camera_smoothing: float  # seconds; how quickly zoom and pan glide to their target, 0 to jump
+
+    def __post_init__(self):
+        if self.camera_smoothing < 0:
+            raise SettingsError("window: camera_smoothing can't be negative")
+        if self.width <= 0 or self.height <= 0:
+            raise SettingsError("window: width and height must be positive")
+        if not 0 < self.min_scale <= self.initial_scale <= self.max_scale:
+            raise SettingsError("window: expected 0 < min_scale <= initial_scale <= max_scale")
+        if self.zoom_step <= 0:
+            raise SettingsError("window: zoom_step must be positive")
+
+
+@dataclass(frozen=True)
+class GuiSettings:
+    scale_text_color: Color
+    scale_x_pos: int
+    scale_y_pos: int
+    font_size: int
+    font: str
+
+    def __post_init__(self):
+        if self.font_size <= 0:
+            raise SettingsError("gui: font_size must be positive")
+
+
+@dataclass(frozen=True)
+class GridSettings:
+    base_grid_spacing: float
+    grid_color: Color
+
+    def __post_init__(self):
+        if self.base_grid_spacing <= 0:
+            raise SettingsError("grid: base_grid_spacing must be positive")
+
+
+@dataclass(frozen=True)
+class TimeSettings:
+    time_scale: float
+    sleep: float
+    hunger: float
+    bathroom: float
+    thirst: float
+    # How much each need grows per real second (the need reaches 1.0 after its in-game time)
+    thirst_inc: float = field(init=False)
+    bathroom_inc: float = field(init=False)
+    hunger_inc: float = field(init=False)
+    sleep_inc: float = field(init=False)
+
+    def __post_init__(self):
+        for name in ("time_scale", "sleep", "hunger", "bathroom", "thirst"):
+            if getattr(self, name) <= 0:
+                raise SettingsError(f"time: {name} must be positive")
+        object.__setattr__(self, "thirst_inc", self.time_scale / self.thirst)
+        object.__setattr__(self, "bathroom_inc", self.time_scale / self.bathroom)
+        object.__setattr__(self, "hunger_inc", self.time_scale / self.hunger)
+        object.__setattr__(self, "sleep_inc", self.time_scale / self.sleep)
+
+
+@dataclass(frozen=True)
+class PenaltySettings:
+    thirst: float
+    bathroom: float
+    hunger: float
+    sleep: float
+    jobless: float
+    bedless: float
+
+
+@dataclass(frozen=True)
+class BmiSettings:
+    threshold_male: float
+    threshold_female: float
+    daily_weight_loss_rate: float
+
+    def __post_init__(self):
+        if not 0 <= self.daily_weight_loss_rate < 1:
+            raise SettingsError("bmi: daily_weight_loss_rate must be in [0, 1)")
+
+
+@dataclass(frozen=True)
+class ResourceSettings:
+    population: int
+    o2: float
+    h2o: float
+    meals: float
+    co2: float
+    solid_waste: float
+    liquid_waste: float
+
+
+@dataclass(frozen=True)
+class AtmosphereSettings:
+    room_volume: float          # m³, default volume of a new room
+    o2_partial_pressure: float  # hPa
+    n2_partial_pressure: float  # hPa
+    co2_partial_pressure: float # hPa
+    temperature: float          # °C
+    relative_humidity: float    # %
+    ventilation_flow: float     # m³/s exchanged through a duct between two rooms
+    solver_tolerance: float
+    solver_max_iterations: int
+
+    def __post_init__(self):
+        if self.room_volume <= 0:
+            raise SettingsError("atmosphere: room_volume must be positive")
+        for name in ("o2_partial_pressure", "n2_partial_pressure", "co2_partial_pressure", "ventilation_flow"):
+            if getattr(self, name) < 0:
+                raise SettingsError(f"atmosphere: {name} can't be negative")
+        if not 0 <= self.relative_humidity <= 100:
+            raise SettingsError("atmosphere: relative_humidity must be between 0 and 100")
+        if self.solver_tolerance <= 0 or self.solver_max_iterations <= 0:
+            raise SettingsError("atmosphere: solver_tolerance and solver_max_iterations must be positive")
+
+
+@dataclass(frozen=True)
+class RecorderSettings:
+    raw_interval: float     # game seconds between raw samples
+    raw_capacity: int       # rows kept in RAM per tier
+    minute_capacity: int
+    hour_capacity: int
+    spill_dir: str          # where evicted hourly rows are memory-mapped, "" to drop them
+
+    def __post_init__(self):
+        if self.raw_interval < 0:
+            raise SettingsError("recorder: raw_interval can't be negative")
+        for name in ("raw_capacity", "minute_capacity", "hour_capacity"):
+            if getattr(self, name) <= 0:
+                raise SettingsError(f"recorder: {name} must be positive")
+
+
+@dataclass(frozen=True)
+class AlertSettings:
+    hysteresis: float       # fraction of a limit an alarm must recover by before it clears
+    warning_horizon: float  # game seconds: warn when a limit will be crossed sooner than this
+    rate_smoothing: float   # EWMA weight of the newest rate of change, 0..1
+    # Crew limits checked in every room
+    o2_low: float           # mmHg partial pressure
+    o2_high: float          # mmHg partial pressure
+    co2_high: float         # ppm
+    pressure_low: float     # hPa
+    pressure_high: float    # hPa
+    temperature_low: float  # °C
+    temperature_high: float # °C
+    humidity_low: float     # % RH; NASA-STD-3001 V2 6012 keeps the daily average within 25-75 %
+    humidity_high: float    # % RH
+
+    def __post_init__(self):
+        if not 0 <= self.hysteresis < 1:
+            raise SettingsError("alerts: hysteresis must be in [0, 1)")
+        if self.warning_horizon < 0:
+            raise SettingsError("alerts: warning_horizon can't be negative")
+        if not 0 < self.rate_smoothing <= 1:
+            raise SettingsError("alerts: rate_smoothing must be in (0, 1]")
+        for low, high in (("o2_low", "o2_high"), ("pressure_low", "pressure_high"),
+                          ("temperature_low", "temperature_high")):
+            if getattr(self, low) >= getattr(self, high):
+                raise SettingsError(f"alerts: {low} must be below {high}")
+        if self.o2_low < 0 or self.co2_high <= 0 or self.pressure_low < 0:
+            raise SettingsError("alerts: o2_low and pressure_low can't be negative and co2_high must be positive")
+        if not 0 <= self.humidity_low < self.humidity_high <= 100:
+            raise SettingsError("alerts: humidity limits must be between 0 and 100")
+
+
+@dataclass(frozen=True)
+class LodSettings:
+    min_grid_line_spacing: float  # px; thinner grids are drawn with major lines only
+    density_scale: float          # below this zoom crew is drawn as density markers
+    sprite_scale: float           # from this zoom up crew is drawn with full sprites
+    density_cell: int             # px size of a density marker cell
+    dot_cell: int                 # px; people closer than this share one dot
+    dot_radius: int
+    density_color: Color
+
+    def __post_init__(self):
+        if self.min_grid_line_spacing <= 0:
+            raise SettingsError("lod: min_grid_line_spacing must be positive")
+        if not 0 < self.density_scale <= self.sprite_scale:
+            raise SettingsError("lod: expected 0 < density_scale <= sprite_scale")
+        if self.density_cell <= 0 or self.dot_cell <= 0 or self.dot_radius <= 0:
+            raise SettingsError("lod: cell sizes and dot_radius must be positive")
+
+
+@dataclass(frozen=True)
+class AutosaveSettings:
+    directory: str
+    interval: float         # game seconds between autosaves
+    keep: int               # number of autosaves kept on disk
+    compression_level: int  # zlib level, 0-9
+
+    def __post_init__(self):
+        if self.interval <= 0 or self.keep <= 0:
+            raise SettingsError("autosave: interval and keep must be positive")
+        if not 0 <= self.compression_level <= 9:
+            raise SettingsError("autosave: compression_level must be between 0 and 9")
+
+
+@dataclass(frozen=True)
+class TilemapSettings:
+    max_block_pixels: int  # px; longest side of one cached tile block before rotation
+    cache_pixels: int      # px; budget for all cached tile blocks together
+    floor_color: Color
+    corridor_color: Color
+    wall_color: Color
+
+    def __post_init__(self):
+        if self.max_block_pixels <= 0 or self.cache_pixels <= 0:
+            raise SettingsError("tilemap: max_block_pixels and cache_pixels must be positive")
+
+
+@dataclass(frozen=True)
+class MaintenanceSettings:
+    jobs_per_tick: int      # repair jobs the dispatcher tries to staff per tick
+    search_radius: float    # tiles; qualified colonists farther from the job are not sent, 0 for no limit
+    retry_ticks: int        # ticks a job nobody was in range for sits out before it is tried again
+
+    def __post_init__(self):
+        if self.jobs_per_tick <= 0:
+            raise SettingsError("maintenance: jobs_per_tick must be positive")
+        if self.retry_ticks <= 0:
+            raise SettingsError("maintenance: retry_ticks must be positive")
+        if self.search_radius < 0:
+            raise SettingsError("maintenance: search_radius must not be negative")
+
+
+@dataclass(frozen=True)
+class PacingSettings:
+    active_fps: int     # redraw rate while there is input or the view is moving
+    idle_fps: int       # redraw rate once idle, only when what is shown has changed
+    hidden_fps: int     # event polling rate while the window is minimized or hidden; nothing is drawn
+    idle_after: float   # real seconds without input before going idle
+
+    def __post_init__(self):
+        if not 0 < self.hidden_fps <= self.idle_fps <= self.active_fps:
+            raise SettingsError("pacing: expected 0 < hidden_fps <= idle_fps <= active_fps")
+        if self.idle_after < 0:
+            raise SettingsError("pacing: idle_after must not be negative")
+
+
+@dataclass(frozen=True)
+class TrendSettings:
+    ewma_alpha: float     # weight of the newest sample in the moving average and variance, 0..1
+    window: int           # samples in the rolling regression behind each slope
+    significance: float   # a trend shows when its change over the window exceeds this many standard deviations
+    cusum_drift: float    # standard deviations of shift the change detector ignores
+    cusum_threshold: float  # accumulated standard deviations that flag a change point
+    hud_interval: float   # real seconds between trend refreshes for the HUD
+
+    def __post_init__(self):
+        if not 0 < self.ewma_alpha <= 1:
+            raise SettingsError("trends: ewma_alpha must be in (0, 1]")
+        if self.window < 2:
+            raise SettingsError("trends: window must be at least 2")
+        if self.significance < 0 or self.cusum_drift < 0 or self.cusum_threshold <= 0:
+            raise SettingsError("trends: significance and cusum_drift can't be negative, cusum_threshold must be positive")
+        if self.hud_interval < 0:
+            raise SettingsError("trends: hud_interval can't be negative")
+
+
+@dataclass(frozen=True)
+class ColonySettings:
+    room_count: int   # rooms in the generated ship, Core included
+    crew_size: int    # colonists aboard at the start
+
+    def __post_init__(self):
+        if self.room_count <= 0 or self.crew_size <= 0:
+            raise SettingsError("colony: room_count and crew_size must be positive")
+
+
+@dataclass(frozen=True)
+class Settings:
+    window: WindowSettings
+    gui: GuiSettings
+    grid: GridSettings
+    time: TimeSettings
+    penalties: PenaltySettings
+    bmi: BmiSettings
+    initial_resources: ResourceSettings
+    atmosphere: AtmosphereSettings
+    recorder: RecorderSettings
+    alerts: AlertSettings
+    lod: LodSettings
+    autosave: AutosaveSettings
+    tilemap: TilemapSettings
+    maintenance: MaintenanceSettings
+    pacing: PacingSettings
+    trends: TrendSettings
+    colony: ColonySettings
+
+    def grid_period(self, scale):
+        """
+        Returns the distance between two parallel grid lines at the given scale.
+        """
+        return self.grid.base_grid_spacing * scale * math.sqrt(2)
+
+
+def _convert(section, name, expected, value):
+    # bool is an int subclass, so reject it explicitly for numeric fields
+    if expected is Color:
+        if (isinstance(value, (list, tuple)) and len(value) == 3
+                and all(isinstance(v, int) and not isinstance(v, bool) and 0 <= v <= 255 for v in value)):
+            return tuple(value)
+        raise SettingsError(f"{section}.{name}: expected an [r, g, b] color, got {value!r}")
+    if expected is int:
+        if isinstance(value, int) and not isinstance(value, bool):
+            return value
+        raise SettingsError(f"{section}.{name}: expected an integer, got {value!r}")
+    if expected is float:
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        raise SettingsError(f"{section}.{name}: expected a number, got {value!r}")
+    if expected is str:
+        if isinstance(value, str):
+            return value
+        raise SettingsError(f"{section}.{name}: expected a string, got {value!r}")
+    raise SettingsError(f"{section}.{name}: unsupported setting type {expected!r}")
+
+
+def _build_section(cls, section, raw):
+    if not isinstance(raw, dict):
+        raise SettingsError(f"{section}: expected an object")
+    init_fields = [f for f in fields(cls) if f.init]
+    known = {f.name for f in init_fields}
+    unknown = set(raw) - known
+    if unknown:
+        raise SettingsError(f"{section}: unknown settings {sorted(unknown)}")
+    values = {}
+    for f in init_fields:
+        if f.name not in raw:
+            raise SettingsError(f"{section}.{f.name}: missing")
+        values[f.name] = _convert(section, f.name, f.type, raw[f.name])
+    return cls(**values)
+
+
+_SECTIONS = {
+    "window": WindowSettings,
+    "gui": GuiSettings,
+    "grid": GridSettings,
+    "time": TimeSettings,
+    "penalties": PenaltySettings,
+    "bmi": BmiSettings,
+    "initial_resources": ResourceSettings,
+    "atmosphere": AtmosphereSettings,
+    "recorder": RecorderSettings,
+    "alerts": AlertSettings,
+    "lod": LodSettings,
+    "autosave": AutosaveSettings,
+    "tilemap": TilemapSettings,
+    "maintenance": MaintenanceSettings,
+    "pacing": PacingSettings,
+    "trends": TrendSettings,
+    "colony": ColonySettings,
+}
+
+
+def build_settings(raw):
+    """
+    Validates a parsed settings.json and returns a frozen Settings object.
+    """
+    if not isinstance(raw, dict):
+        raise SettingsError("settings: expected an object")
+    sections = {name: _build_section(cls, name, raw.get(name, {})) for name, cls in _SECTIONS.items()}
+    return Settings(**sections)
+
+
+def load_settings(path=settings_path):
+    with open(path, 'r') as file:
+        return build_settings(json.load(file))
+
+
+SETTINGS = build_settings(config)
+
+
+class SettingsWatcher():
+    """
+    Watches settings.json and swaps in a new SETTINGS object when the file changes.
+    A broken file is reported and ignored, so a running game keeps its last good settings.
+    """
+    def __init__(self, path=settings_path, interval=1.0):
+        self.path = path
+        self.interval = interval  # real seconds between file checks
+        self.listeners = []
+        self.next_check = 0.0
+        self.mtime = self._stat()
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def subscribe(self, callback):
+        """
+        Registers callback(settings), called with the new settings after every reload.
+        """
+        self.listeners.append(callback)
+
+    def poll(self, now=None):
+        """
+        Cheap enough to call every frame: only touches the file system once per interval.
+        Returns True when new settings were applied.
+        """
+        now = time.monotonic() if now is None else now
+        if now < self.next_check:
+            return False
+        self.next_check = now + self.interval
+        mtime = self._stat()
+        if mtime is None or mtime == self.mtime:
+            return False
+        self.mtime = mtime
+        return self.reload()
+
+    def reload(self):
+        global SETTINGS
+        try:
+            with open(self.path, 'r') as file:
+                raw = json.load(file)
+            new_settings = build_settings(raw)
+        except (OSError, json.JSONDecodeError, SettingsError) as error:
+            print(f"Settings reload failed, keeping previous settings: {error}")
+            return False
+        SETTINGS = new_settings
+        _refresh_dicts(raw)
+        for callback in self.listeners:
+            callback(new_settings)
+        return True
+
+
+def _refresh_dicts(raw):
+    # Update the legacy dictionaries in place so modules holding them see the new values
+    for target, key in ((WINDOW, 'window'), (GUI, 'gui'), (GRID, 'grid'), (TIME, 'time'),
+                        (WEIGHTS, 'weights'), (PENALTIES, 'penalties'), (BMI, 'bmi'),
+                        (INITIAL_RESOURCES, 'initial_resources')):
+        target.clear()
+        target.update(raw.get(key, {}))
+
+
+def current():
+    """
+    Returns the settings in effect right now (SETTINGS is replaced on reload).
+    """
+    return SETTINGS
@@ -0,0 +1,100 @@
+# simulation.py
+
+"""
+Runs Game.tick on a background thread so slow simulation steps never drop frames.
+
+The worker publishes an immutable snapshot after every tick into a two-slot buffer:
+it writes the back slot, then flips the front index, which is a single atomic
+assignment. The renderer reads the front slot without taking a lock. Anything the
+UI wants to change in the simulation goes the other way through a command queue and
+is applied on the worker thread between ticks.
+"""
+
+import queue
+import threading
+import time
+
+
+class SnapshotBuffer():
+    """
+    Double buffer of immutable snapshots: one writer (the worker), any number of readers.
+    """
+    def __init__(self, initial):
+        self._slots = [initial, initial]
+        self._front = 0
+
+    def publish(self, snapshot):
+        back = 1 - self._front
+        self._slots[back] = snapshot
+        self._front = back  # readers switch over here
+
+    def latest(self):
+        return self._slots[self._front]
+
+
+class SimulationWorker():
+    """
+    Ticks a Game at a fixed real-time rate on its own thread.
+    """
+    def __init__(self, game, rate=60, max_step=0.25):
+        self.game = game
+        self.interval = 1.0 / rate
+        self.max_step = max_step  # real seconds; longer stalls are not caught up in one tick
+        self.commands = queue.SimpleQueue()
+        self.snapshots = SnapshotBuffer(game.snapshot())
+        self.error = None
+        self.tick_time = 0.0  # real seconds the last tick took
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._thread.join(timeout)
+        self.check()
+
+    def submit(self, command, *args):
+        """
+        Queues command(game, *args) to run on the simulation thread before the next tick.
+        """
+        self.commands.put((command, args))
+
+    def latest(self):
+        """
+        The most recent snapshot. Never blocks.
+        """
+        return self.snapshots.latest()
+
+    def check(self):
+        """
+        Re-raises an exception from the simulation thread on the caller's thread.
+        """
+        if self.error is not None:
+            raise RuntimeError("simulation thread stopped") from self.error
+
+    def _drain_commands(self):
+        while True:
+            try:
+                command, args = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            command(self.game, *args)
+
+    def _run(self):
+        last = time.monotonic()
+        try:
+            while not self._stop.is_set():
+                started = time.monotonic()
+                dt = min(started - last, self.max_step)
+                last = started
+                self._drain_commands()
+                self.game.tick(dt)
+                self.snapshots.publish(self.game.snapshot())
+                self.tick_time = time.monotonic() - started
+                remaining = self.interval - self.tick_time
+                if remaining > 0:
+                    self._stop.wait(remaining)
+        except Exception as error:
+            self.error = error
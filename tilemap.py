@@ -0,0 +1,135 @@
+# tilemap.py
+
+"""
+Tile data behind the grid, stored in square NumPy chunks.
+
+Chunks are allocated only where something is written, so the map is unbounded in
+every direction and empty space costs nothing. Every chunk carries a version that
+goes up whenever one of its tiles changes; renderers compare versions to know which
+cached images are stale.
+"""
+
+import numpy as np
+from entities.layout import EMPTY, CORRIDOR
+
+CHUNK_SIZE = 32
+
+# Floor types
+NO_FLOOR, ROOM_FLOOR, CORRIDOR_FLOOR = range(3)
+# Room id of tiles that belong to no room
+NO_ROOM = -1
+
+
+class Chunk():
+    """
+    CHUNK_SIZE x CHUNK_SIZE tiles, indexed [y, x] like the layout arrays.
+    """
+    __slots__ = ("floor", "wall", "room", "version")
+
+    def __init__(self):
+        self.floor = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=np.uint8)
+        self.wall = np.zeros((CHUNK_SIZE, CHUNK_SIZE), dtype=bool)
+        self.room = np.full((CHUNK_SIZE, CHUNK_SIZE), NO_ROOM, dtype=np.int32)
+        self.version = 0
+
+    def empty(self):
+        return not (self.floor.any() or self.wall.any())
+
+
+class TileMap():
+    """
+    Sparse map of floor type, wall flag and room id per tile, with integer tile
+    coordinates (x, y) that may be negative.
+    """
+    def __init__(self):
+        self.chunks = {}  # (chunk x, chunk y) -> Chunk
+
+    def __len__(self):
+        return len(self.chunks)
+
+    def chunk(self, cx, cy, create=False):
+        chunk = self.chunks.get((cx, cy))
+        if chunk is None and create:
+            chunk = self.chunks[(cx, cy)] = Chunk()
+        return chunk
+
+    def get(self, x, y):
+        """
+        (floor, wall, room) for one tile.
+        """
+        chunk = self.chunks.get((x // CHUNK_SIZE, y // CHUNK_SIZE))
+        if chunk is None:
+            return NO_FLOOR, False, NO_ROOM
+        ly, lx = y % CHUNK_SIZE, x % CHUNK_SIZE
+        return int(chunk.floor[ly, lx]), bool(chunk.wall[ly, lx]), int(chunk.room[ly, lx])
+
+    def set_tile(self, x, y, floor=None, wall=None, room=None):
+        self.fill(x, y, 1, 1, floor, wall, room)
+
+    def fill(self, x, y, width, height, floor=None, wall=None, room=None):
+        """
+        Sets the given layers over a rectangle of tiles. Layers left as None are unchanged.
+        """
+        for cy in range(y // CHUNK_SIZE, (y + height - 1) // CHUNK_SIZE + 1):
+            for cx in range(x // CHUNK_SIZE, (x + width - 1) // CHUNK_SIZE + 1):
+                x0 = max(x, cx * CHUNK_SIZE) - cx * CHUNK_SIZE
+                y0 = max(y, cy * CHUNK_SIZE) - cy * CHUNK_SIZE
+                x1 = min(x + width, (cx + 1) * CHUNK_SIZE) - cx * CHUNK_SIZE
+                y1 = min(y + height, (cy + 1) * CHUNK_SIZE) - cy * CHUNK_SIZE
+                chunk = self.chunk(cx, cy, create=True)
+                if floor is not None:
+                    chunk.floor[y0:y1, x0:x1] = floor
+                if wall is not None:
+                    chunk.wall[y0:y1, x0:x1] = wall
+                if room is not None:
+                    chunk.room[y0:y1, x0:x1] = room
+                chunk.version += 1
+
+    def paste(self, x, y, floor, wall, room):
+        """
+        Writes whole (height, width) layer arrays with their top left tile at (x, y).
+        Chunks that would stay completely empty are not allocated.
+        """
+        height, width = floor.shape
+        for cy in range(y // CHUNK_SIZE, (y + height - 1) // CHUNK_SIZE + 1):
+            for cx in range(x // CHUNK_SIZE, (x + width - 1) // CHUNK_SIZE + 1):
+                # Overlap of this chunk and the pasted area, in map coordinates
+                x0, x1 = max(x, cx * CHUNK_SIZE), min(x + width, (cx + 1) * CHUNK_SIZE)
+                y0, y1 = max(y, cy * CHUNK_SIZE), min(y + height, (cy + 1) * CHUNK_SIZE)
+                source = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+                if (cx, cy) not in self.chunks and not (floor[source].any() or wall[source].any()):
+                    continue
+                target = (slice(y0 - cy * CHUNK_SIZE, y1 - cy * CHUNK_SIZE),
+                          slice(x0 - cx * CHUNK_SIZE, x1 - cx * CHUNK_SIZE))
+                chunk = self.chunk(cx, cy, create=True)
+                chunk.floor[target] = floor[source]
+                chunk.wall[target] = wall[source]
+                chunk.room[target] = room[source]
+                chunk.version += 1
+
+    def prune(self):
+        """
+        Frees chunks that no longer hold anything.
+        """
+        for key in [key for key, chunk in self.chunks.items() if chunk.empty()]:
+            del self.chunks[key]
+
+    @classmethod
+    def from_layout(cls, layout, x=0, y=0):
+        """
+        Tiles for a ShipLayout: room and corridor floors, and walls around them.
+        """
+        tiles = layout.tiles
+        floor = np.where(tiles >= 0, ROOM_FLOOR, np.where(tiles == CORRIDOR, CORRIDOR_FLOOR, NO_FLOOR)).astype(np.uint8)
+        # Walls go on empty tiles that touch a floor tile, diagonals included
+        padded = np.pad(tiles != EMPTY, 1)
+        near_floor = np.zeros_like(tiles, dtype=bool)
+        height, width = tiles.shape
+        for dy in (0, 1, 2):
+            for dx in (0, 1, 2):
+                near_floor |= padded[dy:dy + height, dx:dx + width]
+        wall = near_floor & (tiles == EMPTY)
+        room = np.where(tiles >= 0, tiles, NO_ROOM).astype(np.int32)
+        tilemap = cls()
+        tilemap.paste(x, y, floor, wall, room)
+        return tilemap
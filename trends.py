@@ -0,0 +1,235 @@
+# trends.py
+
+"""
+Trend analysis of environmental data (NASA-STD-3001 V2 6001).
+
+Every tracked channel gets a set of streaming statistics, all kept as arrays over the
+channels and updated in O(1) per sample whatever the length of the run:
+    EWMA mean and variance      recent level and noise
+    Welford mean and variance   level and spread since tracking began
+    rolling regression slope    rate of change over the last `window` samples
+    two-sided CUSUM             change points: residuals from the rolling fit that stay off
+                                to one side, so a steady ramp is a trend, not a shift
+The rolling sums are rebuilt from the window's ring buffer once per window to keep
+rounding errors from piling up, which is still constant work per sample on average.
+"""
+
+from collections import namedtuple
+import numpy as np
+import settings
+
+# direction is -1, 0 or +1; changed is True while a change point is within the last window
+Trend = namedtuple("Trend", ["channel", "value", "slope", "direction", "changed"])
+# Attributes that change as samples come in; the channels and parameters come from the constructor
+STATE = ("value", "ewma", "ewvar", "count", "mean", "_m2", "_times", "_values", "_start", "_size", "_origin",
+         "_st", "_stt", "_sy", "_sty", "_since_rebuild", "slope", "cusum_high", "cusum_low", "residual_var",
+         "last_change", "changes")
+
+
+class TrendTracker():
+    """
+    Streaming statistics for a fixed list of named channels sampled together.
+    """
+    def __init__(self, channels, ewma_alpha=None, window=None, significance=None,
+                 cusum_drift=None, cusum_threshold=None):
+        config = settings.current().trends
+        self.channels = list(channels)
+        self.channel_index = {name: i for i, name in enumerate(self.channels)}
+        self.alpha = config.ewma_alpha if ewma_alpha is None else ewma_alpha
+        self.window = config.window if window is None else window
+        self.significance = config.significance if significance is None else significance
+        self.cusum_drift = config.cusum_drift if cusum_drift is None else cusum_drift
+        self.cusum_threshold = config.cusum_threshold if cusum_threshold is None else cusum_threshold
+        width = len(self.channels)
+
+        self.value = np.full(width, np.nan)
+        self.ewma = np.zeros(width)
+        self.ewvar = np.zeros(width)
+        self.count = 0
+        self.mean = np.zeros(width)
+        self._m2 = np.zeros(width)
+        # Ring buffer of the regression window, and running sums over it
+        self._times = np.zeros(self.window)
+        self._values = np.zeros((self.window, width))
+        self._start = 0
+        self._size = 0
+        self._origin = 0.0  # times are summed relative to this, for precision
+        self._st = 0.0
+        self._stt = 0.0
+        self._sy = np.zeros(width)
+        self._sty = np.zeros(width)
+        self._since_rebuild = 0
+        self.slope = np.zeros(width)  # per game second
+        self.cusum_high = np.zeros(width)
+        self.cusum_low = np.zeros(width)
+        self.residual_var = np.zeros(width)  # EWMA of squared residuals from the rolling fit
+        self.last_change = np.full(width, -1, dtype=np.int64)  # sample number of the latest change point
+        self.changes = 0
+        # No change detection until the noise estimate has settled
+        self.warmup = int(np.ceil(1.0 / self.alpha))
+
+    def __len__(self):
+        return len(self.channels)
+
+    def update(self, time, values):
+        """
+        Adds one sample of every channel, nan where there is no reading.
+        Returns the indices of channels with a new change point.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        self.value = values
+        missing = np.isnan(values)
+        if missing.any():
+            # No reading (e.g. mood with nobody aboard): hold the recent level so the sums stay finite
+            values = np.where(missing, self.ewma if self.count else 0.0, values)
+        if self.count == 0:
+            self.ewma = values.copy()
+            self.mean = values.copy()
+            self._origin = time
+        self.count += 1
+
+        # Change detection on the residual from the fit over the window so far
+        changed = np.empty(0, dtype=np.intp)
+        if self._size >= 2:
+            k = self._size
+            t = time - self._origin
+            predicted = self._sy / k + self.slope * (t - self._st / k)
+            residual = values - predicted
+            if self.count > self.warmup:
+                scale = np.maximum(np.sqrt(self.residual_var), 1e-9 * np.maximum(np.abs(self.ewma), 1.0))
+                z = residual / scale
+                self.cusum_high = np.maximum(0.0, self.cusum_high + z - self.cusum_drift)
+                self.cusum_low = np.maximum(0.0, self.cusum_low - z - self.cusum_drift)
+                # A shift is reported once; the fit needs a window to take in the new level
+                settled = (self.last_change < 0) | (self.count - self.last_change >= self.window)
+                changed = np.flatnonzero(settled & ((self.cusum_high > self.cusum_threshold)
+                                                    | (self.cusum_low > self.cusum_threshold)))
+                if len(changed):
+                    self.last_change[changed] = self.count
+                    self.changes += len(changed)
+                self.cusum_high[~settled] = 0.0
+                self.cusum_low[~settled] = 0.0
+                self.cusum_high[changed] = 0.0
+                self.cusum_low[changed] = 0.0
+            self.residual_var += self.alpha * (residual * residual - self.residual_var)
+
+        # EWMA mean and variance (West's incremental form)
+        delta = values - self.ewma
+        self.ewma += self.alpha * delta
+        self.ewvar = (1.0 - self.alpha) * (self.ewvar + self.alpha * delta * delta)
+        # Welford
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self._m2 += delta * (values - self.mean)
+
+        self._push(time, values)
+        return changed
+
+    def _push(self, time, values):
+        t = time - self._origin
+        if self._size == self.window:
+            old_t = self._times[self._start]
+            old = self._values[self._start]
+            self._st -= old_t
+            self._stt -= old_t * old_t
+            self._sy -= old
+            self._sty -= old_t * old
+            index = self._start
+            self._start = (self._start + 1) % self.window
+        else:
+            index = (self._start + self._size) % self.window
+            self._size += 1
+        self._times[index] = t
+        self._values[index] = values
+        self._st += t
+        self._stt += t * t
+        self._sy += values
+        self._sty += t * values
+        self._since_rebuild += 1
+        if self._since_rebuild >= self.window:
+            self._rebuild()
+        k = self._size
+        denominator = k * self._stt - self._st * self._st
+        if k > 1 and denominator > 0:
+            self.slope = (k * self._sty - self._st * self._sy) / denominator
+        else:
+            self.slope = np.zeros_like(self._sy)
+
+    def _rebuild(self):
+        # Re-centre on the oldest sample and resum the window from scratch
+        shift = self._times[self._start]
+        self._times -= shift
+        self._origin += shift
+        times = self._times[:self._size] if self._size < self.window else self._times
+        values = self._values[:self._size] if self._size < self.window else self._values
+        self._st = times.sum()
+        self._stt = (times * times).sum()
+        self._sy = values.sum(axis=0)
+        self._sty = times @ values
+        self._since_rebuild = 0
+
+    def save_state(self):
+        return {name: getattr(self, name) for name in STATE}
+
+    def load_state(self, state):
+        if state["_values"].shape != self._values.shape:
+            raise ValueError("trends: the save has a different channel count or window")
+        for name in STATE:
+            value = state[name]
+            setattr(self, name, value.copy() if isinstance(value, np.ndarray) else value)
+
+    @property
+    def variance(self):
+        # Welford sample variance since tracking began
+        return self._m2 / max(self.count - 1, 1)
+
+    @property
+    def std(self):
+        return np.sqrt(self.ewvar)
+
+    def span(self):
+        """
+        Game seconds covered by the regression window.
+        """
+        if self._size < 2:
+            return 0.0
+        newest = (self._start + self._size - 1) % self.window
+        return self._times[newest] - self._times[self._start]
+
+    def directions(self):
+        """
+        -1, 0 or +1 per channel: the change over the window against the noise around the fit.
+        """
+        change = self.slope * self.span()
+        noise = np.maximum(np.sqrt(self.residual_var), 1e-9 * np.maximum(np.abs(self.ewma), 1.0))
+        return np.where(np.abs(change) > self.significance * noise, np.sign(change), 0.0).astype(np.int8)
+
+    def trends(self, channels=None):
+        """
+        Trend tuples for the given channel names (all channels by default).
+        """
+        indices = range(len(self.channels)) if channels is None else [self.channel_index[name] for name in channels]
+        directions = self.directions()
+        recent = (self.last_change >= 0) & (self.count - self.last_change < self.window)
+        return tuple(Trend(self.channels[i], float(self.value[i]), float(self.slope[i]), int(directions[i]),
+                           bool(recent[i])) for i in indices)
+
+
+if __name__ == "__main__":
+    import time
+    rng = np.random.default_rng(0)
+    tracker = TrendTracker([f"channel {i}" for i in range(1000)], window=360)
+    level = np.zeros(1000)
+    ramp = np.zeros(1000)
+    ramp[:100] = 0.01  # channels 0..99 drift upwards
+    started = time.perf_counter()
+    for sample in range(5000):
+        if sample == 3000:
+            level[500:550] += 5.0  # channels 500..549 jump
+        tracker.update(sample * 10.0, level + ramp * sample + rng.normal(0, 1.0, 1000))
+    elapsed = time.perf_counter() - started
+    directions = tracker.directions()
+    print(f"5000 samples of 1000 channels: {elapsed / 5000 * 1e6:.0f} µs per sample")
+    print(f"rising: {np.flatnonzero(directions > 0)[:5]}... ({(directions > 0).sum()}), "
+          f"falling: {(directions < 0).sum()}, change points after the jump: "
+          f"{np.count_nonzero(tracker.last_change[500:550] > 3000)} of 50")